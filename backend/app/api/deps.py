@@ -1,13 +1,71 @@
-from collections.abc import Iterator
+import asyncio
+from collections.abc import Awaitable, Iterator
+from typing import TYPE_CHECKING, TypeVar
 
-from sqlalchemy.orm import Session
+from fastapi import Header, Request
 
-from app.db.session import SessionLocal
+from app.core.config import get_settings
+from app.core.deadline import RECEIVED_AT_KEY, Deadline
 
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.orm import Session
 
-def get_db() -> Iterator[Session]:
-    db = SessionLocal()
+T = TypeVar("T")
+
+
+class ClientDisconnectedError(Exception):
+    pass
+
+
+def get_db() -> Iterator["Session"]:
+    from app.db.session import get_session_factory
+
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_request_deadline(
+    request: Request,
+    x_request_timeout_ms: int | None = Header(
+        default=None,
+        ge=0,
+        description="Milliseconds the client is willing to wait; defaults to the server setting",
+    ),
+) -> Deadline | None:
+    timeout_ms = x_request_timeout_ms
+    if timeout_ms is None:
+        timeout_ms = get_settings().detection_request_timeout_ms
+    if not timeout_ms:
+        return None
+    received_at = getattr(request.state, RECEIVED_AT_KEY, None)
+    return Deadline.after(timeout_ms / 1000, start=received_at)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it if the client goes away first."""
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not work.done():
+            work.cancel()
+            try:
+                await work
+            except asyncio.CancelledError:
+                pass
+            raise ClientDisconnectedError
+        return work.result()
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
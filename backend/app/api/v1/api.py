@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import detection, health
+from app.api.v1.endpoints import detection, health, metrics
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, tags=["Health"])
+api_router.include_router(metrics.router, tags=["Metrics"])
 api_router.include_router(detection.router)
@@ -1,3 +1,3 @@
-from app.api.v1.endpoints import detection, health
+from app.api.v1.endpoints import detection, health, metrics
 
-__all__ = ["health", "detection"]
+__all__ = ["health", "detection", "metrics"]
@@ -1,16 +1,49 @@
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+import hashlib
+import time
+from datetime import datetime
+from typing import Any
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.params import Query
+from fastapi.responses import StreamingResponse
 
+from app.api.deps import ClientDisconnectedError, cancel_on_disconnect, get_request_deadline
+from app.core.deadline import RECEIVED_AT_KEY, Deadline, DeadlineExceededError
+from app.core.metrics import metrics
+from app.core.timing import SERVER_TIMING_HEADER, StageTimings
+from app.repositories.base import UnsupportedFilterError
 from app.schemas.detection import (
     ClassFrequencyResponse,
+    DetectionHistoryFilters,
     DetectionHistoryResponse,
     DetectionResponse,
 )
+from app.schemas.tracking import TrackFrequencyResponse, VideoTrackingResponse
 from app.services.detection import DetectionService, get_detection_service
-from app.utils.images import read_upload_image
+from app.services.export import ExportFormat, ensure_format_available
+from app.services.previews import PreviewKind
+from app.services.response_cache import CachedResponse
+from app.utils.images import decode_image_bytes, read_upload_image
+from app.utils.roi import parse_roi
+from app.utils.video import save_upload_video
 
 router = APIRouter(prefix="/detection", tags=["Detection"])
 
+CLIENT_CLOSED_REQUEST = 499
+STREAM_END_MESSAGE = "end"
+PREVIEW_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 @router.post(
     "/image",
@@ -19,26 +52,158 @@ router = APIRouter(prefix="/detection", tags=["Detection"])
     summary="Run object detection on a single image",
 )
 async def detect_single_image(
+    request: Request,
+    response: Response,
     file: UploadFile = File(..., description="Image file to analyze"),
     classes: list[str] | None = Query(
         default=None,
         description="Optional list of class names to filter detections (case-insensitive)",
     ),
+    roi: str | None = Query(
+        default=None,
+        description=(
+            "Normalized region to run inference on: 'x_min,y_min,x_max,y_max' or a polygon 'x1,y1;x2,y2;x3,y3[;...]'"
+        ),
+    ),
+    source_id: str | None = Query(
+        default=None,
+        description="Camera or feed id; near-duplicate reuse only applies to frames that carry one",
+    ),
+    deadline: Deadline | None = Depends(get_request_deadline),
     service: DetectionService = Depends(get_detection_service),
-) -> DetectionResponse:
+) -> DetectionResponse | Response:
+    timings = StageTimings()
+    received_at = getattr(request.state, RECEIVED_AT_KEY, None)
+    if received_at is not None:
+        # Upload, multipart parsing and dependency resolution all happen before the handler runs.
+        timings.record("parse", (time.monotonic() - received_at) * 1000)
     try:
-        image = await read_upload_image(file)
+        if deadline is not None:
+            deadline.check("decoding")
+        region = parse_roi(roi)
+        with timings.measure("decode"):
+            image = await read_upload_image(file)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except DeadlineExceededError as exc:
+        metrics.increment("detection.requests_dropped")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
 
     try:
-        return await service.run_detection(
-            image,
+        result = await cancel_on_disconnect(
+            request,
+            service.run_detection(
+                image,
+                selected_classes=classes,
+                source_name=file.filename,
+                deadline=deadline,
+                roi=region,
+                timings=timings,
+                source_id=source_id,
+            ),
+        )
+    except DeadlineExceededError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except ClientDisconnectedError:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+    if received_at is not None:
+        timings.record("total", (time.monotonic() - received_at) * 1000)
+    response.headers[SERVER_TIMING_HEADER] = timings.header_value()
+    return result
+
+
+@router.post(
+    "/video",
+    response_model=VideoTrackingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Track objects across the frames of an uploaded video",
+)
+async def track_video(
+    file: UploadFile = File(..., description="Video file to analyze"),
+    classes: list[str] | None = Query(
+        default=None,
+        description="Optional list of class names to filter detections (case-insensitive)",
+    ),
+    frame_stride: int = Query(1, ge=1, le=60, description="Process every n-th frame"),
+    max_frames: int | None = Query(default=None, ge=1, description="Stop after this many processed frames"),
+    roi: str | None = Query(
+        default=None,
+        description=(
+            "Normalized region to run inference on: 'x_min,y_min,x_max,y_max' or a polygon 'x1,y1;x2,y2;x3,y3[;...]'"
+        ),
+    ),
+    service: DetectionService = Depends(get_detection_service),
+) -> VideoTrackingResponse:
+    try:
+        region = parse_roi(roi)
+        path = await save_upload_video(file)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    try:
+        return await service.track_video(
+            path,
             selected_classes=classes,
             source_name=file.filename,
+            frame_stride=frame_stride,
+            max_frames=max_frames,
+            roi=region,
         )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    finally:
+        path.unlink(missing_ok=True)
+
+
+@router.websocket("/stream")
+async def track_stream(
+    websocket: WebSocket,
+    classes: list[str] | None = Query(default=None),
+    source_name: str | None = Query(default=None),
+    roi: str | None = Query(default=None),
+    service: DetectionService = Depends(get_detection_service),
+) -> None:
+    """
+    Live tracking: the client sends one encoded image per binary message and receives a `TrackedFrameResponse`
+    JSON message per frame. Sending the text message `end` returns a `TrackingSessionSummary` and closes the
+    connection. Tracks are persisted as they end and when the connection closes either way.
+    """
+    await websocket.accept()
+    try:
+        region = parse_roi(roi)
+    except ValueError as exc:
+        await websocket.send_json({"error": str(exc)})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    session = service.open_tracking_session(
+        selected_classes=classes, source_name=source_name, source_type="stream", roi=region
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") == STREAM_END_MESSAGE:
+                await session.close()
+                await websocket.send_text(session.summary().model_dump_json())
+                await websocket.close()
+                break
+            try:
+                image = decode_image_bytes(message.get("bytes") or b"")
+            except ValueError as exc:
+                await websocket.send_json({"error": str(exc)})
+                continue
+            frame = await session.process(image)
+            await websocket.send_text(frame.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
 
 
 @router.get(
@@ -47,15 +212,73 @@ async def detect_single_image(
     summary="List historical detections with pagination",
 )
 async def list_detection_history(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     page_size: int = Query(10, ge=1, le=100, description="Number of records per page"),
     class_name: str | None = Query(
         default=None,
         description="Filter history to only detections containing this class name",
     ),
+    min_confidence: float | None = Query(default=None, ge=0, le=1, description="Minimum detection confidence"),
+    min_area: float | None = Query(
+        default=None,
+        ge=0,
+        le=1,
+        description="Minimum box area as a fraction of the frame (e.g. 0.05 for 5%)",
+    ),
+    max_area: float | None = Query(default=None, ge=0, le=1, description="Maximum box area as a fraction of the frame"),
+    region: str | None = Query(
+        default=None,
+        description="Normalized 'x_min,y_min,x_max,y_max' rectangle that the box center must fall in",
+    ),
+    start: datetime | None = Query(default=None, description="Only include results created at or after this time"),
+    end: datetime | None = Query(default=None, description="Only include results created before this time"),
     service: DetectionService = Depends(get_detection_service),
-) -> DetectionHistoryResponse:
-    return await service.list_detection_history(page=page, page_size=page_size, class_name=class_name)
+) -> DetectionHistoryResponse | Response:
+    try:
+        filters = DetectionHistoryFilters(
+            min_confidence=min_confidence,
+            min_area=min_area,
+            max_area=max_area,
+            region=_parse_region(region),
+            start=start,
+            end=end,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    try:
+        cached = await service.cached_detection_history(
+            page=page,
+            page_size=page_size,
+            class_name=class_name,
+            filters=filters,
+        )
+    except UnsupportedFilterError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return _conditional(request, response, cached)
+
+
+def _conditional(request: Request, response: Response, cached: CachedResponse) -> Any:
+    """Answer `304 Not Modified` when the client's ETag still matches; otherwise return the body with its ETag."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.matches(request.headers.get("if-none-match")):
+        metrics.increment("response_cache.not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return cached.value
+
+
+def _parse_region(value: str | None) -> tuple[float, float, float, float] | None:
+    if not value:
+        return None
+    parts = [part.strip() for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("region must be 'x_min,y_min,x_max,y_max'")
+    x_min, y_min, x_max, y_max = (float(part) for part in parts)
+    if not (0 <= x_min <= x_max <= 1 and 0 <= y_min <= y_max <= 1):
+        raise ValueError("region coordinates must be normalized to [0, 1] with min <= max")
+    return x_min, y_min, x_max, y_max
 
 
 @router.get(
@@ -64,6 +287,8 @@ async def list_detection_history(
     summary="Aggregate detections per class across history",
 )
 async def class_frequency_analytics(
+    request: Request,
+    response: Response,
     class_name: list[str] | None = Query(
         default=None,
         description="Optional repeated query param to limit aggregation to specific class names",
@@ -75,6 +300,97 @@ async def class_frequency_analytics(
         description="Maximum number of classes to return (set to 0 to disable limit)",
     ),
     service: DetectionService = Depends(get_detection_service),
-) -> ClassFrequencyResponse:
+) -> ClassFrequencyResponse | Response:
     applied_limit = None if limit == 0 else limit
-    return await service.class_frequency(class_names=class_name, limit=applied_limit)
+    cached = await service.cached_class_frequency(class_names=class_name, limit=applied_limit)
+    return _conditional(request, response, cached)
+
+
+@router.get(
+    "/analytics/tracks",
+    response_model=TrackFrequencyResponse,
+    summary="Count tracked objects per class across videos and streams",
+)
+async def track_frequency_analytics(
+    request: Request,
+    response: Response,
+    class_name: list[str] | None = Query(
+        default=None,
+        description="Optional repeated query param to limit aggregation to specific class names",
+    ),
+    limit: int | None = Query(
+        default=20,
+        ge=0,
+        le=200,
+        description="Maximum number of classes to return (set to 0 to disable limit)",
+    ),
+    service: DetectionService = Depends(get_detection_service),
+) -> TrackFrequencyResponse | Response:
+    applied_limit = None if limit == 0 else limit
+    cached = await service.cached_track_frequency(class_names=class_name, limit=applied_limit)
+    return _conditional(request, response, cached)
+
+
+@router.get(
+    "/results/{result_id}/{kind}",
+    response_class=Response,
+    responses={200: {"content": {"image/webp": {}, "image/jpeg": {}}}},
+    summary="Serve the thumbnail or downscaled preview stored for a detection result",
+)
+async def get_result_preview(
+    request: Request,
+    result_id: str,
+    kind: PreviewKind,
+    service: DetectionService = Depends(get_detection_service),
+) -> Response:
+    preview = await service.fetch_preview(result_id, kind)
+    if preview is None:
+        # Also the answer while the preview is still being rendered; clients fall back to the original.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No {kind.value} for result {result_id}")
+    # A result's previews are written once and never change, so clients may cache them indefinitely.
+    etag = f'"{hashlib.blake2b(preview.data, digest_size=12).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL}
+    if request.headers.get("if-none-match") in (etag, f"W/{etag}"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=preview.data, media_type=preview.media_type, headers=headers)
+
+
+@router.get(
+    "/export",
+    summary="Stream detection history as CSV, Arrow IPC or Parquet, one row per detection",
+    response_class=StreamingResponse,
+)
+async def export_detection_history(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format", description="Output format"),
+    start: datetime | None = Query(default=None, description="Only include results created at or after this time"),
+    end: datetime | None = Query(default=None, description="Only include results created before this time"),
+    class_name: list[str] | None = Query(
+        default=None,
+        description="Optional repeated query param to limit the export to specific class names",
+    ),
+    batch_size: int | None = Query(
+        default=None,
+        ge=1,
+        le=50_000,
+        description="Documents fetched per cursor batch (defaults to the server setting)",
+    ),
+    service: DetectionService = Depends(get_detection_service),
+) -> StreamingResponse:
+    try:
+        ensure_format_available(export_format)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+    stream = service.export_history(
+        export_format,
+        start=start,
+        end=end,
+        class_names=class_name,
+        batch_size=batch_size,
+    )
+    filename = f"detections.{export_format.extension}"
+    return StreamingResponse(
+        stream,
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
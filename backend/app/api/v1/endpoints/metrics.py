@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from app.core.metrics import metrics
+from app.core.threads import cgroup_cpu_limit, get_thread_layout
+from app.schemas.metrics import MetricsResponse, ThreadLayoutResponse
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=MetricsResponse, summary="Process-local request counters")
+async def read_metrics() -> MetricsResponse:
+    return MetricsResponse(counters=metrics.snapshot())
+
+
+@router.get(
+    "/metrics/threads",
+    response_model=ThreadLayoutResponse,
+    summary="CPU inference layout: concurrent slots and threads per slot",
+)
+async def read_thread_layout() -> ThreadLayoutResponse:
+    layout = get_thread_layout().as_dict()
+    return ThreadLayoutResponse.model_validate({**layout, "cgroup_cpu_limit": cgroup_cpu_limit()})
@@ -0,0 +1,71 @@
+"""
+Export detection history to a local file without going through the HTTP API.
+
+    python -m app.cli.export_history --format parquet --output detections.parquet \\
+        --start 2024-11-01T00:00:00 --class-name person
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+from app.repositories import close_detection_storage, get_detection_repository, init_detection_storage
+from app.services.detection import export_detection_history
+from app.services.export import ExportFormat
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream detection history to CSV, Arrow IPC or Parquet.")
+    parser.add_argument("--output", type=Path, required=True, help="Destination file")
+    parser.add_argument(
+        "--format",
+        dest="export_format",
+        type=ExportFormat,
+        choices=list(ExportFormat),
+        default=ExportFormat.PARQUET,
+    )
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="Inclusive ISO-8601 lower bound")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="Exclusive ISO-8601 upper bound")
+    parser.add_argument(
+        "--class-name",
+        dest="class_names",
+        action="append",
+        default=None,
+        help="Limit export to this class (repeatable)",
+    )
+    parser.add_argument("--batch-size", type=int, default=None, help="Documents per cursor batch")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    await init_detection_storage()
+    written = 0
+    try:
+        stream = export_detection_history(
+            get_detection_repository(),
+            args.export_format,
+            start=args.start,
+            end=args.end,
+            class_names=args.class_names,
+            batch_size=args.batch_size,
+        )
+        with args.output.open("wb") as handle:
+            async for chunk in stream:
+                handle.write(chunk)
+                written += len(chunk)
+    finally:
+        await close_detection_storage()
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    written = asyncio.run(run(args))
+    print(f"Wrote {written} bytes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
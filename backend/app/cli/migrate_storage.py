@@ -0,0 +1,97 @@
+"""
+Convert stored detection results between the sub-document and packed storage formats.
+
+    python -m app.cli.migrate_storage --to packed --batch-size 500
+    python -m app.cli.migrate_storage --to documents --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any, Literal, Mapping
+
+from pymongo import UpdateOne
+
+from app.db.mongo import close_mongo, init_mongo
+from app.models.detection import DetectionResultDocument
+from app.models.packed import PackedDetections, decode_packed
+from app.repositories.base import with_geometry
+from app.schemas.detection import (
+    DetectionItem,
+    DetectionMetadata,
+    DetectionResponse,
+    DetectionResponsePayload,
+    DetectionSummary,
+)
+
+StorageFormat = Literal["documents", "packed"]
+
+
+def convert(document: Mapping[str, Any], target: StorageFormat) -> dict[str, Any]:
+    """Build the `$set` / `$unset` update that rewrites one raw document into `target` format."""
+    if target == "packed":
+        detections = [DetectionItem.model_validate(item) for item in document["payload"]["detections"]]
+        packed = PackedDetections.encode(detections)
+        return {"$set": {"packed": packed.model_dump()}, "$unset": {"payload": ""}}
+
+    response = DetectionResponse(
+        metadata=DetectionMetadata.model_validate(document["metadata"]),
+        summary=DetectionSummary.model_validate(document["summary"]),
+        payload=DetectionResponsePayload(detections=decode_packed(document["packed"])),
+    )
+    return {"$set": {"payload": with_geometry(response).model_dump()}, "$unset": {"packed": ""}}
+
+
+def source_query(target: StorageFormat) -> dict[str, object]:
+    if target == "packed":
+        return {"payload": {"$ne": None}, "packed": None}
+    return {"packed": {"$ne": None}, "payload": None}
+
+
+async def migrate(target: StorageFormat, *, batch_size: int, dry_run: bool) -> int:
+    collection = DetectionResultDocument.get_motor_collection()
+    cursor = collection.find(source_query(target)).batch_size(batch_size)
+    operations: list[UpdateOne] = []
+    converted = 0
+    async for document in cursor:
+        operations.append(UpdateOne({"_id": document["_id"]}, convert(document, target)))
+        if len(operations) >= batch_size:
+            converted += await _flush(collection, operations, dry_run)
+            operations = []
+    if operations:
+        converted += await _flush(collection, operations, dry_run)
+    return converted
+
+
+async def _flush(collection: Any, operations: list[UpdateOne], dry_run: bool) -> int:
+    if not dry_run:
+        await collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rewrite detection_results into another storage format.")
+    parser.add_argument("--to", dest="target", choices=["packed", "documents"], required=True)
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Count convertible documents without writing")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    await init_mongo()
+    try:
+        return await migrate(args.target, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        await close_mongo()
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    converted = asyncio.run(run(args))
+    verb = "Would convert" if args.dry_run else "Converted"
+    print(f"{verb} {converted} documents to {args.target} format")
+
+
+if __name__ == "__main__":
+    main()
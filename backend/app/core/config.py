@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 
 from pydantic import AnyHttpUrl, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     mongo_url: str = "mongodb://mongo:27017"
     mongo_db_name: str = "visionflow"
 
+    detection_repository_backend: Literal["mongo", "sqlite"] = "mongo"
+    sqlite_repository_url: str | None = None
+    detection_storage_format: Literal["documents", "packed"] = "documents"
+
     redis_url: str = "redis://localhost:6379/0"
     celery_broker_url: str | None = None
     celery_result_backend: str | None = None
@@ -31,6 +35,48 @@ class Settings(BaseSettings):
     yolo_model_path: str = "yolo11n.pt"
     yolo_confidence: float = 0.25
     yolo_device: str = "cpu"
+    yolo_input_size: int = 640
+    yolo_preload: bool = False
+
+    web_concurrency: int = 1
+    yolo_inference_slots: int | None = None
+    yolo_threads_per_slot: int | None = None
+    yolo_pin_cpus: bool = False
+
+    yolo_adaptive_enabled: bool = False
+    yolo_adaptive_input_sizes: list[int] = [640, 480, 320]
+    yolo_adaptive_fallback_model_path: str | None = None
+    yolo_adaptive_latency_budget_ms: float = 500.0
+    yolo_adaptive_queue_high: int = 4
+    yolo_adaptive_queue_low: int = 1
+    yolo_adaptive_cooldown_s: float = 2.0
+
+    detection_request_timeout_ms: int | None = 30_000
+
+    detection_dedup_enabled: bool = False
+    detection_dedup_threshold: int = 4
+    detection_dedup_max_age_s: float = 10.0
+    detection_dedup_max_sources: int = 1024
+
+    tracker_high_threshold: float = 0.5
+    tracker_low_threshold: float = 0.1
+    tracker_match_iou: float = 0.2
+    tracker_max_age: int = 30
+    tracker_min_hits: int = 2
+
+    export_batch_size: int = 1000
+
+    response_cache_ttl_s: float = 5.0
+    response_cache_max_entries: int = 256
+
+    previews_enabled: bool = False
+    preview_format: Literal["webp", "jpeg"] = "webp"
+    preview_thumbnail_size: int = 256
+    preview_size: int = 1024
+    preview_quality: int = 80
+    preview_workers: int = 1
+    preview_max_pending: int = 32
+    preview_max_pending_mb: int = 256
 
     log_level: str = "INFO"
 
@@ -55,7 +101,10 @@ class Settings(BaseSettings):
 
 @lru_cache
 def get_settings() -> Settings:
-    settings = Settings()
+    return Settings()
+
+
+def ensure_directories(settings: Settings) -> None:
+    """Create the model and upload directories; called from application startup, never at import."""
     settings.models_dir.mkdir(parents=True, exist_ok=True)
     settings.uploads_dir.mkdir(parents=True, exist_ok=True)
-    return settings
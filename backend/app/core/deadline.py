@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+RECEIVED_AT_KEY = "received_at"
+
+
+class DeadlineExceededError(Exception):
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"Request deadline exceeded before {stage}")
+        self.stage = stage
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute point on the monotonic clock after which work for a request is wasted."""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, timeout_s: float, *, start: float | None = None) -> "Deadline":
+        return cls(expires_at=(time.monotonic() if start is None else start) + timeout_s)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        if self.expired:
+            raise DeadlineExceededError(stage)
+
+
+class RequestTimingMiddleware:
+    """Stamp the arrival time so deadlines also cover upload and body parsing."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            scope.setdefault("state", {})[RECEIVED_AT_KEY] = time.monotonic()
+        await self.app(scope, receive, send)
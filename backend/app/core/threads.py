@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+try:  # pragma: no cover - fallback for environments without loguru
+    from loguru import logger
+except ImportError:  # pragma: no cover
+    import logging
+
+    logger = logging.getLogger("visionflow")
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_CGROUP = Path("/proc/self/cgroup")
+
+# Native thread pools that read their size from the environment when they start.
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# Small detection models stop scaling well past a few intra-op threads; beyond that, parallel requests win.
+DEFAULT_THREADS_PER_SLOT = 4
+
+
+def affinity_cpus() -> list[int]:
+    """CPUs this process may run on (taskset/cpuset), falling back to every CPU where affinity is unsupported."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _cgroup_paths(proc_cgroup: Path) -> tuple[str | None, dict[str, str]]:
+    """The unified (v2) cgroup path and the v1 path per controller of the current process."""
+    unified = None
+    controllers: dict[str, str] = {}
+    try:
+        lines = proc_cgroup.read_text().splitlines()
+    except OSError:
+        return None, {}
+    for line in lines:
+        hierarchy, _, rest = line.partition(":")
+        names, _, path = rest.partition(":")
+        if hierarchy == "0" and not names:
+            unified = path
+        for name in names.split(","):
+            if name:
+                controllers[name] = path
+    return unified, controllers
+
+
+def _ancestors(directory: Path, path: str) -> Iterator[Path]:
+    parts = [part for part in path.split("/") if part]
+    for depth in range(len(parts), -1, -1):
+        yield directory.joinpath(*parts[:depth])
+
+
+def _read_v2_quota(directory: Path) -> float | None:
+    try:
+        quota, _, period = (directory / "cpu.max").read_text().strip().partition(" ")
+    except OSError:
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period or 100_000)
+
+
+def _read_v1_quota(directory: Path) -> float | None:
+    try:
+        quota = int((directory / "cpu.cfs_quota_us").read_text())
+        period = int((directory / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def cgroup_cpu_limit(cgroup_root: Path = CGROUP_ROOT, proc_cgroup: Path = PROC_CGROUP) -> float | None:
+    """
+    CPU quota in cores from cgroup v2 `cpu.max` or v1 `cpu.cfs_quota_us`, or None when unlimited.
+
+    Every ancestor of the process's cgroup is checked, since a parent quota caps its children.
+    """
+    unified, controllers = _cgroup_paths(proc_cgroup)
+    quotas: list[float] = []
+    if unified is not None:
+        for root in (cgroup_root, cgroup_root / "unified"):
+            quotas += [quota for d in _ancestors(root, unified) if (quota := _read_v2_quota(d)) is not None]
+    path = controllers.get("cpu")
+    if path is not None:
+        for name in ("cpu", "cpu,cpuacct"):
+            directories = _ancestors(cgroup_root / name, path)
+            quotas += [quota for d in directories if (quota := _read_v1_quota(d)) is not None]
+    return min(quotas) if quotas else None
+
+
+def available_cores(cgroup_root: Path = CGROUP_ROOT, proc_cgroup: Path = PROC_CGROUP) -> int:
+    """Whole cores usable by this process: the affinity mask capped by the cgroup CPU quota."""
+    cores = len(affinity_cpus())
+    limit = cgroup_cpu_limit(cgroup_root, proc_cgroup)
+    if limit is not None:
+        # A fractional quota is throttled, not rounded up; extra threads would only queue on it.
+        cores = min(cores, max(math.floor(limit), 1))
+    return max(cores, 1)
+
+
+@dataclass(frozen=True)
+class ThreadLayout:
+    """How one server process splits its share of the cores: `slots` concurrent predictions x `threads_per_slot`."""
+
+    cores: int
+    processes: int
+    slots: int
+    threads_per_slot: int
+    pin: bool = False
+    cpu_sets: tuple[tuple[int, ...], ...] = ()
+
+    @property
+    def threads(self) -> int:
+        return self.slots * self.threads_per_slot
+
+    def as_dict(self) -> dict[str, object]:
+        return {**asdict(self), "cpu_sets": [list(cpus) for cpus in self.cpu_sets], "threads": self.threads}
+
+
+def plan_thread_layout(
+    cores: int,
+    *,
+    processes: int = 1,
+    slots: int | None = None,
+    threads_per_slot: int | None = None,
+    pin: bool = False,
+    cpus: list[int] | None = None,
+) -> ThreadLayout:
+    """
+    Split `cores` between `processes` server workers, then between inference slots and threads per slot.
+
+    Explicit `slots` / `threads_per_slot` are honoured but clamped so the process never runs more inference
+    threads than its share of cores. `cpu_sets` gives each slot its own CPUs when `pin` is set.
+    """
+    share = max(cores // max(processes, 1), 1)
+    if slots is None and threads_per_slot is None:
+        slots = max(share // DEFAULT_THREADS_PER_SLOT, 1)
+    if slots is None:
+        slots = max(share // max(threads_per_slot or 1, 1), 1)
+    slots = min(max(slots, 1), share)
+    threads_per_slot = min(max(threads_per_slot or share // slots, 1), max(share // slots, 1))
+
+    cpu_sets: tuple[tuple[int, ...], ...] = ()
+    if pin:
+        usable = (cpus if cpus is not None else affinity_cpus())[: slots * threads_per_slot]
+        if len(usable) >= slots * threads_per_slot:
+            cpu_sets = tuple(
+                tuple(usable[index * threads_per_slot : (index + 1) * threads_per_slot]) for index in range(slots)
+            )
+        else:
+            pin = False
+    return ThreadLayout(
+        cores=cores,
+        processes=max(processes, 1),
+        slots=slots,
+        threads_per_slot=threads_per_slot,
+        pin=pin,
+        cpu_sets=cpu_sets,
+    )
+
+
+@lru_cache
+def get_thread_layout() -> ThreadLayout:
+    settings = get_settings()
+    cores = available_cores()
+    if settings.previews_enabled:
+        # Preview encoding runs on its own threads beside inference; keep their cores out of the inference budget.
+        cores = max(cores - settings.preview_workers, 1)
+    return plan_thread_layout(
+        cores,
+        processes=settings.web_concurrency,
+        slots=settings.yolo_inference_slots,
+        threads_per_slot=settings.yolo_threads_per_slot,
+        pin=settings.yolo_pin_cpus,
+    )
+
+
+def set_thread_environment(layout: ThreadLayout) -> None:
+    """Size OpenMP/BLAS pools before the native libraries load; explicit environment values win."""
+    for name in _THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(layout.threads_per_slot))
+
+
+def apply_thread_layout(layout: ThreadLayout) -> dict[str, int]:
+    """
+    Apply the per-slot thread count to torch and OpenCV if they are already imported.
+
+    Called after the model loads so applying the layout never imports a heavy library by itself. ONNX Runtime has
+    no process-wide setting; its OpenMP builds follow `OMP_NUM_THREADS` from `set_thread_environment`. Returns the
+    value applied per library.
+    """
+    applied: dict[str, int] = {}
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(layout.threads_per_slot)
+        applied["torch"] = layout.threads_per_slot
+        try:
+            # Inter-op parallelism only adds threads on top of the slots; it can only be set once per process.
+            torch.set_num_interop_threads(1)
+            applied["torch_interop"] = 1
+        except RuntimeError:
+            pass
+    cv2 = sys.modules.get("cv2")
+    if cv2 is not None:
+        cv2.setNumThreads(layout.threads_per_slot)
+        applied["cv2"] = layout.threads_per_slot
+    if applied:
+        logger.info("Applied inference thread layout {} to {}", layout.as_dict(), applied)
+    return applied
+
+
+class WorkerAdmission:
+    """Admits at most `limit` calls into worker threads at once; the rest wait on the event loop."""
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def run(self, func: Callable[[], T]) -> T:
+        """
+        Run `func` in a worker thread once admitted, waiting for admission on the event loop.
+
+        Requests that expire or are cancelled while queued therefore never occupy a worker thread or reach the
+        model. A thread cannot be interrupted, so admission is held until it returns even if the caller stops
+        waiting: abandoned calls keep counting towards `limit` instead of piling up in the executor. A thread that
+        only starts after its caller gave up skips `func`.
+        """
+        await self._semaphore.acquire()
+        abandoned = threading.Event()
+
+        def call() -> T:
+            if abandoned.is_set():
+                raise asyncio.CancelledError()
+            return func()
+
+        future = asyncio.get_running_loop().run_in_executor(None, call)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            abandoned.set()
+            raise
+
+    def _release(self, future: asyncio.Future[Any]) -> None:
+        self._semaphore.release()
+        if not future.cancelled():
+            # Retrieve the outcome of abandoned calls so it is not reported as never retrieved.
+            future.exception()
+
+
+class InferenceSlots:
+    """Bounds concurrent predictions to the layout's slots and, when pinning, binds each caller to its slot's CPUs."""
+
+    def __init__(self, layout: ThreadLayout) -> None:
+        self.layout = layout
+        self._semaphore = threading.BoundedSemaphore(layout.slots)
+        self._admission = WorkerAdmission(layout.slots)
+        self._free = list(range(layout.slots))
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[[], T]) -> T:
+        """Run `func` in a worker thread once a slot is free, so `acquire` inside `func` does not block."""
+        return await self._admission.run(func)
+
+    @contextmanager
+    def acquire(self) -> Iterator[int]:
+        with self._semaphore:
+            with self._lock:
+                slot = self._free.pop()
+            previous = None
+            try:
+                if self.layout.pin and hasattr(os, "sched_setaffinity"):
+                    # On Linux pid 0 is the calling thread; native pools it spawns inherit the mask and keep it
+                    # after the caller's own mask is restored.
+                    previous = os.sched_getaffinity(0)
+                    os.sched_setaffinity(0, self.layout.cpu_sets[slot])
+                yield slot
+            finally:
+                if previous is not None:
+                    os.sched_setaffinity(0, previous)
+                with self._lock:
+                    self._free.append(slot)
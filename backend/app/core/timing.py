@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class StageTimings:
+    """Per-request stage durations, rendered as a `Server-Timing` header so clients can attribute latency."""
+
+    def __init__(self) -> None:
+        self._durations: dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def record(self, stage: str, duration_ms: float) -> None:
+        self._durations[stage] = self._durations.get(stage, 0.0) + duration_ms
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(self._durations)
+
+    def header_value(self) -> str:
+        return ", ".join(f"{stage};dur={duration:.2f}" for stage, duration in self._durations.items())
+
+
+def parse_server_timing(value: str | None) -> dict[str, float]:
+    """Inverse of `StageTimings.header_value`; entries without a duration are ignored."""
+    durations: dict[str, float] = {}
+    for entry in (value or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, raw = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    durations[name] = float(raw)
+                except ValueError:
+                    continue
+    return durations
@@ -7,6 +7,10 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import get_settings
 from app.models.detection import DetectionResultDocument
+from app.models.preview import DetectionPreviewDocument
+from app.models.track import DetectionTrackDocument
+
+DOCUMENT_MODELS = (DetectionResultDocument, DetectionTrackDocument, DetectionPreviewDocument)
 
 _client: AsyncIOMotorClient | None = None
 
@@ -17,11 +21,7 @@ async def init_mongo() -> None:
     _client = AsyncIOMotorClient(settings.mongo_url)
     await init_beanie(
         database=_client[settings.mongo_db_name],
-        document_models=cast_models(
-            [
-                DetectionResultDocument,
-            ]
-        ),
+        document_models=cast_models(DOCUMENT_MODELS),
     )
 
 
@@ -1,14 +1,57 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.core.config import get_settings
 
-settings = get_settings()
 
-engine = create_engine(
-    settings.database_url,
-    echo=settings.sqlite_echo,
-    future=True,
-)
+@lru_cache
+def get_engine() -> Engine:
+    settings = get_settings()
+    return create_engine(
+        settings.database_url,
+        echo=settings.sqlite_echo,
+        future=True,
+    )
+
+
+@lru_cache
+def get_session_factory() -> sessionmaker[Session]:
+    return sessionmaker(bind=get_engine(), autoflush=False, autocommit=False, future=True)
+
+
+def __getattr__(name: str) -> Any:
+    # `engine` and `SessionLocal` used to be built at import time; they are now created on first use.
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_sqlite_engine(database_url: str, *, echo: bool = False) -> Engine:
+    """Engine for the embedded repository: WAL journal, NORMAL sync and enforced foreign keys."""
+    in_memory = database_url in ("sqlite://", "sqlite:///:memory:")
+    sqlite_engine = create_engine(
+        database_url,
+        echo=echo,
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if in_memory else None,
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _configure_connection(dbapi_connection, _record) -> None:  # type: ignore[no-untyped-def]
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return sqlite_engine
@@ -1,11 +1,24 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from app.api.v1.api import api_router
-from app.core.config import get_settings
+from app.core.config import ensure_directories, get_settings
+from app.core.deadline import RequestTimingMiddleware
 from app.core.logging import configure_logging
-from app.db.mongo import close_mongo, init_mongo
+from app.core.timing import SERVER_TIMING_HEADER
+from app.repositories import close_detection_storage, init_detection_storage
+from app.services.detection import get_yolo_service
+from app.services.previews import close_preview_generator
+
+
+async def _warm_up_model() -> None:
+    try:
+        await asyncio.to_thread(get_yolo_service().warm_up)
+    except Exception as exc:  # noqa: BLE001 - requests retry the load; a failed warm-up must not stop the app
+        logger.warning("YOLO warm-up failed: {}", exc)
 
 
 def create_app() -> FastAPI:
@@ -20,17 +33,25 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[SERVER_TIMING_HEADER, "ETag"],
     )
+    app.add_middleware(RequestTimingMiddleware)
 
     @app.on_event("startup")
     async def on_startup() -> None:
         logger.info("Starting VisionFlow backend")
-        await init_mongo()
+        ensure_directories(settings)
+        await init_detection_storage()
+        if settings.yolo_preload:
+            # Runs in the background so /health answers while weights load.
+            app.state.model_warm_up = asyncio.create_task(_warm_up_model())
 
     @app.on_event("shutdown")
     async def on_shutdown() -> None:
         logger.info("Stopping VisionFlow backend")
-        await close_mongo()
+        # Pending previews are written through the repository, so they finish before storage closes.
+        await close_preview_generator()
+        await close_detection_storage()
 
     app.include_router(api_router, prefix=settings.api_prefix)
 
@@ -1,3 +1,42 @@
-from app.models.detection import DetectionResultDocument
+"""
+Model re-exports resolve on first attribute access so importing one model module (e.g. `app.models.packed`)
+does not load Beanie and pymongo.
+"""
 
-__all__ = ["DetectionResultDocument"]
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+_EXPORTS = {
+    "DetectionHistoryView": "app.models.views",
+    "DetectionPreviewDocument": "app.models.preview",
+    "DetectionResultDocument": "app.models.detection",
+    "DetectionTrackDocument": "app.models.track",
+    "PackedClass": "app.models.packed",
+    "PackedDetections": "app.models.packed",
+}
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.models.detection import DetectionResultDocument
+    from app.models.packed import PackedClass, PackedDetections
+    from app.models.preview import DetectionPreviewDocument
+    from app.models.track import DetectionTrackDocument
+    from app.models.views import DetectionHistoryView
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+__all__ = [
+    "DetectionHistoryView",
+    "DetectionPreviewDocument",
+    "DetectionResultDocument",
+    "DetectionTrackDocument",
+    "PackedClass",
+    "PackedDetections",
+]
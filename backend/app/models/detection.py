@@ -9,6 +9,8 @@ except ImportError:  # pragma: no cover - allows importing without beanie during
 from pydantic import Field
 from pymongo import IndexModel
 
+from app.models.packed import PackedDetections
+from app.models.views import DetectionHistoryView  # noqa: F401 - re-exported for existing imports
 from app.schemas.detection import DetectionMetadata, DetectionResponsePayload, DetectionSummary
 
 
@@ -17,14 +19,42 @@ class DetectionResultDocument(Document):
     source_type: str = Field(default="upload", description="Type of detection source")
     metadata: DetectionMetadata
     summary: DetectionSummary
-    payload: DetectionResponsePayload
+    payload: DetectionResponsePayload | None = Field(
+        default=None,
+        description="Detections as sub-documents (default storage format)",
+    )
+    packed: PackedDetections | None = Field(
+        default=None,
+        description="Detections as packed binary columns (compact storage format)",
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "detection_results"
         indexes = [
-            IndexModel([("summary.detected_classes", 1)]),
+            # Plain class filters match summary.detected_classes so they work for both storage formats.
+            IndexModel([("summary.detected_classes", 1), ("created_at", -1)]),
             IndexModel([("summary.selected_classes", 1)]),
-            IndexModel([("payload.detections.class_name", 1)]),
             IndexModel([("created_at", -1)]),
+            # $elemMatch filters on payload.detections compound the multikey bounds below across
+            # class, confidence and normalized area. They only cover the sub-document format.
+            IndexModel(
+                [
+                    ("payload.detections.class_name", 1),
+                    ("payload.detections.confidence", -1),
+                    ("payload.detections.geometry.area", 1),
+                    ("created_at", -1),
+                ],
+                name="detection_class_confidence_area",
+            ),
+            IndexModel(
+                [
+                    ("payload.detections.confidence", -1),
+                    ("payload.detections.geometry.area", 1),
+                    ("created_at", -1),
+                ],
+                name="detection_confidence_area",
+            ),
+            # Sparse, so finding out whether any packed records remain never scans the collection.
+            IndexModel([("packed.count", 1)], name="packed_records", sparse=True),
         ]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Mapping, NamedTuple, Sequence
+
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.schemas.detection import BoundingBox, DetectionItem
+
+_FLOAT = np.dtype("<f4")
+_INT = np.dtype("<i4")
+
+
+class PackedArrays(NamedTuple):
+    detection_ids: list[str]
+    boxes: np.ndarray
+    confidences: np.ndarray
+    class_ids: np.ndarray
+    class_names: dict[int, str]
+
+
+class PackedClass(BaseModel):
+    class_id: int
+    class_name: str
+    count: int
+
+
+class PackedDetections(BaseModel):
+    """
+    Column-packed detections: xyxy boxes and confidences as little-endian float32, class ids as int32,
+    detection ids as raw 16-byte UUIDs, and a per-document class dictionary that also carries the
+    per-class counts used by the analytics aggregation.
+    """
+
+    count: int
+    ids: bytes = Field(..., description="count x 16-byte UUIDs")
+    boxes: bytes = Field(..., description="count x 4 float32 (x_min, y_min, x_max, y_max)")
+    confidences: bytes = Field(..., description="count float32")
+    class_ids: bytes = Field(..., description="count int32")
+    classes: list[PackedClass]
+
+    _decoded: list[DetectionItem] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def encode(cls, detections: Sequence[DetectionItem]) -> "PackedDetections":
+        count = len(detections)
+        boxes = np.empty((count, 4), dtype=_FLOAT)
+        confidences = np.empty(count, dtype=_FLOAT)
+        class_ids = np.empty(count, dtype=_INT)
+        ids = bytearray()
+        classes: dict[int, PackedClass] = {}
+        for index, detection in enumerate(detections):
+            bbox = detection.bbox
+            boxes[index] = (bbox.x_min, bbox.y_min, bbox.x_max, bbox.y_max)
+            confidences[index] = detection.confidence
+            class_ids[index] = detection.class_id
+            ids += _uuid_bytes(detection.detection_id)
+            entry = classes.get(detection.class_id)
+            if entry is None:
+                classes[detection.class_id] = PackedClass(
+                    class_id=detection.class_id,
+                    class_name=detection.class_name,
+                    count=1,
+                )
+            else:
+                entry.count += 1
+        return cls(
+            count=count,
+            ids=bytes(ids),
+            boxes=boxes.tobytes(),
+            confidences=confidences.tobytes(),
+            class_ids=class_ids.tobytes(),
+            classes=list(classes.values()),
+        )
+
+    def decode(self) -> list[DetectionItem]:
+        if self._decoded is None:
+            self._decoded = decode_packed(self.model_dump())
+        return self._decoded
+
+
+def _uuid_bytes(detection_id: str) -> bytes:
+    try:
+        return uuid.UUID(detection_id).bytes
+    except ValueError:
+        # A substitute id could not be decoded back, so the stored record would no longer match its source.
+        raise ValueError(f"Packed storage requires UUID detection ids, got {detection_id!r}") from None
+
+
+def unpack_arrays(packed: Mapping[str, Any]) -> PackedArrays:
+    """Zero-copy views over the packed buffers; accepts raw BSON dicts as well as model dumps."""
+    count = int(packed["count"])
+    raw_ids = bytes(packed["ids"])
+    return PackedArrays(
+        detection_ids=[str(uuid.UUID(bytes=raw_ids[offset : offset + 16])) for offset in range(0, count * 16, 16)],
+        boxes=np.frombuffer(packed["boxes"], dtype=_FLOAT).reshape(count, 4),
+        confidences=np.frombuffer(packed["confidences"], dtype=_FLOAT),
+        class_ids=np.frombuffer(packed["class_ids"], dtype=_INT),
+        class_names={int(entry["class_id"]): str(entry["class_name"]) for entry in packed["classes"]},
+    )
+
+
+def decode_packed(packed: Mapping[str, Any]) -> list[DetectionItem]:
+    arrays = unpack_arrays(packed)
+    boxes = arrays.boxes.tolist()
+    confidences = arrays.confidences.tolist()
+    class_ids = arrays.class_ids.tolist()
+    return [
+        DetectionItem(
+            detection_id=detection_id,
+            class_id=class_id,
+            class_name=arrays.class_names.get(class_id, f"class_{class_id}"),
+            confidence=confidence,
+            bbox=BoundingBox(x_min=box[0], y_min=box[1], x_max=box[2], y_max=box[3]),
+        )
+        for detection_id, class_id, confidence, box in zip(arrays.detection_ids, class_ids, confidences, boxes)
+    ]
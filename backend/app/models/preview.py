@@ -0,0 +1,26 @@
+from datetime import datetime
+
+try:
+    from beanie import Document
+except ImportError:  # pragma: no cover - allows importing without beanie during unit tests
+    class Document:  # type: ignore[override]
+        def __init_subclass__(cls, **kwargs):
+            pass
+from pydantic import Field
+from pymongo import IndexModel
+
+
+class DetectionPreviewDocument(Document):
+    result_id: str = Field(..., description="Id of the detection result the image belongs to")
+    kind: str
+    media_type: str
+    width: int
+    height: int
+    data: bytes
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "detection_previews"
+        indexes = [
+            IndexModel([("result_id", 1), ("kind", 1)], unique=True),
+        ]
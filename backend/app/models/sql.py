@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DetectionResultRow(Base):
+    __tablename__ = "detection_results"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source_name: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    source_type: Mapped[str] = mapped_column(String(32), default="upload")
+    metadata_json: Mapped[str] = mapped_column(Text)
+    summary_json: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
+class DetectionRow(Base):
+    __tablename__ = "detections"
+    __table_args__ = (
+        Index("ix_detections_class_created", "class_name", "created_at"),
+        Index("ix_detections_class_confidence_area", "class_name", "confidence", "area"),
+        Index("ix_detections_confidence_area", "confidence", "area"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    result_id: Mapped[int] = mapped_column(ForeignKey("detection_results.id", ondelete="CASCADE"), index=True)
+    detection_id: Mapped[str] = mapped_column(String(64))
+    class_id: Mapped[int] = mapped_column(Integer)
+    class_name: Mapped[str] = mapped_column(String(128))
+    confidence: Mapped[float] = mapped_column(Float)
+    x_min: Mapped[float] = mapped_column(Float)
+    y_min: Mapped[float] = mapped_column(Float)
+    x_max: Mapped[float] = mapped_column(Float)
+    y_max: Mapped[float] = mapped_column(Float)
+    area: Mapped[float] = mapped_column(Float)
+    center_x: Mapped[float] = mapped_column(Float)
+    center_y: Mapped[float] = mapped_column(Float)
+    aspect_ratio: Mapped[float] = mapped_column(Float)
+    # Denormalised from the parent row so per-class analytics never join.
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class TrackRow(Base):
+    __tablename__ = "detection_tracks"
+    __table_args__ = (
+        UniqueConstraint("session_id", "track_id", name="ux_tracks_session_track"),
+        Index("ix_tracks_class_last_seen", "class_name", "last_seen"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(String(64))
+    source_name: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    source_type: Mapped[str] = mapped_column(String(32), default="stream")
+    track_id: Mapped[int] = mapped_column(Integer)
+    class_id: Mapped[int] = mapped_column(Integer)
+    class_name: Mapped[str] = mapped_column(String(128))
+    first_seen: Mapped[datetime] = mapped_column(DateTime)
+    last_seen: Mapped[datetime] = mapped_column(DateTime, index=True)
+    first_frame: Mapped[int] = mapped_column(Integer)
+    last_frame: Mapped[int] = mapped_column(Integer)
+    frames: Mapped[int] = mapped_column(Integer)
+    best_confidence: Mapped[float] = mapped_column(Float)
+    best_x_min: Mapped[float] = mapped_column(Float)
+    best_y_min: Mapped[float] = mapped_column(Float)
+    best_x_max: Mapped[float] = mapped_column(Float)
+    best_y_max: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class PreviewRow(Base):
+    __tablename__ = "detection_previews"
+    __table_args__ = (UniqueConstraint("result_id", "kind", name="ux_previews_result_kind"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    result_id: Mapped[int] = mapped_column(ForeignKey("detection_results.id", ondelete="CASCADE"))
+    kind: Mapped[str] = mapped_column(String(32))
+    media_type: Mapped[str] = mapped_column(String(64))
+    width: Mapped[int] = mapped_column(Integer)
+    height: Mapped[int] = mapped_column(Integer)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+try:
+    from beanie import Document
+except ImportError:  # pragma: no cover - allows importing without beanie during unit tests
+    class Document:  # type: ignore[override]
+        def __init_subclass__(cls, **kwargs):
+            pass
+from pydantic import Field
+from pymongo import IndexModel
+
+from app.schemas.detection import BoundingBox
+
+
+class DetectionTrackDocument(Document):
+    session_id: str = Field(..., description="Tracking session (one video or stream connection)")
+    source_name: str | None = None
+    source_type: str = "stream"
+    track_id: int
+    class_id: int
+    class_name: str
+    first_seen: datetime
+    last_seen: datetime
+    first_frame: int
+    last_frame: int
+    frames: int
+    best_confidence: float
+    best_bbox: BoundingBox
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "detection_tracks"
+        indexes = [
+            IndexModel([("class_name", 1), ("last_seen", -1)]),
+            IndexModel([("session_id", 1), ("track_id", 1)], unique=True),
+            IndexModel([("last_seen", -1)]),
+        ]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from app.schemas.detection import DetectionMetadata, DetectionSummary
+
+
+class DetectionHistoryView(BaseModel):
+    """Projection used for history listings so detections are never loaded or decoded."""
+
+    id: Any = Field(alias="_id")
+    source_name: str | None = None
+    source_type: str = "upload"
+    metadata: DetectionMetadata
+    summary: DetectionSummary
+    created_at: datetime
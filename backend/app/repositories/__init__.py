@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.config import get_settings
+from app.repositories.base import AbstractDetectionRepository
+
+_repository: AbstractDetectionRepository | None = None
+
+
+def build_detection_repository(backend: str | None = None) -> AbstractDetectionRepository:
+    settings = get_settings()
+    backend = backend or settings.detection_repository_backend
+    if backend == "sqlite":
+        from app.repositories.sqlite import SQLiteDetectionRepository
+
+        return SQLiteDetectionRepository(
+            settings.sqlite_repository_url or settings.database_url,
+            echo=settings.sqlite_echo,
+        )
+    if backend == "mongo":
+        from app.repositories.mongo import MongoDetectionRepository
+
+        return MongoDetectionRepository()
+    raise ValueError(f"Unknown detection repository backend: {backend}")
+
+
+def get_detection_repository() -> AbstractDetectionRepository:
+    global _repository
+    if _repository is None:
+        _repository = build_detection_repository()
+    return _repository
+
+
+async def init_detection_storage() -> None:
+    """Prepare whichever backend is configured; called once at application or CLI startup."""
+    backend = get_settings().detection_repository_backend
+    if backend == "mongo":
+        from app.db.mongo import init_mongo
+
+        await init_mongo()
+        return
+
+    from app.repositories.sqlite import SQLiteDetectionRepository
+
+    repository = get_detection_repository()
+    if isinstance(repository, SQLiteDetectionRepository):
+        await asyncio.to_thread(repository.initialize)
+
+
+async def close_detection_storage() -> None:
+    global _repository
+    if get_settings().detection_repository_backend == "mongo":
+        from app.db.mongo import close_mongo
+
+        await close_mongo()
+    elif _repository is not None and hasattr(_repository, "close"):
+        _repository.close()
+    _repository = None
+
+
+__all__ = [
+    "AbstractDetectionRepository",
+    "build_detection_repository",
+    "close_detection_storage",
+    "get_detection_repository",
+    "init_detection_storage",
+]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from app.schemas.detection import (
+    DetectionGeometry,
+    DetectionHistoryFilters,
+    DetectionResponse,
+    DetectionResponsePayload,
+)
+from app.schemas.tracking import TrackSummary
+
+
+def with_geometry(response: DetectionResponse) -> DetectionResponsePayload:
+    width = response.metadata.width
+    height = response.metadata.height
+    return DetectionResponsePayload(
+        detections=[
+            detection.model_copy(
+                update={"geometry": DetectionGeometry.from_bbox(detection.bbox, width=width, height=height)}
+            )
+            for detection in response.payload.detections
+        ]
+    )
+
+
+class UnsupportedFilterError(Exception):
+    """Raised by `fetch_history` for filters the stored records cannot be queried by."""
+
+
+@dataclass(frozen=True)
+class PreviewImage:
+    """An encoded thumbnail or preview of the image behind one detection result."""
+
+    kind: str
+    media_type: str
+    width: int
+    height: int
+    data: bytes
+
+
+class AbstractDetectionRepository(ABC):
+    """
+    Storage contract used by `DetectionService`.
+
+    `fetch_history` returns records exposing `id`, `source_name`, `source_type`, `metadata`, `summary` and
+    `created_at`; `persist` returns such a record for the stored result. `class_frequency` returns
+    `{"items": [{"_id", "detections", "last_seen"}], "total_detections", "total_classes"}`. `iter_export_batches` yields raw documents shaped like the Mongo `detection_results`
+    collection so `flatten_detections` works for every backend.
+    """
+
+    @abstractmethod
+    async def persist(
+        self,
+        response: DetectionResponse,
+        *,
+        source_name: str | None,
+        source_type: str = "upload",
+    ) -> Any:
+        ...
+
+    @abstractmethod
+    async def fetch_history(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        class_name: str | None = None,
+        filters: DetectionHistoryFilters | None = None,
+    ) -> tuple[list[Any], int]:
+        ...
+
+    @abstractmethod
+    async def class_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        ...
+
+    @abstractmethod
+    def iter_export_batches(
+        self,
+        *,
+        batch_size: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        class_names: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    async def persist_tracks(
+        self,
+        tracks: Sequence[TrackSummary],
+        *,
+        session_id: str,
+        source_name: str | None,
+        source_type: str = "stream",
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def track_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        ...
+
+    @abstractmethod
+    async def persist_previews(self, result_id: str, previews: Sequence[PreviewImage]) -> None:
+        ...
+
+    @abstractmethod
+    async def fetch_preview(self, result_id: str, kind: str) -> PreviewImage | None:
+        ...
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from app.core.config import get_settings
+from app.models.detection import DetectionResultDocument
+from app.models.packed import PackedDetections
+from app.models.preview import DetectionPreviewDocument
+from app.models.track import DetectionTrackDocument
+from app.models.views import DetectionHistoryView
+from app.repositories.base import AbstractDetectionRepository, PreviewImage, UnsupportedFilterError, with_geometry
+from app.schemas.detection import DetectionHistoryFilters, DetectionResponse
+from app.schemas.tracking import TrackSummary
+
+_EXPORT_PROJECTION = {"created_at": 1, "source_name": 1, "payload.detections": 1, "packed": 1}
+_PACKED_RECORDS = {"packed.count": {"$exists": True}}
+
+
+def build_export_query(
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    class_names: Sequence[str] | None = None,
+) -> dict[str, object]:
+    query: dict[str, object] = {}
+    created_at: dict[str, datetime] = {}
+    if start is not None:
+        created_at["$gte"] = start
+    if end is not None:
+        created_at["$lt"] = end
+    if created_at:
+        query["created_at"] = created_at
+    if class_names:
+        query["summary.detected_classes"] = {"$in": sorted(set(class_names))}
+    return query
+
+
+def build_history_query(
+    *,
+    class_name: str | None = None,
+    filters: DetectionHistoryFilters | None = None,
+) -> dict[str, object]:
+    filters = filters or DetectionHistoryFilters()
+    query = build_export_query(start=filters.start, end=filters.end)
+    if not filters.has_detection_predicates():
+        if class_name:
+            query["summary.detected_classes"] = class_name
+        return query
+
+    # $elemMatch keeps every predicate on the same detection and lets Mongo intersect the
+    # multikey index bounds of the compound indexes declared on DetectionResultDocument.
+    element: dict[str, object] = {}
+    if class_name:
+        element["class_name"] = class_name
+    if filters.min_confidence is not None:
+        element["confidence"] = {"$gte": filters.min_confidence}
+    area: dict[str, float] = {}
+    if filters.min_area is not None:
+        area["$gte"] = filters.min_area
+    if filters.max_area is not None:
+        area["$lte"] = filters.max_area
+    if area:
+        element["geometry.area"] = area
+    if filters.region is not None:
+        x_min, y_min, x_max, y_max = filters.region
+        element["geometry.center_x"] = {"$gte": x_min, "$lte": x_max}
+        element["geometry.center_y"] = {"$gte": y_min, "$lte": y_max}
+    query["payload.detections"] = {"$elemMatch": element}
+    return query
+
+
+async def _has_packed_records() -> bool:
+    collection = DetectionResultDocument.get_motor_collection()
+    return await collection.find_one(_PACKED_RECORDS, projection={"_id": 1}) is not None
+
+
+class MongoDetectionRepository(AbstractDetectionRepository):
+    async def persist(
+        self,
+        response: DetectionResponse,
+        *,
+        source_name: str | None,
+        source_type: str = "upload",
+    ) -> DetectionResultDocument:
+        document = DetectionResultDocument(
+            source_name=source_name,
+            source_type=source_type,
+            metadata=response.metadata,
+            summary=response.summary,
+        )
+        if get_settings().detection_storage_format == "packed":
+            document.packed = PackedDetections.encode(response.payload.detections)
+        else:
+            document.payload = with_geometry(response)
+        await document.insert()
+        return document
+
+    async def fetch_history(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        class_name: str | None = None,
+        filters: DetectionHistoryFilters | None = None,
+    ) -> tuple[list[DetectionHistoryView], int]:
+        if filters is not None and filters.has_detection_predicates():
+            # Packed records keep no per-detection sub-documents, so $elemMatch would silently skip them. Records
+            # written before a format switch stay packed until they are migrated.
+            if get_settings().detection_storage_format == "packed" or await _has_packed_records():
+                raise UnsupportedFilterError(
+                    "Per-detection filters are not supported for packed records; "
+                    "run `python -m app.cli.migrate_storage --to documents` first"
+                )
+        query = build_history_query(class_name=class_name, filters=filters)
+
+        total = await DetectionResultDocument.find(query).count()
+        offset = (page - 1) * page_size
+        documents = (
+            await DetectionResultDocument.find(query)
+            .sort(-DetectionResultDocument.created_at)
+            .skip(offset)
+            .limit(page_size)
+            .project(DetectionHistoryView)
+            .to_list()
+        )
+        return documents, total
+
+    async def class_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        collection = DetectionResultDocument.get_motor_collection()
+        pipeline: list[dict[str, object]] = []
+        wanted = sorted(set(class_names)) if class_names else None
+        if wanted:
+            pipeline.append({"$match": {"summary.detected_classes": {"$in": wanted}}})
+        pipeline.extend(
+            [
+                # Packed documents carry per-class counts; sub-document payloads count one per detection.
+                {
+                    "$project": {
+                        "created_at": 1,
+                        "classes": {
+                            "$ifNull": [
+                                "$packed.classes",
+                                {
+                                    "$map": {
+                                        "input": {"$ifNull": ["$payload.detections", []]},
+                                        "as": "detection",
+                                        "in": {"class_name": "$$detection.class_name", "count": 1},
+                                    }
+                                },
+                            ]
+                        },
+                    }
+                },
+                {"$unwind": "$classes"},
+            ]
+        )
+        if wanted:
+            pipeline.append({"$match": {"classes.class_name": {"$in": wanted}}})
+        pipeline.extend(
+            [
+                {
+                    "$group": {
+                        "_id": "$classes.class_name",
+                        "detections": {"$sum": "$classes.count"},
+                        "last_seen": {"$max": "$created_at"},
+                    }
+                },
+                {"$sort": {"detections": -1}},
+            ]
+        )
+
+        aggregated = await collection.aggregate(pipeline).to_list(None)
+        total_detections = sum(item["detections"] for item in aggregated)
+        total_classes = len(aggregated)
+        return {
+            "items": aggregated,
+            "total_detections": total_detections,
+            "total_classes": total_classes,
+        }
+
+    async def iter_export_batches(
+        self,
+        *,
+        batch_size: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        class_names: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield raw documents in groups of `batch_size`, oldest first, straight off a Mongo cursor."""
+        collection = DetectionResultDocument.get_motor_collection()
+        cursor = (
+            collection.find(
+                build_export_query(start=start, end=end, class_names=class_names),
+                _EXPORT_PROJECTION,
+            )
+            .sort("created_at", 1)
+            .batch_size(batch_size)
+        )
+        batch: list[dict[str, Any]] = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def persist_tracks(
+        self,
+        tracks: Sequence[TrackSummary],
+        *,
+        session_id: str,
+        source_name: str | None,
+        source_type: str = "stream",
+    ) -> None:
+        if not tracks:
+            return
+        await DetectionTrackDocument.insert_many(
+            [
+                DetectionTrackDocument(
+                    session_id=session_id,
+                    source_name=source_name,
+                    source_type=source_type,
+                    **track.model_dump(),
+                )
+                for track in tracks
+            ]
+        )
+
+    async def track_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        collection = DetectionTrackDocument.get_motor_collection()
+        pipeline: list[dict[str, object]] = []
+        if class_names:
+            pipeline.append({"$match": {"class_name": {"$in": sorted(set(class_names))}}})
+        pipeline.extend(
+            [
+                {
+                    "$group": {
+                        "_id": "$class_name",
+                        "tracks": {"$sum": 1},
+                        "last_seen": {"$max": "$last_seen"},
+                        "best_confidence": {"$max": "$best_confidence"},
+                    }
+                },
+                {"$sort": {"tracks": -1}},
+            ]
+        )
+        aggregated = await collection.aggregate(pipeline).to_list(None)
+        return {
+            "items": aggregated,
+            "total_tracks": sum(item["tracks"] for item in aggregated),
+            "total_classes": len(aggregated),
+        }
+
+    async def persist_previews(self, result_id: str, previews: Sequence[PreviewImage]) -> None:
+        if not previews:
+            return
+        await DetectionPreviewDocument.insert_many(
+            [
+                DetectionPreviewDocument(
+                    result_id=result_id,
+                    kind=preview.kind,
+                    media_type=preview.media_type,
+                    width=preview.width,
+                    height=preview.height,
+                    data=preview.data,
+                )
+                for preview in previews
+            ]
+        )
+
+    async def fetch_preview(self, result_id: str, kind: str) -> PreviewImage | None:
+        document = await DetectionPreviewDocument.find_one({"result_id": result_id, "kind": kind})
+        if document is None:
+            return None
+        return PreviewImage(
+            kind=document.kind,
+            media_type=document.media_type,
+            width=document.width,
+            height=document.height,
+            data=document.data,
+        )
@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Sequence, cast
+
+from sqlalchemy import Table, and_, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.base import Base
+from app.db.session import create_sqlite_engine
+from app.models.sql import DetectionResultRow, DetectionRow, PreviewRow, TrackRow
+from app.models.views import DetectionHistoryView
+from app.repositories.base import AbstractDetectionRepository, PreviewImage
+from app.schemas.detection import (
+    DetectionGeometry,
+    DetectionHistoryFilters,
+    DetectionMetadata,
+    DetectionResponse,
+    DetectionSummary,
+)
+from app.schemas.tracking import TrackSummary
+
+_results = cast(Table, DetectionResultRow.__table__)
+_detections = cast(Table, DetectionRow.__table__)
+_tracks = cast(Table, TrackRow.__table__)
+_previews = cast(Table, PreviewRow.__table__)
+
+
+class _PendingWrite:
+    __slots__ = ("response", "source_name", "source_type", "created_at", "future")
+
+    def __init__(
+        self,
+        response: DetectionResponse,
+        source_name: str | None,
+        source_type: str,
+        future: asyncio.Future[DetectionHistoryView],
+    ) -> None:
+        self.response = response
+        self.source_name = source_name
+        self.source_type = source_type
+        self.created_at = datetime.utcnow()
+        self.future = future
+
+
+class SQLiteDetectionRepository(AbstractDetectionRepository):
+    """
+    Embedded single-node backend. All SQL runs in worker threads; concurrent `persist` calls are
+    group-committed so a burst of requests shares one transaction (and one WAL fsync).
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        *,
+        echo: bool = False,
+        max_batch_size: int = 256,
+        engine: Engine | None = None,
+    ) -> None:
+        self.database_url = database_url
+        self.max_batch_size = max_batch_size
+        self._engine = engine or create_sqlite_engine(database_url, echo=echo)
+        self._pending: list[_PendingWrite] = []
+        self._flush_task: asyncio.Task[None] | None = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def initialize(self) -> None:
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            database = make_url(self.database_url).database
+            if database and database != ":memory:":
+                Path(database).parent.mkdir(parents=True, exist_ok=True)
+            Base.metadata.create_all(self._engine, tables=[_results, _detections, _tracks, _previews])
+            self._initialized = True
+
+    def close(self) -> None:
+        self._engine.dispose()
+
+    async def persist(
+        self,
+        response: DetectionResponse,
+        *,
+        source_name: str | None,
+        source_type: str = "upload",
+    ) -> DetectionHistoryView:
+        future: asyncio.Future[DetectionHistoryView] = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingWrite(response, source_name, source_type, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def persist_many(
+        self,
+        responses: Sequence[DetectionResponse],
+        *,
+        source_type: str = "upload",
+    ) -> list[DetectionHistoryView]:
+        return list(
+            await asyncio.gather(
+                *(self.persist(response, source_name=None, source_type=source_type) for response in responses)
+            )
+        )
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            try:
+                stored = await asyncio.to_thread(self._insert_batch, batch)
+            except Exception as exc:
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(exc)
+                continue
+            for write, record in zip(batch, stored):
+                if not write.future.done():
+                    write.future.set_result(record)
+
+    def _insert_batch(self, batch: list[_PendingWrite]) -> list[DetectionHistoryView]:
+        self.initialize()
+        stored: list[DetectionHistoryView] = []
+        with self._engine.begin() as connection:
+            detection_rows: list[dict[str, Any]] = []
+            for write in batch:
+                response = write.response
+                result_id = connection.execute(
+                    insert(_results).values(
+                        source_name=write.source_name,
+                        source_type=write.source_type,
+                        metadata_json=response.metadata.model_dump_json(),
+                        summary_json=response.summary.model_dump_json(),
+                        created_at=write.created_at,
+                    )
+                ).inserted_primary_key[0]
+                width, height = response.metadata.width, response.metadata.height
+                for detection in response.payload.detections:
+                    bbox = detection.bbox
+                    geometry = DetectionGeometry.from_bbox(bbox, width=width, height=height)
+                    detection_rows.append(
+                        {
+                            "result_id": result_id,
+                            "detection_id": detection.detection_id,
+                            "class_id": detection.class_id,
+                            "class_name": detection.class_name,
+                            "confidence": detection.confidence,
+                            "x_min": bbox.x_min,
+                            "y_min": bbox.y_min,
+                            "x_max": bbox.x_max,
+                            "y_max": bbox.y_max,
+                            "area": geometry.area,
+                            "center_x": geometry.center_x,
+                            "center_y": geometry.center_y,
+                            "aspect_ratio": geometry.aspect_ratio,
+                            "created_at": write.created_at,
+                        }
+                    )
+                stored.append(
+                    DetectionHistoryView(
+                        _id=str(result_id),
+                        source_name=write.source_name,
+                        source_type=write.source_type,
+                        metadata=response.metadata,
+                        summary=response.summary,
+                        created_at=write.created_at,
+                    )
+                )
+            if detection_rows:
+                connection.execute(insert(_detections), detection_rows)
+        return stored
+
+    async def fetch_history(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        class_name: str | None = None,
+        filters: DetectionHistoryFilters | None = None,
+    ) -> tuple[list[DetectionHistoryView], int]:
+        return await asyncio.to_thread(self._fetch_history, page, page_size, class_name, filters)
+
+    def _fetch_history(
+        self,
+        page: int,
+        page_size: int,
+        class_name: str | None,
+        filters: DetectionHistoryFilters | None,
+    ) -> tuple[list[DetectionHistoryView], int]:
+        self.initialize()
+        conditions = _history_conditions(class_name, filters or DetectionHistoryFilters())
+        with self._engine.connect() as connection:
+            total = connection.execute(select(func.count()).select_from(_results).where(*conditions)).scalar_one()
+            rows = connection.execute(
+                select(_results)
+                .where(*conditions)
+                .order_by(_results.c.created_at.desc(), _results.c.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            ).all()
+        return [_history_view(row) for row in rows], int(total)
+
+    async def class_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        return await asyncio.to_thread(self._class_frequency, class_names)
+
+    def _class_frequency(self, class_names: Sequence[str] | None) -> dict[str, object]:
+        self.initialize()
+        detections = func.count().label("detections")
+        statement = select(
+            _detections.c.class_name.label("_id"),
+            detections,
+            func.max(_detections.c.created_at).label("last_seen"),
+        ).group_by(_detections.c.class_name)
+        if class_names:
+            statement = statement.where(_detections.c.class_name.in_(sorted(set(class_names))))
+        with self._engine.connect() as connection:
+            aggregated = [dict(row._mapping) for row in connection.execute(statement.order_by(detections.desc()))]
+        return {
+            "items": aggregated,
+            "total_detections": sum(item["detections"] for item in aggregated),
+            "total_classes": len(aggregated),
+        }
+
+    async def persist_tracks(
+        self,
+        tracks: Sequence[TrackSummary],
+        *,
+        session_id: str,
+        source_name: str | None,
+        source_type: str = "stream",
+    ) -> None:
+        if tracks:
+            await asyncio.to_thread(self._insert_tracks, tracks, session_id, source_name, source_type)
+
+    def _insert_tracks(
+        self,
+        tracks: Sequence[TrackSummary],
+        session_id: str,
+        source_name: str | None,
+        source_type: str,
+    ) -> None:
+        self.initialize()
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "session_id": session_id,
+                "source_name": source_name,
+                "source_type": source_type,
+                "track_id": track.track_id,
+                "class_id": track.class_id,
+                "class_name": track.class_name,
+                "first_seen": track.first_seen,
+                "last_seen": track.last_seen,
+                "first_frame": track.first_frame,
+                "last_frame": track.last_frame,
+                "frames": track.frames,
+                "best_confidence": track.best_confidence,
+                "best_x_min": track.best_bbox.x_min,
+                "best_y_min": track.best_bbox.y_min,
+                "best_x_max": track.best_bbox.x_max,
+                "best_y_max": track.best_bbox.y_max,
+                "created_at": created_at,
+            }
+            for track in tracks
+        ]
+        with self._engine.begin() as connection:
+            connection.execute(insert(_tracks), rows)
+
+    async def track_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        return await asyncio.to_thread(self._track_frequency, class_names)
+
+    def _track_frequency(self, class_names: Sequence[str] | None) -> dict[str, object]:
+        self.initialize()
+        tracks = func.count().label("tracks")
+        statement = select(
+            _tracks.c.class_name.label("_id"),
+            tracks,
+            func.max(_tracks.c.last_seen).label("last_seen"),
+            func.max(_tracks.c.best_confidence).label("best_confidence"),
+        ).group_by(_tracks.c.class_name)
+        if class_names:
+            statement = statement.where(_tracks.c.class_name.in_(sorted(set(class_names))))
+        with self._engine.connect() as connection:
+            aggregated = [dict(row._mapping) for row in connection.execute(statement.order_by(tracks.desc()))]
+        return {
+            "items": aggregated,
+            "total_tracks": sum(item["tracks"] for item in aggregated),
+            "total_classes": len(aggregated),
+        }
+
+    async def persist_previews(self, result_id: str, previews: Sequence[PreviewImage]) -> None:
+        if previews:
+            await asyncio.to_thread(self._insert_previews, int(result_id), previews)
+
+    def _insert_previews(self, result_id: int, previews: Sequence[PreviewImage]) -> None:
+        self.initialize()
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "result_id": result_id,
+                "kind": preview.kind,
+                "media_type": preview.media_type,
+                "width": preview.width,
+                "height": preview.height,
+                "data": preview.data,
+                "created_at": created_at,
+            }
+            for preview in previews
+        ]
+        with self._engine.begin() as connection:
+            connection.execute(insert(_previews), rows)
+
+    async def fetch_preview(self, result_id: str, kind: str) -> PreviewImage | None:
+        if not result_id.isdigit():
+            return None
+        return await asyncio.to_thread(self._fetch_preview, int(result_id), kind)
+
+    def _fetch_preview(self, result_id: int, kind: str) -> PreviewImage | None:
+        self.initialize()
+        with self._engine.connect() as connection:
+            row = connection.execute(
+                select(_previews).where(_previews.c.result_id == result_id, _previews.c.kind == kind)
+            ).first()
+        if row is None:
+            return None
+        return PreviewImage(
+            kind=row.kind,
+            media_type=row.media_type,
+            width=row.width,
+            height=row.height,
+            data=row.data,
+        )
+
+    async def iter_export_batches(
+        self,
+        *,
+        batch_size: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        class_names: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Keyset-paginate results oldest first so each batch is one bounded query."""
+        after: tuple[datetime, int] | None = None
+        while True:
+            batch, after = await asyncio.to_thread(
+                self._export_batch, batch_size, start, end, class_names, after
+            )
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+
+    def _export_batch(
+        self,
+        batch_size: int,
+        start: datetime | None,
+        end: datetime | None,
+        class_names: Sequence[str] | None,
+        after: tuple[datetime, int] | None,
+    ) -> tuple[list[dict[str, Any]], tuple[datetime, int] | None]:
+        self.initialize()
+        conditions = _time_conditions(start, end)
+        if class_names:
+            conditions.append(_has_detection(_detections.c.class_name.in_(sorted(set(class_names)))))
+        if after is not None:
+            created_at, result_id = after
+            conditions.append(
+                (_results.c.created_at > created_at)
+                | and_(_results.c.created_at == created_at, _results.c.id > result_id)
+            )
+        with self._engine.connect() as connection:
+            results = connection.execute(
+                select(_results.c.id, _results.c.created_at, _results.c.source_name)
+                .where(*conditions)
+                .order_by(_results.c.created_at, _results.c.id)
+                .limit(batch_size)
+            ).all()
+            if not results:
+                return [], after
+            detections = connection.execute(
+                select(_detections)
+                .where(_detections.c.result_id.in_([row.id for row in results]))
+                .order_by(_detections.c.result_id, _detections.c.id)
+            ).all()
+
+        by_result: dict[int, list[dict[str, Any]]] = {row.id: [] for row in results}
+        for detection in detections:
+            by_result[detection.result_id].append(
+                {
+                    "detection_id": detection.detection_id,
+                    "class_id": detection.class_id,
+                    "class_name": detection.class_name,
+                    "confidence": detection.confidence,
+                    "bbox": {
+                        "x_min": detection.x_min,
+                        "y_min": detection.y_min,
+                        "x_max": detection.x_max,
+                        "y_max": detection.y_max,
+                    },
+                }
+            )
+        batch = [
+            {
+                "_id": str(row.id),
+                "created_at": row.created_at,
+                "source_name": row.source_name,
+                "payload": {"detections": by_result[row.id]},
+            }
+            for row in results
+        ]
+        last = results[-1]
+        return batch, (last.created_at, last.id)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at is stored as naive UTC; SQLite compares the text, so an offset would otherwise be ignored.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _time_conditions(start: datetime | None, end: datetime | None) -> list[ColumnElement[bool]]:
+    conditions: list[ColumnElement[bool]] = []
+    if start is not None:
+        conditions.append(_results.c.created_at >= _naive_utc(start))
+    if end is not None:
+        conditions.append(_results.c.created_at < _naive_utc(end))
+    return conditions
+
+
+def _has_detection(*predicates: ColumnElement[bool]) -> ColumnElement[bool]:
+    # An uncorrelated IN lets SQLite drive the lookup from the detection indexes instead of probing per result.
+    return _results.c.id.in_(select(_detections.c.result_id).where(*predicates))
+
+
+def _history_conditions(class_name: str | None, filters: DetectionHistoryFilters) -> list[ColumnElement[bool]]:
+    conditions = _time_conditions(filters.start, filters.end)
+    predicates: list[ColumnElement[bool]] = []
+    if class_name:
+        predicates.append(_detections.c.class_name == class_name)
+    if filters.min_confidence is not None:
+        predicates.append(_detections.c.confidence >= filters.min_confidence)
+    if filters.min_area is not None:
+        predicates.append(_detections.c.area >= filters.min_area)
+    if filters.max_area is not None:
+        predicates.append(_detections.c.area <= filters.max_area)
+    if filters.region is not None:
+        x_min, y_min, x_max, y_max = filters.region
+        predicates.append(_detections.c.center_x.between(x_min, x_max))
+        predicates.append(_detections.c.center_y.between(y_min, y_max))
+    if predicates:
+        conditions.append(_has_detection(*predicates))
+    return conditions
+
+
+def _history_view(row: Any) -> DetectionHistoryView:
+    return DetectionHistoryView(
+        _id=str(row.id),
+        source_name=row.source_name,
+        source_type=row.source_type,
+        metadata=DetectionMetadata.model_validate(json.loads(row.metadata_json)),
+        summary=DetectionSummary.model_validate(json.loads(row.summary_json)),
+        created_at=row.created_at,
+    )
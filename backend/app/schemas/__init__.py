@@ -2,6 +2,8 @@ from app.schemas.detection import (
     BoundingBox,
     ClassFrequencyItem,
     ClassFrequencyResponse,
+    DetectionGeometry,
+    DetectionHistoryFilters,
     DetectionHistoryItem,
     DetectionHistoryResponse,
     DetectionItem,
@@ -10,11 +12,22 @@ from app.schemas.detection import (
     DetectionResponsePayload,
     DetectionSummary,
 )
+from app.schemas.metrics import MetricsResponse, ThreadLayoutResponse
+from app.schemas.tracking import (
+    TrackedFrameResponse,
+    TrackFrequencyItem,
+    TrackFrequencyResponse,
+    TrackingSessionSummary,
+    TrackSummary,
+    VideoTrackingResponse,
+)
 
 __all__ = [
     "BoundingBox",
     "ClassFrequencyItem",
     "ClassFrequencyResponse",
+    "DetectionGeometry",
+    "DetectionHistoryFilters",
     "DetectionHistoryItem",
     "DetectionHistoryResponse",
     "DetectionItem",
@@ -22,4 +35,12 @@ __all__ = [
     "DetectionResponse",
     "DetectionResponsePayload",
     "DetectionSummary",
+    "MetricsResponse",
+    "ThreadLayoutResponse",
+    "TrackedFrameResponse",
+    "TrackFrequencyItem",
+    "TrackFrequencyResponse",
+    "TrackingSessionSummary",
+    "TrackSummary",
+    "VideoTrackingResponse",
 ]
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Sequence
+from typing import List, Sequence, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class BoundingBox(BaseModel):
@@ -22,12 +22,33 @@ class BoundingBox(BaseModel):
         return self.width() * self.height()
 
 
+class DetectionGeometry(BaseModel):
+    area: float = Field(..., description="Box area as a fraction of the frame area")
+    center_x: float = Field(..., description="Box center X as a fraction of the frame width")
+    center_y: float = Field(..., description="Box center Y as a fraction of the frame height")
+    aspect_ratio: float = Field(..., description="Box width divided by box height")
+
+    @classmethod
+    def from_bbox(cls, bbox: BoundingBox, *, width: int, height: int) -> "DetectionGeometry":
+        frame_width = float(width) or 1.0
+        frame_height = float(height) or 1.0
+        box_height = bbox.height()
+        return cls(
+            area=bbox.area() / (frame_width * frame_height),
+            center_x=(bbox.x_min + bbox.x_max) / 2 / frame_width,
+            center_y=(bbox.y_min + bbox.y_max) / 2 / frame_height,
+            aspect_ratio=bbox.width() / box_height if box_height else 0.0,
+        )
+
+
 class DetectionItem(BaseModel):
     detection_id: str
     class_id: int
     class_name: str
     confidence: float
     bbox: BoundingBox
+    geometry: DetectionGeometry | None = None
+    track_id: int | None = Field(default=None, description="Track id when the frame came from a video or stream")
 
 
 class DetectionMetadata(BaseModel):
@@ -38,10 +59,21 @@ class DetectionMetadata(BaseModel):
 
 
 class DetectionSummary(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     total_detections: int
     detected_classes: List[str]
     selected_classes: List[str]
     processing_ms: float
+    input_size: int | None = Field(default=None, description="Model input size used for inference")
+    model_name: str | None = Field(default=None, description="Model weights used for inference")
+    roi: List[Tuple[float, float]] | None = Field(
+        default=None, description="Normalized region of interest inference was restricted to"
+    )
+    reused: bool = Field(
+        default=False,
+        description="Detections were copied from a near-identical earlier frame of the same source",
+    )
 
 
 class DetectionResponsePayload(BaseModel):
@@ -49,11 +81,29 @@ class DetectionResponsePayload(BaseModel):
 
 
 class DetectionResponse(BaseModel):
+    id: str | None = Field(default=None, description="Stored result id; thumbnails and previews are served under it")
     metadata: DetectionMetadata
     summary: DetectionSummary
     payload: DetectionResponsePayload
 
 
+class DetectionHistoryFilters(BaseModel):
+    """Per-detection predicates; a result matches when a single detection satisfies all of them."""
+
+    min_confidence: float | None = Field(default=None, ge=0, le=1)
+    min_area: float | None = Field(default=None, ge=0, le=1, description="Minimum normalized box area")
+    max_area: float | None = Field(default=None, ge=0, le=1, description="Maximum normalized box area")
+    region: tuple[float, float, float, float] | None = Field(
+        default=None,
+        description="Normalized (x_min, y_min, x_max, y_max) rectangle the box center must fall in",
+    )
+    start: datetime | None = None
+    end: datetime | None = None
+
+    def has_detection_predicates(self) -> bool:
+        return any(value is not None for value in (self.min_confidence, self.min_area, self.max_area, self.region))
+
+
 class DetectionHistoryItem(BaseModel):
     id: str
     source_name: str | None
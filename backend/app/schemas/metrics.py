@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class MetricsResponse(BaseModel):
+    counters: dict[str, int]
+
+
+class ThreadLayoutResponse(BaseModel):
+    cores: int = Field(..., description="Cores available to this process after affinity and cgroup quota")
+    cgroup_cpu_limit: float | None = Field(default=None, description="cgroup CPU quota in cores, if any")
+    processes: int = Field(..., description="Server processes sharing the cores (WEB_CONCURRENCY)")
+    slots: int = Field(..., description="Concurrent predictions per process")
+    threads_per_slot: int
+    threads: int
+    pin: bool
+    cpu_sets: list[list[int]]
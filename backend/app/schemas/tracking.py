@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.detection import BoundingBox, DetectionMetadata, DetectionResponse
+
+
+class TrackSummary(BaseModel):
+    track_id: int = Field(..., description="Track id, unique within its tracking session")
+    class_id: int
+    class_name: str
+    first_seen: datetime
+    last_seen: datetime
+    first_frame: int
+    last_frame: int
+    frames: int = Field(..., description="Number of frames in which the track was matched to a detection")
+    best_confidence: float
+    best_bbox: BoundingBox = Field(..., description="Box of the highest-confidence observation")
+
+
+class TrackedFrameResponse(DetectionResponse):
+    """Detections of one frame that belong to confirmed tracks; each item carries its `track_id`."""
+
+    session_id: str
+    frame_index: int
+
+
+class TrackingSessionSummary(BaseModel):
+    session_id: str
+    source_name: str | None
+    frames_processed: int
+    total_tracks: int
+    detected_classes: List[str]
+    tracks: List[TrackSummary]
+
+
+class VideoTrackingResponse(TrackingSessionSummary):
+    metadata: DetectionMetadata
+    fps: float
+    processing_ms: float
+
+
+class TrackFrequencyItem(BaseModel):
+    class_name: str
+    tracks: int
+    last_seen: datetime | None = None
+    best_confidence: float | None = None
+
+
+class TrackFrequencyResponse(BaseModel):
+    total_tracks: int
+    total_classes: int
+    items: List[TrackFrequencyItem]
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Sequence
+
+try:  # pragma: no cover - fallback for environments without loguru
+    from loguru import logger
+except ImportError:  # pragma: no cover
+    import logging
+
+    logger = logging.getLogger("visionflow")
+
+
+@dataclass(frozen=True)
+class InferenceLevel:
+    input_size: int
+    model_path: str
+
+
+def build_levels(
+    model_path: str,
+    input_sizes: Sequence[int],
+    fallback_model_path: str | None = None,
+) -> list[InferenceLevel]:
+    """Order levels from most accurate to cheapest; the fallback model runs at the smallest size."""
+    sizes = sorted({int(size) for size in input_sizes if int(size) > 0}, reverse=True)
+    if not sizes:
+        raise ValueError("At least one positive input size is required")
+    levels = [InferenceLevel(input_size=size, model_path=model_path) for size in sizes]
+    if fallback_model_path and fallback_model_path != model_path:
+        levels.append(InferenceLevel(input_size=sizes[-1], model_path=fallback_model_path))
+    return levels
+
+
+class AdaptiveInferenceController:
+    """
+    Picks the inference level from queue depth and recent inference latency.
+
+    Steps down one level as soon as the queue reaches `queue_high` or the recent p90 latency exceeds the
+    budget. Steps back up only after enough consecutive calm observations (queue at or below `queue_low`
+    and the previous level's expected latency well inside the budget). A level's measured latency is only trusted
+    for `probe_s` after it was recorded; older measurements (typically taken under the load that caused the step
+    down) are replaced by the current latency scaled by the input area. Every change starts a `cooldown_s`
+    window in which no further change happens, and a step up that has to be undone within `probe_s` doubles
+    the calm streak required next time, so sustained load settles on one level instead of flapping.
+    """
+
+    def __init__(
+        self,
+        levels: Sequence[InferenceLevel],
+        *,
+        latency_budget_ms: float,
+        queue_high: int = 4,
+        queue_low: int = 1,
+        window: int = 32,
+        recover_after: int = 20,
+        recover_headroom: float = 0.5,
+        cooldown_s: float = 2.0,
+        probe_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not levels:
+            raise ValueError("At least one inference level is required")
+        if queue_low >= queue_high:
+            raise ValueError("queue_low must be lower than queue_high")
+        self.levels = list(levels)
+        self.latency_budget_ms = latency_budget_ms
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.recover_after = recover_after
+        self.recover_headroom = recover_headroom
+        self.cooldown_s = cooldown_s
+        self.probe_s = probe_s
+        self._clock = clock
+        self._index = 0
+        self._depth = 0
+        self._calm = 0
+        self._recover_needed = recover_after
+        self._changed_at = -math.inf
+        self._stepped_up_at: float | None = None
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._level_latency: list[float | None] = [None] * len(self.levels)
+        self._level_recorded_at: list[float] = [-math.inf] * len(self.levels)
+        self._lock = threading.Lock()
+
+    @property
+    def level(self) -> InferenceLevel:
+        return self.levels[self._index]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a request towards the queue depth for as long as it is in the pipeline."""
+        with self._lock:
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depth -= 1
+
+    def select(self) -> InferenceLevel:
+        with self._lock:
+            self._evaluate()
+            return self.levels[self._index]
+
+    def record(self, level: InferenceLevel, latency_ms: float) -> None:
+        with self._lock:
+            index = self.levels.index(level)
+            previous = self._level_latency[index]
+            self._level_latency[index] = latency_ms if previous is None else 0.8 * previous + 0.2 * latency_ms
+            self._level_recorded_at[index] = self._clock()
+            if index == self._index:
+                self._latencies.append(latency_ms)
+
+    def _recent_latency(self) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+    def _expected_latency(self, index: int, current_latency: float, now: float) -> float:
+        known = self._level_latency[index]
+        if known is not None and now - self._level_recorded_at[index] <= self.probe_s:
+            return known
+        scale = (self.levels[index].input_size / self.levels[self._index].input_size) ** 2
+        return current_latency * max(scale, 1.0)
+
+    def _evaluate(self) -> None:
+        now = self._clock()
+        if now - self._changed_at < self.cooldown_s:
+            return
+        if self._stepped_up_at is not None and now - self._stepped_up_at >= self.probe_s:
+            # The last step up held for a full probe window, so recovery is cheap again.
+            self._recover_needed = self.recover_after
+            self._stepped_up_at = None
+
+        latency = self._recent_latency()
+        overloaded = self._depth >= self.queue_high or (latency is not None and latency > self.latency_budget_ms)
+        if overloaded:
+            self._calm = 0
+            if self._index < len(self.levels) - 1:
+                self._step(self._index + 1)
+            return
+
+        if self._index == 0 or latency is None or self._depth > self.queue_low:
+            self._calm = 0
+            return
+
+        expected = self._expected_latency(self._index - 1, latency, now)
+        if expected > self.latency_budget_ms * self.recover_headroom:
+            self._calm = 0
+            return
+
+        self._calm += 1
+        if self._calm >= self._recover_needed:
+            self._step(self._index - 1)
+
+    def _step(self, index: int) -> None:
+        now = self._clock()
+        if index > self._index:
+            if self._stepped_up_at is not None and now - self._stepped_up_at < self.probe_s:
+                self._recover_needed = min(self._recover_needed * 2, self.recover_after * 64)
+            self._stepped_up_at = None
+        else:
+            self._stepped_up_at = now
+        previous = self.levels[self._index]
+        self._index = index
+        self._changed_at = now
+        self._calm = 0
+        self._latencies.clear()
+        current = self.levels[index]
+        logger.info(
+            "Adaptive inference level {}@{} -> {}@{} (queue={})",
+            previous.model_path,
+            previous.input_size,
+            current.model_path,
+            current.input_size,
+            self._depth,
+        )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Hashable
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.schemas.detection import DetectionResponse
+
+HASH_SIZE = 8
+
+
+def dhash(image: np.ndarray, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash: the sign of horizontal gradients on a `hash_size` x `hash_size + 1` grayscale thumbnail.
+
+    Area downsampling averages away JPEG noise, so re-encodes of the same scene land within a few bits.
+    """
+    import cv2  # deferred: the image was decoded with OpenCV, so this is already loaded in practice
+
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class _Entry:
+    frame_hash: int
+    response: DetectionResponse
+    stored_at: float
+
+
+class NearDuplicateCache:
+    """
+    Last inferred frame per source, so near-identical frames from static cameras reuse its detections.
+
+    A frame is compared with the frame that was actually inferred, not with the previous reused one, so slow
+    drift cannot chain past the threshold. Entries older than `max_age_s` are never reused, which bounds how
+    long a change below the threshold can go unnoticed. Sources are evicted least recently used first.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: int = 4,
+        max_age_s: float = 10.0,
+        max_sources: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.max_age_s = max_age_s
+        self.max_sources = max_sources
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable, frame_hash: int) -> DetectionResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                metrics.increment("detection.dedup_misses")
+                return None
+            self._entries.move_to_end(key)
+            if self._clock() - entry.stored_at > self.max_age_s:
+                metrics.increment("detection.dedup_stale")
+                return None
+            if hamming(entry.frame_hash, frame_hash) > self.threshold:
+                metrics.increment("detection.dedup_misses")
+                return None
+        metrics.increment("detection.dedup_hits")
+        return reused_response(entry.response)
+
+    def store(self, key: Hashable, frame_hash: int, response: DetectionResponse) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(frame_hash, response, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sources:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def build_near_duplicate_cache() -> NearDuplicateCache:
+    settings = get_settings()
+    return NearDuplicateCache(
+        threshold=settings.detection_dedup_threshold,
+        max_age_s=settings.detection_dedup_max_age_s,
+        max_sources=settings.detection_dedup_max_sources,
+    )
+
+
+def reused_response(response: DetectionResponse) -> DetectionResponse:
+    """A copy for a new frame: fresh detection ids and timestamp, no inference time, flagged as reused."""
+    detections = [
+        detection.model_copy(update={"detection_id": str(uuid.uuid4())}) for detection in response.payload.detections
+    ]
+    return response.model_copy(
+        update={
+            "metadata": response.metadata.model_copy(update={"processed_at": datetime.utcnow()}),
+            "summary": response.summary.model_copy(update={"reused": True, "processing_ms": 0.0}),
+            "payload": response.payload.model_copy(update={"detections": detections}),
+        }
+    )
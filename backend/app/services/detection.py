@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import math
-from typing import Iterable, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Sequence
 
 import numpy as np
 
@@ -12,97 +15,73 @@ except ImportError:  # pragma: no cover
 
     logger = logging.getLogger("visionflow")
 
-from app.models.detection import DetectionResultDocument
+from app.core.config import get_settings
+from app.core.deadline import Deadline, DeadlineExceededError
+from app.core.metrics import metrics
+from app.core.timing import StageTimings
+from app.repositories import AbstractDetectionRepository, get_detection_repository
+from app.repositories.base import PreviewImage
 from app.schemas.detection import (
     ClassFrequencyItem,
     ClassFrequencyResponse,
+    DetectionHistoryFilters,
     DetectionHistoryItem,
     DetectionHistoryResponse,
     DetectionResponse,
 )
+from app.schemas.tracking import TrackFrequencyItem, TrackFrequencyResponse, VideoTrackingResponse
+from app.services.dedup import NearDuplicateCache, build_near_duplicate_cache, dhash
+from app.services.export import ExportFormat, flatten_detections, stream_export
+from app.services.previews import PreviewGenerator, PreviewKind, get_preview_generator
+from app.services.response_cache import (
+    RESULTS,
+    TRACKS,
+    CachedResponse,
+    ResponseCache,
+    build_response_cache,
+)
+from app.services.tracking import TrackingSession
 from app.services.yolo import YOLOService
+from app.utils.roi import RegionOfInterest
 
 
-class DetectionRepository:
-    async def persist(
-        self,
-        response: DetectionResponse,
-        *,
-        source_name: str | None,
-        source_type: str = "upload",
-    ) -> DetectionResultDocument:
-        document = DetectionResultDocument(
-            source_name=source_name,
-            source_type=source_type,
-            metadata=response.metadata,
-            summary=response.summary,
-            payload=response.payload,
-        )
-        await document.insert()
-        return document
+def __getattr__(name: str) -> Any:
+    # `DetectionRepository` is kept for callers that predate the pluggable repository backends. It resolves
+    # lazily so importing the service does not load Beanie when the SQLite backend is configured.
+    if name == "DetectionRepository":
+        from app.repositories.mongo import MongoDetectionRepository
 
-    async def fetch_history(
-        self,
-        *,
-        page: int,
-        page_size: int,
-        class_name: str | None = None,
-    ) -> tuple[list[DetectionResultDocument], int]:
-        query: dict[str, object] = {}
-        if class_name:
-            query["payload.detections.class_name"] = class_name
-
-        total = await DetectionResultDocument.find(query).count()
-        offset = (page - 1) * page_size
-        documents = (
-            await DetectionResultDocument.find(query)
-            .sort(-DetectionResultDocument.created_at)
-            .skip(offset)
-            .limit(page_size)
-            .to_list()
-        )
-        return documents, total
-
-    async def class_frequency(
-        self,
-        *,
-        class_names: Sequence[str] | None = None,
-    ) -> dict[str, object]:
-        collection = DetectionResultDocument.get_motor_collection()
-        pipeline: list[dict[str, object]] = [{"$unwind": "$payload.detections"}]
-        if class_names:
-            pipeline.append({"$match": {"payload.detections.class_name": {"$in": list(set(class_names))}}})
-        pipeline.extend(
-            [
-                {
-                    "$group": {
-                        "_id": "$payload.detections.class_name",
-                        "detections": {"$sum": 1},
-                        "last_seen": {"$max": "$created_at"},
-                    }
-                },
-                {"$sort": {"detections": -1}},
-            ]
-        )
-
-        aggregated = await collection.aggregate(pipeline).to_list(None)
-        total_detections = sum(item["detections"] for item in aggregated)
-        total_classes = len(aggregated)
-        return {
-            "items": aggregated,
-            "total_detections": total_detections,
-            "total_classes": total_classes,
-        }
+        return MongoDetectionRepository
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class DetectionService:
     def __init__(
         self,
         yolo_service: YOLOService,
-        repository: DetectionRepository | None = None,
+        repository: AbstractDetectionRepository | None = None,
+        near_duplicates: NearDuplicateCache | bool | None = None,
+        response_cache: ResponseCache | bool | None = None,
+        previews: PreviewGenerator | bool | None = None,
     ) -> None:
         self._yolo = yolo_service
-        self._repository = repository or DetectionRepository()
+        self._repository = repository or get_detection_repository()
+        if near_duplicates is None:
+            near_duplicates = get_settings().detection_dedup_enabled
+        if near_duplicates is True:
+            near_duplicates = build_near_duplicate_cache()
+        self._near_duplicates: NearDuplicateCache | None = near_duplicates or None
+        if response_cache is None or response_cache is True:
+            response_cache = build_response_cache()
+        elif response_cache is False:
+            # Still computes ETags, so conditional GETs keep working without caching.
+            response_cache = ResponseCache(ttl_s=0)
+        self._responses: ResponseCache = response_cache
+        if previews is None:
+            previews = get_settings().previews_enabled
+        if previews is True:
+            previews = get_preview_generator()
+        self._previews: PreviewGenerator | None = previews or None
 
     async def run_detection(
         self,
@@ -110,20 +89,128 @@ class DetectionService:
         *,
         selected_classes: Iterable[str] | None,
         source_name: str | None = None,
+        deadline: Deadline | None = None,
+        roi: RegionOfInterest | None = None,
+        timings: StageTimings | None = None,
+        source_id: str | None = None,
     ) -> DetectionResponse:
         logger.debug("Running detection (classes=%s)", selected_classes)
-        response = self._yolo.predict_image(image, selected_classes)
-        await self._repository.persist(response, source_name=source_name)
+        timings = timings or StageTimings()
+        try:
+            with self._yolo.track_request():
+                self._check_deadline(deadline, "inference")
+
+                def predict() -> DetectionResponse:
+                    # A request can wait for an inference slot; re-check once it has one, before running the model.
+                    self._check_deadline(deadline, "inference")
+                    return self._predict(image, selected_classes, roi, source_id)
+
+                inference = self._yolo.run_in_slot(predict)
+                with timings.measure("inference"):
+                    if deadline is None:
+                        response = await inference
+                    else:
+                        try:
+                            response = await asyncio.wait_for(inference, timeout=deadline.remaining())
+                        except asyncio.TimeoutError:
+                            metrics.increment("detection.requests_cancelled")
+                            raise DeadlineExceededError("inference completed") from None
+                # "inference" includes waiting for a worker thread; "model" is the predict call alone.
+                timings.record("model", response.summary.processing_ms)
+                self._check_deadline(deadline, "persist")
+                with timings.measure("persist"):
+                    stored = await self._repository.persist(response, source_name=source_name)
+                self._responses.invalidate(RESULTS)
+                stored_id = getattr(stored, "id", None)
+                if stored_id is not None:
+                    result_id = str(stored_id)
+                    response = response.model_copy(update={"id": result_id})
+                    if self._previews is not None:
+                        # Not awaited: thumbnails are written after the response has been sent.
+                        self._previews.schedule(image, result_id, self._repository)
+        except asyncio.CancelledError:
+            metrics.increment("detection.requests_cancelled")
+            raise
+        metrics.increment("detection.requests_completed")
+        return response
+
+    def _predict(
+        self,
+        image: np.ndarray,
+        selected_classes: Iterable[str] | None,
+        roi: RegionOfInterest | None,
+        source: str | None,
+    ) -> DetectionResponse:
+        """Run inference, or reuse the detections of the source's last frame when this one is a near duplicate."""
+        if self._near_duplicates is None or source is None:
+            return self._yolo.predict_image(image, selected_classes, roi=roi)
+        classes = tuple(sorted({name.strip().lower() for name in selected_classes or [] if name.strip()}))
+        # dHash is resolution-independent, but boxes and metadata are in pixels of the frame they were found in.
+        key = (source, classes, roi.points if roi is not None else None, image.shape[:2])
+        # Only the region that is inferred matters; motion outside the ROI must not defeat reuse.
+        frame_hash = dhash(roi.crop(image)[0] if roi is not None else image)
+        cached = self._near_duplicates.lookup(key, frame_hash)
+        if cached is not None:
+            return cached
+        response = self._yolo.predict_image(image, selected_classes, roi=roi)
+        self._near_duplicates.store(key, frame_hash, response)
         return response
 
+    @staticmethod
+    def _check_deadline(deadline: Deadline | None, stage: str) -> None:
+        if deadline is None:
+            return
+        try:
+            deadline.check(stage)
+        except DeadlineExceededError:
+            metrics.increment("detection.requests_dropped")
+            raise
+
     async def list_detection_history(
         self,
         *,
         page: int,
         page_size: int,
         class_name: str | None = None,
+        filters: DetectionHistoryFilters | None = None,
     ) -> DetectionHistoryResponse:
-        documents, total = await self._repository.fetch_history(page=page, page_size=page_size, class_name=class_name)
+        cached = await self.cached_detection_history(
+            page=page,
+            page_size=page_size,
+            class_name=class_name,
+            filters=filters,
+        )
+        return cached.value
+
+    async def cached_detection_history(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        class_name: str | None = None,
+        filters: DetectionHistoryFilters | None = None,
+    ) -> CachedResponse[DetectionHistoryResponse]:
+        key = ("history", page, page_size, class_name, filters.model_dump_json() if filters else None)
+        return await self._responses.get_or_compute(
+            RESULTS,
+            key,
+            lambda: self._detection_history(page=page, page_size=page_size, class_name=class_name, filters=filters),
+        )
+
+    async def _detection_history(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        class_name: str | None,
+        filters: DetectionHistoryFilters | None,
+    ) -> DetectionHistoryResponse:
+        documents, total = await self._repository.fetch_history(
+            page=page,
+            page_size=page_size,
+            class_name=class_name,
+            filters=filters,
+        )
         pages = math.ceil(total / page_size) if page_size else 0
         items = [
             DetectionHistoryItem(
@@ -144,7 +231,22 @@ class DetectionService:
         class_names: Sequence[str] | None = None,
         limit: int | None = 50,
     ) -> ClassFrequencyResponse:
+        return (await self.cached_class_frequency(class_names=class_names, limit=limit)).value
+
+    async def cached_class_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+        limit: int | None = 50,
+    ) -> CachedResponse[ClassFrequencyResponse]:
         filtered_class_names = [name for name in class_names or [] if name]
+        return await self._responses.get_or_compute(
+            RESULTS,
+            ("classes", tuple(filtered_class_names), limit),
+            lambda: self._class_frequency(filtered_class_names, limit),
+        )
+
+    async def _class_frequency(self, filtered_class_names: list[str], limit: int | None) -> ClassFrequencyResponse:
         aggregation = await self._repository.class_frequency(class_names=filtered_class_names or None)
         aggregated_items: list[dict[str, object]] = aggregation["items"]  # type: ignore[assignment]
         items = [
@@ -164,6 +266,129 @@ class DetectionService:
             items=items,
         )
 
+    async def fetch_preview(self, result_id: str, kind: PreviewKind) -> PreviewImage | None:
+        return await self._repository.fetch_preview(result_id, kind.value)
+
+    def open_tracking_session(
+        self,
+        *,
+        selected_classes: Iterable[str] | None = None,
+        source_name: str | None = None,
+        source_type: str = "stream",
+        roi: RegionOfInterest | None = None,
+    ) -> TrackingSession:
+        return TrackingSession(
+            self._yolo,
+            self._repository,
+            selected_classes=selected_classes,
+            source_name=source_name,
+            source_type=source_type,
+            roi=roi,
+            on_persist=lambda: self._responses.invalidate(TRACKS),
+        )
+
+    async def track_video(
+        self,
+        path: Path,
+        *,
+        selected_classes: Iterable[str] | None,
+        source_name: str | None = None,
+        frame_stride: int = 1,
+        max_frames: int | None = None,
+        roi: RegionOfInterest | None = None,
+    ) -> VideoTrackingResponse:
+        session = self.open_tracking_session(
+            selected_classes=selected_classes,
+            source_name=source_name,
+            source_type="video",
+            roi=roi,
+        )
+        return await session.run_video(path, frame_stride=frame_stride, max_frames=max_frames)
+
+    async def track_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+        limit: int | None = 50,
+    ) -> TrackFrequencyResponse:
+        return (await self.cached_track_frequency(class_names=class_names, limit=limit)).value
+
+    async def cached_track_frequency(
+        self,
+        *,
+        class_names: Sequence[str] | None = None,
+        limit: int | None = 50,
+    ) -> CachedResponse[TrackFrequencyResponse]:
+        filtered_class_names = [name for name in class_names or [] if name]
+        return await self._responses.get_or_compute(
+            TRACKS,
+            ("tracks", tuple(filtered_class_names), limit),
+            lambda: self._track_frequency(filtered_class_names, limit),
+        )
+
+    async def _track_frequency(self, filtered_class_names: list[str], limit: int | None) -> TrackFrequencyResponse:
+        aggregation = await self._repository.track_frequency(class_names=filtered_class_names or None)
+        aggregated_items: list[dict[str, object]] = aggregation["items"]  # type: ignore[assignment]
+        items = [
+            TrackFrequencyItem(
+                class_name=str(item["_id"]),
+                tracks=int(item["tracks"]),
+                last_seen=item.get("last_seen"),
+                best_confidence=item.get("best_confidence"),
+            )
+            for item in aggregated_items
+        ]
+        if limit is not None:
+            items = items[:limit]
+
+        return TrackFrequencyResponse(
+            total_tracks=int(aggregation["total_tracks"]),  # type: ignore[arg-type]
+            total_classes=int(aggregation["total_classes"]),  # type: ignore[arg-type]
+            items=items,
+        )
+
+    def export_history(
+        self,
+        export_format: ExportFormat,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        class_names: Sequence[str] | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        return export_detection_history(
+            self._repository,
+            export_format,
+            start=start,
+            end=end,
+            class_names=class_names,
+            batch_size=batch_size,
+        )
+
+
+def export_detection_history(
+    repository: AbstractDetectionRepository,
+    export_format: ExportFormat,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    class_names: Sequence[str] | None = None,
+    batch_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    filtered_class_names = [name for name in class_names or [] if name] or None
+    documents = repository.iter_export_batches(
+        batch_size=batch_size or get_settings().export_batch_size,
+        start=start,
+        end=end,
+        class_names=filtered_class_names,
+    )
+
+    async def rows() -> AsyncIterator[list[dict[str, Any]]]:
+        async for batch in documents:
+            yield flatten_detections(batch, class_names=filtered_class_names)
+
+    return stream_export(rows(), export_format)
+
 
 _yolo_service: YOLOService | None = None
 _detection_service: DetectionService | None = None
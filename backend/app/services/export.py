@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Iterable, Iterator, Mapping, Sequence
+
+from app.models.packed import unpack_arrays
+
+EXPORT_COLUMNS: tuple[str, ...] = (
+    "result_id",
+    "created_at",
+    "source_name",
+    "detection_id",
+    "class_id",
+    "class_name",
+    "confidence",
+    "x_min",
+    "y_min",
+    "x_max",
+    "y_max",
+)
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+    @property
+    def media_type(self) -> str:
+        return _MEDIA_TYPES[self]
+
+    @property
+    def extension(self) -> str:
+        return _EXTENSIONS[self]
+
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+_EXTENSIONS = {
+    ExportFormat.CSV: "csv",
+    ExportFormat.ARROW: "arrows",
+    ExportFormat.PARQUET: "parquet",
+}
+
+
+def _load_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError("pyarrow is required for Arrow and Parquet exports") from exc
+    return pyarrow
+
+
+def ensure_format_available(export_format: ExportFormat) -> None:
+    if export_format is not ExportFormat.CSV:
+        _load_pyarrow()
+
+
+def _iter_detections(document: Mapping[str, Any]) -> Iterator[tuple[Any, ...]]:
+    packed = document.get("packed")
+    if packed:
+        arrays = unpack_arrays(packed)
+        yield from zip(
+            arrays.detection_ids,
+            arrays.class_ids.tolist(),
+            [arrays.class_names.get(class_id) for class_id in arrays.class_ids.tolist()],
+            arrays.confidences.tolist(),
+            arrays.boxes.tolist(),
+        )
+        return
+    payload = document.get("payload") or {}
+    for detection in payload.get("detections") or []:
+        bbox = detection.get("bbox") or {}
+        yield (
+            detection.get("detection_id"),
+            int(detection.get("class_id", -1)),
+            detection.get("class_name"),
+            float(detection.get("confidence", 0.0)),
+            [float(bbox.get(key, 0.0)) for key in ("x_min", "y_min", "x_max", "y_max")],
+        )
+
+
+def flatten_detections(
+    documents: Iterable[Mapping[str, Any]],
+    *,
+    class_names: Sequence[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Turn raw `detection_results` documents (either storage format) into one row per detection."""
+    wanted = set(class_names) if class_names else None
+    rows: list[dict[str, Any]] = []
+    for document in documents:
+        result_id = str(document.get("_id"))
+        created_at = document.get("created_at")
+        source_name = document.get("source_name")
+        for detection_id, class_id, class_name, confidence, box in _iter_detections(document):
+            if wanted is not None and class_name not in wanted:
+                continue
+            rows.append(
+                {
+                    "result_id": result_id,
+                    "created_at": created_at,
+                    "source_name": source_name,
+                    "detection_id": detection_id,
+                    "class_id": class_id,
+                    "class_name": class_name,
+                    "confidence": confidence,
+                    "x_min": box[0],
+                    "y_min": box[1],
+                    "x_max": box[2],
+                    "y_max": box[3],
+                }
+            )
+    return rows
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(pa: Any) -> Any:
+    return pa.schema(
+        [
+            ("result_id", pa.string()),
+            ("created_at", pa.timestamp("ms", tz="UTC")),
+            ("source_name", pa.string()),
+            ("detection_id", pa.string()),
+            ("class_id", pa.int32()),
+            ("class_name", pa.string()),
+            ("confidence", pa.float32()),
+            ("x_min", pa.float32()),
+            ("y_min", pa.float32()),
+            ("x_max", pa.float32()),
+            ("y_max", pa.float32()),
+        ]
+    )
+
+
+def _record_batch(pa: Any, schema: Any, rows: list[dict[str, Any]]) -> Any:
+    columns = {column: [row[column] for row in rows] for column in EXPORT_COLUMNS}
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+async def _stream_csv(batches: AsyncIterator[list[dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for rows in batches:
+        for row in rows:
+            created_at = row["created_at"]
+            writer.writerow(
+                {**row, "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at}
+            )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+async def _stream_arrow(
+    batches: AsyncIterator[list[dict[str, Any]]],
+    *,
+    parquet: bool,
+) -> AsyncIterator[bytes]:
+    pa = _load_pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    if parquet:
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    try:
+        async for rows in batches:
+            if not rows:
+                continue
+            writer.write_batch(_record_batch(pa, schema, rows))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def stream_export(
+    batches: AsyncIterator[list[dict[str, Any]]],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """Encode flattened row batches incrementally; each input batch becomes one chunk / row group."""
+    if export_format is ExportFormat.CSV:
+        return _stream_csv(batches)
+    return _stream_arrow(batches, parquet=export_format is ExportFormat.PARQUET)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+import numpy as np
+
+try:  # pragma: no cover - fallback for environments without loguru
+    from loguru import logger
+except ImportError:  # pragma: no cover
+    import logging
+
+    logger = logging.getLogger("visionflow")
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.repositories.base import AbstractDetectionRepository, PreviewImage
+
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+class PreviewKind(str, Enum):
+    THUMBNAIL = "thumbnail"
+    PREVIEW = "preview"
+
+
+def fit_within(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale so the longest side is at most `max_side`, keeping the aspect ratio; never upscales."""
+    import cv2  # deferred: the image was decoded with OpenCV, so this is already loaded in practice
+
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_image(image: np.ndarray, image_format: str, quality: int) -> bytes:
+    import cv2
+
+    if image_format == "webp":
+        extension, params = ".webp", [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        extension, params = ".jpg", [cv2.IMWRITE_JPEG_QUALITY, quality]
+    success, buffer = cv2.imencode(extension, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), params)
+    if not success:
+        raise ValueError(f"Unable to encode {image_format} preview")
+    return buffer.tobytes()
+
+
+def render_previews(
+    image: np.ndarray,
+    *,
+    thumbnail_size: int = 256,
+    preview_size: int = 1024,
+    image_format: str = "webp",
+    quality: int = 80,
+) -> list[PreviewImage]:
+    """
+    Encode the preview and thumbnail of an RGB image.
+
+    The full-size frame is resampled once; the thumbnail is taken from the preview, which is already a fraction
+    of the original's pixels and gives the same result under area interpolation.
+    """
+    preview = fit_within(image, preview_size)
+    thumbnail = fit_within(preview if thumbnail_size <= preview_size else image, thumbnail_size)
+    return [
+        PreviewImage(
+            kind=kind.value,
+            media_type=MEDIA_TYPES[image_format],
+            width=rendered.shape[1],
+            height=rendered.shape[0],
+            data=encode_image(rendered, image_format, quality),
+        )
+        for kind, rendered in ((PreviewKind.THUMBNAIL, thumbnail), (PreviewKind.PREVIEW, preview))
+    ]
+
+
+class PreviewGenerator:
+    """
+    Renders previews of ingested images off the request path and stores them beside the detection record.
+
+    `schedule` only creates a task: resizing and encoding run on a dedicated executor, so they never occupy the
+    default thread pool that inference runs on, and the response is returned without waiting for them. The decoded
+    array is shared, not copied, so callers must not modify it afterwards. Queued renders keep their full-size frame
+    alive, so new ones are skipped once `max_pending` renders or `max_pending_bytes` of frames are queued; a frame
+    larger than the byte budget is only accepted when nothing else is queued. A missing preview only costs the
+    client a fallback to the original.
+    """
+
+    def __init__(
+        self,
+        *,
+        thumbnail_size: int = 256,
+        preview_size: int = 1024,
+        image_format: str = "webp",
+        quality: int = 80,
+        workers: int = 1,
+        max_pending: int = 32,
+        max_pending_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        if image_format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported preview format: {image_format}")
+        self.thumbnail_size = thumbnail_size
+        self.preview_size = preview_size
+        self.image_format = image_format
+        self.quality = quality
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self._pending_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="previews")
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def render(self, image: np.ndarray) -> list[PreviewImage]:
+        return render_previews(
+            image,
+            thumbnail_size=self.thumbnail_size,
+            preview_size=self.preview_size,
+            image_format=self.image_format,
+            quality=self.quality,
+        )
+
+    def schedule(self, image: np.ndarray, result_id: str, repository: AbstractDetectionRepository) -> bool:
+        size = image.nbytes
+        over_budget = bool(self._tasks) and self._pending_bytes + size > self.max_pending_bytes
+        if len(self._tasks) >= self.max_pending or over_budget:
+            metrics.increment("previews.skipped")
+            return False
+        task = asyncio.get_running_loop().create_task(self._generate(image, result_id, repository))
+        # The event loop only keeps weak references to tasks.
+        self._tasks.add(task)
+        self._pending_bytes += size
+
+        def finished(done: asyncio.Task[None]) -> None:
+            self._tasks.discard(done)
+            self._pending_bytes -= size
+
+        task.add_done_callback(finished)
+        return True
+
+    async def _generate(self, image: np.ndarray, result_id: str, repository: AbstractDetectionRepository) -> None:
+        try:
+            previews = await asyncio.get_running_loop().run_in_executor(self._executor, self.render, image)
+            await repository.persist_previews(result_id, previews)
+        except Exception as exc:  # noqa: BLE001 - a failed preview must not surface anywhere but the logs
+            metrics.increment("previews.failed")
+            logger.warning("Preview generation for result {} failed: {}", result_id, exc)
+            return
+        metrics.increment("previews.generated")
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.drain()
+        self._executor.shutdown(wait=True)
+
+
+_preview_generator: PreviewGenerator | None = None
+
+
+def get_preview_generator() -> PreviewGenerator:
+    global _preview_generator
+    if _preview_generator is None:
+        settings = get_settings()
+        _preview_generator = PreviewGenerator(
+            thumbnail_size=settings.preview_thumbnail_size,
+            preview_size=settings.preview_size,
+            image_format=settings.preview_format,
+            quality=settings.preview_quality,
+            workers=settings.preview_workers,
+            max_pending=settings.preview_max_pending,
+            max_pending_bytes=settings.preview_max_pending_mb * 1024 * 1024,
+        )
+    return _preview_generator
+
+
+async def close_preview_generator() -> None:
+    global _preview_generator
+    if _preview_generator is not None:
+        await _preview_generator.close()
+        _preview_generator = None
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+T = TypeVar("T", bound=BaseModel)
+
+RESULTS = "results"
+TRACKS = "tracks"
+
+
+@dataclass(frozen=True)
+class CachedResponse(Generic[T]):
+    value: T
+    etag: str
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Weak comparison against an `If-None-Match` header, as required for conditional GETs."""
+        if not if_none_match:
+            return False
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        return "*" in candidates or self.etag.removeprefix("W/") in candidates
+
+
+@dataclass
+class _Entry:
+    response: CachedResponse
+    version: int
+    stored_at: float
+
+
+def compute_etag(value: BaseModel) -> str:
+    digest = hashlib.blake2b(value.model_dump_json().encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ResponseCache:
+    """
+    Read-model cache for polled endpoints, invalidated by a write version per collection.
+
+    Every persist bumps its collection's version, so entries computed before the write are never served again in
+    this process. Writes from other processes cannot bump it; `ttl_s` bounds how long they stay invisible. ETags
+    are content hashes, so a recomputation that finds nothing new keeps the same tag and clients still get 304.
+    A `ttl_s` of 0 disables caching but keeps the ETags.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 5.0,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        self._versions: defaultdict[str, int] = defaultdict(int)
+        self._entries: OrderedDict[tuple[str, Hashable], _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, collection: str) -> int:
+        with self._lock:
+            return self._versions[collection]
+
+    def invalidate(self, collection: str) -> None:
+        with self._lock:
+            self._versions[collection] += 1
+
+    def get(self, collection: str, key: Hashable) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get((collection, key))
+            if entry is None:
+                return None
+            if entry.version != self._versions[collection] or self._clock() - entry.stored_at > self.ttl_s:
+                del self._entries[(collection, key)]
+                return None
+            self._entries.move_to_end((collection, key))
+            return entry.response
+
+    async def get_or_compute(
+        self,
+        collection: str,
+        key: Hashable,
+        compute: Callable[[], Awaitable[T]],
+    ) -> CachedResponse[T]:
+        cached = self.get(collection, key)
+        if cached is not None:
+            metrics.increment(f"response_cache.{collection}.hits")
+            return cached
+        metrics.increment(f"response_cache.{collection}.misses")
+        # Read the version first: a write that lands while computing must invalidate this result.
+        version = self.version(collection)
+        value = await compute()
+        response = CachedResponse(value=value, etag=compute_etag(value))
+        if self.ttl_s > 0:
+            with self._lock:
+                self._entries[(collection, key)] = _Entry(response, version, self._clock())
+                self._entries.move_to_end((collection, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return response
+
+
+def build_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(ttl_s=settings.response_cache_ttl_s, max_entries=settings.response_cache_max_entries)
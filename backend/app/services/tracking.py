@@ -0,0 +1,518 @@
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.repositories.base import AbstractDetectionRepository
+from app.schemas.detection import BoundingBox, DetectionItem, DetectionMetadata, DetectionResponsePayload
+from app.schemas.tracking import TrackedFrameResponse, TrackingSessionSummary, TrackSummary, VideoTrackingResponse
+from app.services.yolo import YOLOService
+from app.utils.roi import RegionOfInterest
+from app.utils.video import iter_video_frames
+
+# Constant-velocity model over (cx, cy, w, h); one step per processed frame.
+_MOTION = np.eye(8)
+_MOTION[:4, 4:] = np.eye(4)
+_DIAGONAL = np.arange(8)
+_POSITION_NOISE = 1.0 / 20
+_VELOCITY_NOISE = 1.0 / 160
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of `(N, 4)` and `(M, 4)` xyxy boxes as an `(N, M)` matrix."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)))
+    width = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    width -= np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    np.clip(width, 0, None, out=width)
+    height = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    height -= np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    np.clip(height, 0, None, out=height)
+    intersection = np.multiply(width, height, out=width)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = np.add(area_a[:, None], area_b[None, :], out=height)
+    union -= intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def class_iou_matrix(
+    boxes_a: np.ndarray,
+    classes_a: np.ndarray,
+    boxes_b: np.ndarray,
+    classes_b: np.ndarray,
+) -> np.ndarray:
+    """IoU matrix with cross-class pairs left at zero; only same-class blocks are computed."""
+    scores = np.zeros((len(boxes_a), len(boxes_b)))
+    if scores.size == 0:
+        return scores
+    for class_id in np.intersect1d(classes_a, classes_b):
+        rows = np.flatnonzero(classes_a == class_id)
+        columns = np.flatnonzero(classes_b == class_id)
+        scores[np.ix_(rows, columns)] = iou_matrix(boxes_a[rows], boxes_b[columns])
+    return scores
+
+
+def greedy_match(scores: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    One-to-one assignment taking the highest-scoring pairs first; returns matched (row, column) indices.
+
+    Only pairs at or above `threshold` are considered, so the candidate list stays sparse even with hundreds
+    of boxes per frame.
+    """
+    rows, columns = np.nonzero(scores >= threshold)
+    if rows.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    order = np.argsort(-scores[rows, columns], kind="stable")
+    rows, columns = rows[order], columns[order]
+    if np.unique(rows).size == rows.size and np.unique(columns).size == columns.size:
+        return rows, columns
+
+    used_rows: set[int] = set()
+    used_columns: set[int] = set()
+    matched_rows: list[int] = []
+    matched_columns: list[int] = []
+    for row, column in zip(rows.tolist(), columns.tolist()):
+        if row in used_rows or column in used_columns:
+            continue
+        used_rows.add(row)
+        used_columns.add(column)
+        matched_rows.append(row)
+        matched_columns.append(column)
+    return np.asarray(matched_rows, dtype=np.intp), np.asarray(matched_columns, dtype=np.intp)
+
+
+def _to_xywh(boxes: np.ndarray) -> np.ndarray:
+    return np.column_stack(
+        [
+            (boxes[:, 0] + boxes[:, 2]) / 2,
+            (boxes[:, 1] + boxes[:, 3]) / 2,
+            boxes[:, 2] - boxes[:, 0],
+            boxes[:, 3] - boxes[:, 1],
+        ]
+    )
+
+
+def _to_xyxy(states: np.ndarray) -> np.ndarray:
+    half_width = np.clip(states[:, 2], 0, None) / 2
+    half_height = np.clip(states[:, 3], 0, None) / 2
+    return np.column_stack(
+        [
+            states[:, 0] - half_width,
+            states[:, 1] - half_height,
+            states[:, 0] + half_width,
+            states[:, 1] + half_height,
+        ]
+    )
+
+
+def _scale(sizes: np.ndarray) -> np.ndarray:
+    """Per-coordinate noise scale: x and width follow box width, y and height follow box height."""
+    sizes = np.maximum(sizes, 1.0)
+    return np.column_stack([sizes[:, 0], sizes[:, 1], sizes[:, 0], sizes[:, 1]])
+
+
+def _initiate(measurements: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    scale = _scale(measurements[:, 2:4])
+    std = np.hstack([2 * _POSITION_NOISE * scale, 10 * _VELOCITY_NOISE * scale])
+    mean = np.hstack([measurements, np.zeros_like(measurements)])
+    covariance = np.zeros((len(measurements), 8, 8))
+    covariance[:, _DIAGONAL, _DIAGONAL] = std**2
+    return mean, covariance
+
+
+def _predict(mean: np.ndarray, covariance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    scale = _scale(mean[:, 2:4])
+    noise = np.hstack([_POSITION_NOISE * scale, _VELOCITY_NOISE * scale]) ** 2
+    mean = mean @ _MOTION.T
+    covariance = _MOTION @ covariance @ _MOTION.T
+    covariance[:, _DIAGONAL, _DIAGONAL] += noise
+    return mean, covariance
+
+
+def _update(mean: np.ndarray, covariance: np.ndarray, measurements: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    innovation_covariance = covariance[:, :4, :4].copy()
+    innovation_covariance[:, _DIAGONAL[:4], _DIAGONAL[:4]] += (_POSITION_NOISE * _scale(mean[:, 2:4])) ** 2
+    # K = P Hᵀ S⁻¹, solved rather than inverted; S is symmetric so Kᵀ = S⁻¹ H P.
+    gain = np.linalg.solve(innovation_covariance, covariance[:, :4, :]).transpose(0, 2, 1)
+    innovation = measurements - mean[:, :4]
+    mean = mean + np.einsum("nij,nj->ni", gain, innovation)
+    covariance = covariance - gain @ covariance[:, :4, :]
+    return mean, covariance
+
+
+@dataclass
+class Track:
+    track_id: int
+    class_id: int
+    class_name: str
+    first_seen: datetime
+    last_seen: datetime
+    first_frame: int
+    last_frame: int
+    best_confidence: float
+    best_box: tuple[float, float, float, float]
+    hits: int = 1
+    misses: int = 0
+    confirmed: bool = False
+
+    def observe(self, frame: int, timestamp: datetime, confidence: float, box: Sequence[float]) -> None:
+        self.hits += 1
+        self.misses = 0
+        self.last_frame = frame
+        self.last_seen = timestamp
+        if confidence > self.best_confidence:
+            self.best_confidence = confidence
+            self.best_box = (float(box[0]), float(box[1]), float(box[2]), float(box[3]))
+
+    def summary(self) -> TrackSummary:
+        x_min, y_min, x_max, y_max = self.best_box
+        return TrackSummary(
+            track_id=self.track_id,
+            class_id=self.class_id,
+            class_name=self.class_name,
+            first_seen=self.first_seen,
+            last_seen=self.last_seen,
+            first_frame=self.first_frame,
+            last_frame=self.last_frame,
+            frames=self.hits,
+            best_confidence=self.best_confidence,
+            best_bbox=BoundingBox(x_min=x_min, y_min=y_min, x_max=x_max, y_max=y_max),
+        )
+
+
+class MultiObjectTracker:
+    """
+    ByteTrack-style tracker over a vectorized constant-velocity Kalman filter.
+
+    Each frame runs three IoU association stages against the predicted track boxes: confirmed tracks
+    (including ones currently lost) with high-confidence detections, tracks still matched on the previous
+    frame with the remaining low-confidence detections, and unconfirmed tracks with what is left of the
+    high-confidence detections. Unmatched high-confidence detections start tentative tracks that are
+    confirmed after `min_hits` matches; confirmed tracks are finished after `max_age` frames without a match.
+    Associations never cross classes.
+    """
+
+    def __init__(
+        self,
+        *,
+        high_threshold: float = 0.5,
+        low_threshold: float = 0.1,
+        new_track_threshold: float | None = None,
+        match_iou: float = 0.2,
+        low_match_iou: float = 0.5,
+        unconfirmed_match_iou: float = 0.3,
+        max_age: int = 30,
+        min_hits: int = 2,
+    ) -> None:
+        if not 0 <= low_threshold <= high_threshold <= 1:
+            raise ValueError("Tracker thresholds must satisfy 0 <= low_threshold <= high_threshold <= 1")
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.new_track_threshold = high_threshold if new_track_threshold is None else new_track_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.unconfirmed_match_iou = unconfirmed_match_iou
+        self.max_age = max_age
+        self.min_hits = max(min_hits, 1)
+        self.frame_index = 0
+        self._next_id = 1
+        self._tracks: list[Track] = []
+        self._mean = np.zeros((0, 8))
+        self._covariance = np.zeros((0, 8, 8))
+        self._finished: list[TrackSummary] = []
+
+    @property
+    def active_tracks(self) -> list[Track]:
+        return [track for track in self._tracks if track.confirmed]
+
+    def update(self, detections: Sequence[DetectionItem], *, timestamp: datetime | None = None) -> list[DetectionItem]:
+        """Track one frame; returns the detections that belong to confirmed tracks with `track_id` set."""
+        boxes = np.array(
+            [[item.bbox.x_min, item.bbox.y_min, item.bbox.x_max, item.bbox.y_max] for item in detections],
+            dtype=float,
+        ).reshape(-1, 4)
+        track_ids = self.update_arrays(
+            boxes,
+            np.array([item.confidence for item in detections], dtype=float),
+            np.array([item.class_id for item in detections], dtype=np.int64),
+            class_names=[item.class_name for item in detections],
+            timestamp=timestamp,
+        )
+        return [
+            item.model_copy(update={"track_id": int(track_id)})
+            for item, track_id in zip(detections, track_ids.tolist())
+            if track_id > 0
+        ]
+
+    def update_arrays(
+        self,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: np.ndarray,
+        *,
+        class_names: Sequence[str] | None = None,
+        timestamp: datetime | None = None,
+    ) -> np.ndarray:
+        """Array form of `update`; returns one track id per detection, 0 when it is not part of a confirmed track."""
+        self.frame_index += 1
+        now = timestamp or datetime.utcnow()
+        track_ids = np.zeros(len(boxes), dtype=np.int64)
+
+        if self._tracks:
+            self._mean, self._covariance = _predict(self._mean, self._covariance)
+        predicted = _to_xyxy(self._mean)
+        confirmed = np.array([track.confirmed for track in self._tracks], dtype=bool)
+        recently_matched = np.array([track.misses == 0 for track in self._tracks], dtype=bool)
+        track_classes = np.array([track.class_id for track in self._tracks], dtype=np.int64)
+        unmatched_tracks = np.ones(len(self._tracks), dtype=bool)
+        unmatched_detections = scores >= self.low_threshold
+        high = scores >= self.high_threshold
+
+        matched_tracks: list[np.ndarray] = []
+        matched_detections: list[np.ndarray] = []
+
+        def associate(track_mask: np.ndarray, detection_mask: np.ndarray, threshold: float) -> None:
+            track_index = np.flatnonzero(track_mask & unmatched_tracks)
+            detection_index = np.flatnonzero(detection_mask & unmatched_detections)
+            if track_index.size == 0 or detection_index.size == 0:
+                return
+            scores_matrix = class_iou_matrix(
+                predicted[track_index],
+                track_classes[track_index],
+                boxes[detection_index],
+                class_ids[detection_index],
+            )
+            rows, columns = greedy_match(scores_matrix, threshold)
+            if rows.size == 0:
+                return
+            unmatched_tracks[track_index[rows]] = False
+            unmatched_detections[detection_index[columns]] = False
+            matched_tracks.append(track_index[rows])
+            matched_detections.append(detection_index[columns])
+
+        associate(confirmed, high, self.match_iou)
+        associate(confirmed & recently_matched, ~high, self.low_match_iou)
+        associate(~confirmed, high, self.unconfirmed_match_iou)
+
+        if matched_tracks:
+            track_index = np.concatenate(matched_tracks)
+            detection_index = np.concatenate(matched_detections)
+            self._mean[track_index], self._covariance[track_index] = _update(
+                self._mean[track_index],
+                self._covariance[track_index],
+                _to_xywh(boxes[detection_index]),
+            )
+            for position, detection in zip(track_index.tolist(), detection_index.tolist()):
+                track = self._tracks[position]
+                track.observe(self.frame_index, now, float(scores[detection]), boxes[detection])
+                if track.hits >= self.min_hits:
+                    track.confirmed = True
+                if track.confirmed:
+                    track_ids[detection] = track.track_id
+
+        keep = np.ones(len(self._tracks), dtype=bool)
+        for position in np.flatnonzero(unmatched_tracks).tolist():
+            track = self._tracks[position]
+            track.misses += 1
+            if not track.confirmed:
+                keep[position] = False
+            elif track.misses > self.max_age:
+                keep[position] = False
+                self._finished.append(track.summary())
+        if not keep.all():
+            self._tracks = [track for track, kept in zip(self._tracks, keep.tolist()) if kept]
+            self._mean = self._mean[keep]
+            self._covariance = self._covariance[keep]
+
+        new = np.flatnonzero(unmatched_detections & (scores >= self.new_track_threshold))
+        if new.size:
+            mean, covariance = _initiate(_to_xywh(boxes[new]))
+            self._mean = np.vstack([self._mean, mean])
+            self._covariance = np.concatenate([self._covariance, covariance])
+            # As in ByteTrack, objects present on the first frame are confirmed immediately.
+            confirm = self.frame_index == 1 or self.min_hits == 1
+            for detection in new.tolist():
+                class_id = int(class_ids[detection])
+                box = boxes[detection]
+                track = Track(
+                    track_id=self._next_id,
+                    class_id=class_id,
+                    class_name=class_names[detection] if class_names is not None else f"class_{class_id}",
+                    first_seen=now,
+                    last_seen=now,
+                    first_frame=self.frame_index,
+                    last_frame=self.frame_index,
+                    best_confidence=float(scores[detection]),
+                    best_box=(float(box[0]), float(box[1]), float(box[2]), float(box[3])),
+                    confirmed=confirm,
+                )
+                self._next_id += 1
+                self._tracks.append(track)
+                if confirm:
+                    track_ids[detection] = track.track_id
+        return track_ids
+
+    def pop_finished(self) -> list[TrackSummary]:
+        """Return and forget the confirmed tracks that ended since the last call."""
+        finished, self._finished = self._finished, []
+        return finished
+
+    def finish_all(self) -> list[TrackSummary]:
+        """End every live track (e.g. at the end of a video) and return all unreported confirmed tracks."""
+        self._finished.extend(track.summary() for track in self._tracks if track.confirmed)
+        self._tracks = []
+        self._mean = np.zeros((0, 8))
+        self._covariance = np.zeros((0, 8, 8))
+        return self.pop_finished()
+
+
+def build_tracker() -> MultiObjectTracker:
+    settings = get_settings()
+    return MultiObjectTracker(
+        high_threshold=settings.tracker_high_threshold,
+        low_threshold=settings.tracker_low_threshold,
+        match_iou=settings.tracker_match_iou,
+        max_age=settings.tracker_max_age,
+        min_hits=settings.tracker_min_hits,
+    )
+
+
+class TrackingSession:
+    """
+    Detection plus tracking over consecutive frames of one video or stream.
+
+    Per-frame results are not stored; finished tracks are persisted once each through the repository, so
+    analytics count objects rather than frames.
+    """
+
+    def __init__(
+        self,
+        yolo_service: YOLOService,
+        repository: AbstractDetectionRepository,
+        *,
+        tracker: MultiObjectTracker | None = None,
+        selected_classes: Iterable[str] | None = None,
+        source_name: str | None = None,
+        source_type: str = "stream",
+        roi: RegionOfInterest | None = None,
+        on_persist: Callable[[], None] | None = None,
+    ) -> None:
+        self._yolo = yolo_service
+        self._repository = repository
+        self.tracker = tracker or build_tracker()
+        self.selected_classes = list(selected_classes or [])
+        self.source_name = source_name
+        self.source_type = source_type
+        self.roi = roi
+        self._on_persist = on_persist
+        self.session_id = uuid.uuid4().hex
+        self.started_at = datetime.utcnow()
+        self.tracks: list[TrackSummary] = []
+        # The low-confidence association stage needs detections below the normal reporting threshold.
+        self._confidence = min(self._yolo.confidence, self.tracker.low_threshold)
+        self._closed = False
+
+    def process_frame(self, image: np.ndarray, timestamp: datetime | None = None) -> TrackedFrameResponse:
+        response = self._yolo.predict_image(
+            image, self.selected_classes, confidence=self._confidence, roi=self.roi
+        )
+        tracked = self.tracker.update(response.payload.detections, timestamp=timestamp)
+        metrics.increment("tracking.frames")
+        summary = response.summary.model_copy(
+            update={
+                "total_detections": len(tracked),
+                "detected_classes": sorted({item.class_name for item in tracked}),
+            }
+        )
+        return TrackedFrameResponse(
+            session_id=self.session_id,
+            frame_index=self.tracker.frame_index,
+            metadata=response.metadata,
+            summary=summary,
+            payload=DetectionResponsePayload(detections=tracked),
+        )
+
+    async def process(self, image: np.ndarray, timestamp: datetime | None = None) -> TrackedFrameResponse:
+        with self._yolo.track_request():
+            frame = await self._yolo.run_in_slot(partial(self.process_frame, image, timestamp))
+        await self.flush()
+        return frame
+
+    async def flush(self) -> None:
+        await self._persist(self.tracker.pop_finished())
+
+    async def close(self) -> list[TrackSummary]:
+        """Finish all live tracks and persist them; safe to call more than once."""
+        if not self._closed:
+            self._closed = True
+            await self._persist(self.tracker.finish_all())
+        return self.tracks
+
+    def summary(self) -> TrackingSessionSummary:
+        return TrackingSessionSummary(
+            session_id=self.session_id,
+            source_name=self.source_name,
+            frames_processed=self.tracker.frame_index,
+            total_tracks=len(self.tracks),
+            detected_classes=sorted({track.class_name for track in self.tracks}),
+            tracks=self.tracks,
+        )
+
+    async def _persist(self, finished: list[TrackSummary]) -> None:
+        if not finished:
+            return
+        await self._repository.persist_tracks(
+            finished,
+            session_id=self.session_id,
+            source_name=self.source_name,
+            source_type=self.source_type,
+        )
+        if self._on_persist is not None:
+            self._on_persist()
+        metrics.increment("tracking.tracks_finished", len(finished))
+        self.tracks.extend(finished)
+
+    def _process_video(
+        self,
+        path: Path,
+        frame_stride: int,
+        max_frames: int | None,
+    ) -> tuple[DetectionMetadata | None, float]:
+        metadata: DetectionMetadata | None = None
+        fps = 0.0
+        for frame in iter_video_frames(path, stride=frame_stride, max_frames=max_frames):
+            result = self.process_frame(frame.image, self.started_at + timedelta(seconds=frame.offset_s))
+            metadata = metadata or result.metadata
+            fps = frame.fps
+        return metadata, fps
+
+    async def run_video(
+        self,
+        path: Path,
+        *,
+        frame_stride: int = 1,
+        max_frames: int | None = None,
+    ) -> VideoTrackingResponse:
+        start = time.perf_counter()
+        with self._yolo.track_request():
+            # One admission for the whole video: its frames run one after another, each in a free slot.
+            metadata, fps = await self._yolo.run_in_slot(partial(self._process_video, path, frame_stride, max_frames))
+        await self.close()
+        if metadata is None:
+            raise ValueError("Video contains no decodable frames")
+        return VideoTrackingResponse(
+            **self.summary().model_dump(),
+            metadata=metadata,
+            fps=fps,
+            processing_ms=(time.perf_counter() - start) * 1000,
+        )
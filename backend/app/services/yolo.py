@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import importlib.util
+import math
 import threading
 import time
 import uuid
-from typing import Callable, Iterable, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from typing import Callable, Iterable, Sequence, TypeVar
 
 import numpy as np
 
@@ -15,6 +18,14 @@ except ImportError:  # pragma: no cover
     logger = logging.getLogger("visionflow")
 
 from app.core.config import get_settings
+from app.core.threads import (
+    InferenceSlots,
+    ThreadLayout,
+    WorkerAdmission,
+    apply_thread_layout,
+    get_thread_layout,
+    set_thread_environment,
+)
 from app.schemas.detection import (
     BoundingBox,
     DetectionItem,
@@ -23,12 +34,20 @@ from app.schemas.detection import (
     DetectionResponsePayload,
     DetectionSummary,
 )
+from app.services.adaptive import AdaptiveInferenceController, InferenceLevel, build_levels
+from app.utils.roi import RegionOfInterest
+
+T = TypeVar("T")
+
+# Ultralytics letterboxes to a multiple of the model stride.
+_MODEL_STRIDE = 32
+
 
-try:
+def _ultralytics_model(model_path: str) -> object:
+    """Default model factory. Ultralytics (and torch) are imported on the first model load, not at app import."""
     from ultralytics import YOLO  # type: ignore[attr-defined]
-except Exception as exc:  # pragma: no cover - import guarded for environments without ultralytics
-    YOLO = None
-    logger.warning("Ultralytics YOLO import failed: {}", exc)
+
+    return YOLO(model_path)
 
 
 def _to_list(value: Sequence | np.ndarray) -> list:
@@ -46,45 +65,159 @@ class YOLOService:
         confidence: float | None = None,
         device: str | None = None,
         model_factory: Callable[[str], object] | None = None,
+        input_size: int | None = None,
+        adaptive: AdaptiveInferenceController | bool | None = None,
+        thread_layout: ThreadLayout | None = None,
     ) -> None:
         settings = get_settings()
         self.model_path = model_path or settings.yolo_model_path
         self.confidence = confidence or settings.yolo_confidence
         self.device = device or settings.yolo_device
-        self._model_factory = model_factory or YOLO  # type: ignore[assignment]
-        self._model: object | None = None
-        self._lock = threading.Lock()
-
-        if self._model_factory is None:
+        self.input_size = input_size or settings.yolo_input_size
+        if model_factory is None and importlib.util.find_spec("ultralytics") is None:
             raise RuntimeError(
                 "Ultralytics is not available. Install it or provide a custom model_factory."
             )
+        self._model_factory = model_factory or _ultralytics_model
+        # Keyed by (model path, slot). Ultralytics keeps per-call state (predictor args such as `imgsz` and
+        # `classes`) on the model, so each slot gets its own instance and an instance runs one prediction at a time.
+        self._models: dict[tuple[str, int], object] = {}
+        self._predict_locks: dict[tuple[str, int], threading.Lock] = {}
+        self._class_names: dict[str, dict[str, int] | None] = {}
+        self._lock = threading.Lock()
+
+        # On CPU, concurrent predictions times intra-op threads must fit the cores; GPUs queue work themselves.
+        if thread_layout is None and self.device == "cpu":
+            thread_layout = get_thread_layout()
+        self.thread_layout = thread_layout
+        self._slots = InferenceSlots(thread_layout) if thread_layout is not None else None
+        # Without slots predictions are serialised by the model lock; admitting more threads would only park them.
+        self._admission = WorkerAdmission(1)
+
+        if adaptive is None:
+            adaptive = settings.yolo_adaptive_enabled
+        if adaptive is True:
+            adaptive = AdaptiveInferenceController(
+                build_levels(
+                    self.model_path,
+                    settings.yolo_adaptive_input_sizes or [self.input_size],
+                    settings.yolo_adaptive_fallback_model_path,
+                ),
+                latency_budget_ms=settings.yolo_adaptive_latency_budget_ms,
+                queue_high=settings.yolo_adaptive_queue_high,
+                queue_low=settings.yolo_adaptive_queue_low,
+                cooldown_s=settings.yolo_adaptive_cooldown_s,
+            )
+        self.adaptive: AdaptiveInferenceController | None = adaptive or None
 
-    def _load_model(self) -> object:
-        if self._model is None:
+    def _load_model(self, model_path: str | None = None, slot: int = 0) -> object:
+        key = (model_path or self.model_path, slot)
+        model = self._models.get(key)
+        if model is None:
             with self._lock:
-                if self._model is None:
-                    logger.info("Loading YOLO model from {}", self.model_path)
-                    model = self._model_factory(self.model_path)
+                model = self._models.get(key)
+                if model is None:
+                    logger.info("Loading YOLO model from {} for slot {}", key[0], slot)
+                    if self.thread_layout is not None:
+                        set_thread_environment(self.thread_layout)
+                    model = self._model_factory(key[0])
                     if hasattr(model, "to"):
                         model.to(self.device)
-                    self._model = model
-        return self._model
+                    if self.thread_layout is not None:
+                        apply_thread_layout(self.thread_layout)
+                    self._predict_locks[key] = threading.Lock()
+                    self._models[key] = model
+        return model
+
+    def _class_ids(self, model_path: str, model: object, selected: set[str]) -> list[int] | None:
+        """
+        Map lower-cased class names to the model's class ids so the model filters before NMS.
+
+        Returns None when the model does not expose `names`; results are then only filtered afterwards.
+        """
+        if model_path not in self._class_names:
+            names = getattr(model, "names", None)
+            if isinstance(names, (list, tuple)):
+                names = dict(enumerate(names))
+            self._class_names[model_path] = (
+                {str(name).lower(): int(class_id) for class_id, name in names.items()} if names else None
+            )
+        lookup = self._class_names[model_path]
+        if lookup is None:
+            return None
+        return sorted(lookup[name] for name in selected if name in lookup)
+
+    def warm_up(self) -> None:
+        """Load the model of every slot for the current inference level ahead of the first request."""
+        model_path = self._select_level().model_path
+        for slot in range(self.thread_layout.slots if self.thread_layout is not None else 1):
+            self._load_model(model_path, slot)
+
+    async def run_in_slot(self, func: Callable[[], T]) -> T:
+        """Run `func` (which calls `predict_image`) in a worker thread, queueing on the event loop for a slot."""
+        if self._slots is None:
+            return await self._admission.run(func)
+        return await self._slots.run(func)
+
+    def track_request(self) -> AbstractContextManager[None]:
+        """Count a request towards the adaptive queue depth while it is being served."""
+        if self.adaptive is None:
+            return nullcontext()
+        return self.adaptive.track()
+
+    def _select_level(self) -> InferenceLevel:
+        if self.adaptive is None:
+            return InferenceLevel(input_size=self.input_size, model_path=self.model_path)
+        return self.adaptive.select()
 
     def predict_image(
         self,
         image: np.ndarray,
         selected_classes: Iterable[str] | None = None,
+        confidence: float | None = None,
+        roi: RegionOfInterest | None = None,
     ) -> DetectionResponse:
-        model = self._load_model()
-        start = time.perf_counter()
-        results = model.predict(image, conf=self.confidence, verbose=False)  # type: ignore[attr-defined]
-        elapsed_ms = (time.perf_counter() - start) * 1000
-
         selected_original = list({c.strip(): None for c in selected_classes or [] if c.strip()}.keys())
         selected_set = {c.lower() for c in selected_original}
+
+        level = self._select_level()
+        # Class names are the same in every slot's copy, so the first one answers the lookup.
+        class_ids = None
+        if selected_set:
+            class_ids = self._class_ids(level.model_path, self._load_model(level.model_path), selected_set)
+
+        frame, (offset_x, offset_y) = roi.crop(image) if roi is not None else (image, (0, 0))
+        input_size = level.input_size
+        if roi is not None:
+            # Letterboxing would upscale a small crop back to the full input size and save nothing.
+            longest_side = max(frame.shape[:2])
+            input_size = min(input_size, math.ceil(longest_side / _MODEL_STRIDE) * _MODEL_STRIDE)
+
+        elapsed_ms = 0.0
+        if class_ids == []:
+            # None of the selected classes exist in this model, so there is nothing to run inference for.
+            results = []
+        else:
+            options: dict[str, object] = {}
+            if class_ids is not None:
+                options["classes"] = class_ids
+            with self._slots.acquire() if self._slots is not None else nullcontext(0) as slot:
+                model = self._load_model(level.model_path, slot)
+                with self._predict_locks[(level.model_path, slot)]:
+                    # Timed inside the slot: waiting for a free slot is queueing, not model latency.
+                    start = time.perf_counter()
+                    results = model.predict(  # type: ignore[attr-defined]
+                        frame,
+                        conf=self.confidence if confidence is None else confidence,
+                        imgsz=input_size,
+                        verbose=False,
+                        **options,
+                    )
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+            if self.adaptive is not None:
+                self.adaptive.record(level, elapsed_ms)
+
         detections: list[DetectionItem] = []
-        detected_classes: set[str] = set()
 
         if not isinstance(results, (list, tuple)):
             results = [results]
@@ -105,12 +238,11 @@ class YOLOService:
                 if selected_set and class_name.lower() not in selected_set:
                     continue
 
-                detected_classes.add(class_name)
                 bbox = BoundingBox(
-                    x_min=float(xyxy[0]),
-                    y_min=float(xyxy[1]),
-                    x_max=float(xyxy[2]),
-                    y_max=float(xyxy[3]),
+                    x_min=float(xyxy[0]) + offset_x,
+                    y_min=float(xyxy[1]) + offset_y,
+                    x_max=float(xyxy[2]) + offset_x,
+                    y_max=float(xyxy[3]) + offset_y,
                 )
 
                 detections.append(
@@ -123,16 +255,27 @@ class YOLOService:
                     )
                 )
 
+        height, width = int(image.shape[0]), int(image.shape[1])
+        if roi is not None and not roi.is_rectangle and detections:
+            centers = np.array(
+                [((d.bbox.x_min + d.bbox.x_max) / 2, (d.bbox.y_min + d.bbox.y_max) / 2) for d in detections]
+            )
+            inside = roi.contains(centers, width=width, height=height)
+            detections = [detection for detection, keep in zip(detections, inside.tolist()) if keep]
+
         metadata = DetectionMetadata(
-            width=int(image.shape[1]),
-            height=int(image.shape[0]),
+            width=width,
+            height=height,
             channels=int(image.shape[2]) if image.ndim == 3 else 1,
         )
         summary = DetectionSummary(
             total_detections=len(detections),
-            detected_classes=sorted(detected_classes),
+            detected_classes=sorted({detection.class_name for detection in detections}),
             selected_classes=selected_original,
             processing_ms=elapsed_ms,
+            input_size=input_size,
+            model_name=level.model_path,
+            roi=roi.as_list() if roi is not None else None,
         )
 
         payload = DetectionResponsePayload(detections=detections)
@@ -3,7 +3,6 @@ from __future__ import annotations
 import io
 from typing import Final
 
-import cv2
 import numpy as np
 from fastapi import UploadFile
 
@@ -20,7 +19,12 @@ async def read_upload_image(upload: UploadFile) -> np.ndarray:
     if upload.content_type not in SUPPORTED_IMAGE_TYPES:
         raise ValueError(f"Unsupported content type: {upload.content_type}")
 
-    raw_bytes = await upload.read()
+    return decode_image_bytes(await upload.read())
+
+
+def decode_image_bytes(raw_bytes: bytes) -> np.ndarray:
+    import cv2  # deferred: OpenCV is only needed once an image arrives
+
     if not raw_bytes:
         raise ValueError("Uploaded file is empty")
 
@@ -34,6 +38,8 @@ async def read_upload_image(upload: UploadFile) -> np.ndarray:
 
 
 def to_bytes(image: np.ndarray, extension: str = ".jpg") -> bytes:
+    import cv2
+
     success, buffer = cv2.imencode(extension, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
     if not success:
         raise ValueError("Unable to encode image")
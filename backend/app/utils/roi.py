@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+_ROI_FORMAT = "roi must be 'x_min,y_min,x_max,y_max' or 'x1,y1;x2,y2;x3,y3[;...]'"
+
+
+@dataclass(frozen=True)
+class RegionOfInterest:
+    """
+    Normalized region (x and y in [0, 1]) that inference is restricted to.
+
+    The frame is cropped to the region's bounding rectangle before inference. For polygons, detections whose box
+    center falls outside the polygon are dropped afterwards.
+    """
+
+    points: tuple[tuple[float, float], ...]
+
+    @classmethod
+    def rectangle(cls, x_min: float, y_min: float, x_max: float, y_max: float) -> "RegionOfInterest":
+        return cls(((x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)))
+
+    @property
+    def is_rectangle(self) -> bool:
+        if len(self.points) != 4:
+            return False
+        xs = {x for x, _ in self.points}
+        ys = {y for _, y in self.points}
+        corners = {(x, y) for x in xs for y in ys}
+        return len(xs) == 2 and len(ys) == 2 and set(self.points) == corners
+
+    def pixel_bounds(self, width: int, height: int) -> tuple[int, int, int, int]:
+        """Integer `(x_min, y_min, x_max, y_max)` crop covering the region, at least one pixel wide and high."""
+        xs = [x for x, _ in self.points]
+        ys = [y for _, y in self.points]
+        x_min = min(max(math.floor(min(xs) * width), 0), width - 1)
+        y_min = min(max(math.floor(min(ys) * height), 0), height - 1)
+        x_max = max(min(math.ceil(max(xs) * width), width), x_min + 1)
+        y_max = max(min(math.ceil(max(ys) * height), height), y_min + 1)
+        return x_min, y_min, x_max, y_max
+
+    def crop(self, image: np.ndarray) -> tuple[np.ndarray, tuple[int, int]]:
+        """Return the cropped frame and the `(x, y)` offset that maps crop coordinates back to the full frame."""
+        height, width = image.shape[:2]
+        x_min, y_min, x_max, y_max = self.pixel_bounds(width, height)
+        return np.ascontiguousarray(image[y_min:y_max, x_min:x_max]), (x_min, y_min)
+
+    def contains(self, points: np.ndarray, *, width: int, height: int) -> np.ndarray:
+        """Even-odd test of `(N, 2)` pixel coordinates against the polygon; returns a boolean mask."""
+        if len(points) == 0:
+            return np.zeros(0, dtype=bool)
+        polygon = np.asarray(self.points, dtype=float) * [width, height]
+        x = points[:, 0:1]
+        y = points[:, 1:2]
+        x_i, y_i = polygon[:, 0], polygon[:, 1]
+        x_j, y_j = np.roll(x_i, 1), np.roll(y_i, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = (x_j - x_i) * (y - y_i) / (y_j - y_i) + x_i
+        crosses = ((y_i > y) != (y_j > y)) & (x < crossing_x)
+        return np.count_nonzero(crosses, axis=1) % 2 == 1
+
+    def as_list(self) -> list[tuple[float, float]]:
+        return list(self.points)
+
+
+def parse_roi(value: str | None) -> RegionOfInterest | None:
+    """
+    Parse `x_min,y_min,x_max,y_max` (rectangle) or `x1,y1;x2,y2;x3,y3[;...]` (polygon), all normalized to [0, 1].
+    """
+    if not value:
+        return None
+    if ";" not in value:
+        parts = value.split(",")
+        if len(parts) != 4:
+            raise ValueError(_ROI_FORMAT)
+        x_min, y_min, x_max, y_max = _coordinates(parts)
+        if not (x_min < x_max and y_min < y_max):
+            raise ValueError("roi rectangle must have x_min < x_max and y_min < y_max")
+        roi = RegionOfInterest.rectangle(x_min, y_min, x_max, y_max)
+    else:
+        points = []
+        for point in value.split(";"):
+            parts = point.split(",")
+            if len(parts) != 2:
+                raise ValueError(_ROI_FORMAT)
+            x, y = _coordinates(parts)
+            points.append((x, y))
+        roi = RegionOfInterest(tuple(points))
+
+    if not all(0 <= coordinate <= 1 for point in roi.points for coordinate in point):
+        raise ValueError("roi coordinates must be normalized to [0, 1]")
+    if len(roi.points) < 3 or _area(roi.points) == 0:
+        raise ValueError("roi polygon needs at least three points enclosing a non-zero area")
+    return roi
+
+
+def _coordinates(parts: list[str]) -> list[float]:
+    try:
+        return [float(part) for part in parts]
+    except ValueError:
+        raise ValueError(_ROI_FORMAT) from None
+
+
+def _area(points: tuple[tuple[float, float], ...]) -> float:
+    return abs(
+        sum(x_a * y_b - x_b * y_a for (x_a, y_a), (x_b, y_b) in zip(points, points[1:] + points[:1]))
+    ) / 2
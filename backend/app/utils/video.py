@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Final, Iterator, NamedTuple
+
+import numpy as np
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+SUPPORTED_VIDEO_TYPES: Final[set[str]] = {
+    "video/mp4",
+    "video/quicktime",
+    "video/webm",
+    "video/x-matroska",
+    "video/x-msvideo",
+    "video/avi",
+}
+
+DEFAULT_FPS: Final[float] = 30.0
+
+
+class VideoFrame(NamedTuple):
+    index: int
+    offset_s: float
+    fps: float
+    image: np.ndarray
+
+
+async def save_upload_video(upload: UploadFile, directory: Path | None = None) -> Path:
+    """Spool an uploaded video to a temporary file; OpenCV can only decode containers from a path."""
+    if upload.content_type not in SUPPORTED_VIDEO_TYPES:
+        raise ValueError(f"Unsupported content type: {upload.content_type}")
+
+    suffix = Path(upload.filename or "").suffix or ".mp4"
+
+    def spool() -> Path:
+        with tempfile.NamedTemporaryFile(suffix=suffix, dir=directory, delete=False) as handle:
+            shutil.copyfileobj(upload.file, handle)
+            return Path(handle.name)
+
+    path = await run_in_threadpool(spool)
+    if path.stat().st_size == 0:
+        path.unlink(missing_ok=True)
+        raise ValueError("Uploaded file is empty")
+    return path
+
+
+def iter_video_frames(path: Path, *, stride: int = 1, max_frames: int | None = None) -> Iterator[VideoFrame]:
+    """Yield every `stride`-th frame as RGB; skipped frames are grabbed but never decoded."""
+    import cv2  # deferred: OpenCV is only needed once a video arrives
+
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+    fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    stride = max(stride, 1)
+    yielded = 0
+    index = 0
+    try:
+        while max_frames is None or yielded < max_frames:
+            if not capture.grab():
+                break
+            if index % stride == 0:
+                success, frame = capture.retrieve()
+                if not success:
+                    break
+                yield VideoFrame(index, index / fps, fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                yielded += 1
+            index += 1
+    finally:
+        capture.release()
@@ -0,0 +1,342 @@
+"""
+End-to-end load against `POST /detection/image`, including multipart parsing, validation and the event loop.
+
+    python -m benchmarks.loadtest --requests 500 --concurrency 16 --model-latency-ms 20
+    python -m benchmarks.loadtest --images ./samples --rate 50 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:8000 --images ./samples --concurrency 8
+
+Without `--url` the app runs in process behind httpx's ASGI transport, with a fake model that sleeps for
+`--model-latency-ms` and an in-memory repository, so the numbers isolate the web stack. With `--rate` requests
+are sent open-loop and latency is measured from each request's scheduled send time, so a saturated server shows
+up as queueing instead of a lower request rate. Server-side stage timings come from the `Server-Timing` header.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Sequence
+
+import httpx
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.timing import SERVER_TIMING_HEADER, parse_server_timing
+from app.repositories.base import AbstractDetectionRepository, PreviewImage
+from app.schemas.detection import DetectionResponse
+from app.schemas.tracking import TrackSummary
+from app.utils.images import SUPPORTED_IMAGE_TYPES
+
+CLASS_NAMES = ("person", "car", "bicycle", "dog")
+
+
+@dataclass(frozen=True)
+class ImagePayload:
+    name: str
+    content_type: str
+    body: bytes
+
+
+@dataclass
+class Sample:
+    latency_ms: float
+    status: int | None
+    error: str | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and 200 <= self.status < 300
+
+
+class _Boxes:
+    def __init__(self, cls: list[int], conf: list[float], xyxy: list[list[float]]) -> None:
+        self.cls = cls
+        self.conf = conf
+        self.xyxy = xyxy
+
+
+class _Result:
+    def __init__(self, boxes: _Boxes) -> None:
+        self.boxes = boxes
+        self.names = dict(enumerate(CLASS_NAMES))
+
+
+class LatencyModel:
+    """Stand-in for YOLO: blocks its worker thread for `latency_ms` and returns `detections` boxes."""
+
+    names = dict(enumerate(CLASS_NAMES))
+
+    def __init__(self, latency_ms: float, detections: int) -> None:
+        self.latency_s = latency_ms / 1000
+        self.detections = detections
+
+    def predict(self, image: np.ndarray, conf: float, verbose: bool = False, **kwargs: Any) -> list[_Result]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        height, width = image.shape[:2]
+        allowed = kwargs.get("classes")
+        rows = [index % len(CLASS_NAMES) for index in range(self.detections)]
+        rows = [class_id for class_id in rows if allowed is None or class_id in allowed]
+        step = max(width // max(len(rows), 1), 1)
+        boxes = [[float(i * step), 0.0, float(i * step + step), float(height)] for i in range(len(rows))]
+        return [_Result(_Boxes(rows, [0.9] * len(rows), boxes))]
+
+
+class InMemoryRepository(AbstractDetectionRepository):
+    """Keeps only a counter so persistence costs nothing but the await."""
+
+    def __init__(self) -> None:
+        self.persisted = 0
+
+    async def persist(self, response: DetectionResponse, *, source_name: str | None, source_type: str = "upload") -> str:
+        self.persisted += 1
+        return uuid.uuid4().hex
+
+    async def fetch_history(self, *, page: int, page_size: int, class_name=None, filters=None) -> tuple[list[Any], int]:
+        return [], 0
+
+    async def class_frequency(self, *, class_names: Sequence[str] | None = None) -> dict[str, object]:
+        return {"items": [], "total_detections": 0, "total_classes": 0}
+
+    async def iter_export_batches(self, *, batch_size: int, start=None, end=None, class_names=None) -> AsyncIterator:
+        return
+        yield
+
+    async def persist_tracks(
+        self,
+        tracks: Sequence[TrackSummary],
+        *,
+        session_id: str,
+        source_name: str | None,
+        source_type: str = "stream",
+    ) -> None:
+        return None
+
+    async def track_frequency(self, *, class_names: Sequence[str] | None = None) -> dict[str, object]:
+        return {"items": [], "total_tracks": 0, "total_classes": 0}
+
+    async def persist_previews(self, result_id: str, previews: Sequence[PreviewImage]) -> None:
+        return None
+
+    async def fetch_preview(self, result_id: str, kind: str) -> PreviewImage | None:
+        return None
+
+
+def load_images(directory: Path) -> list[ImagePayload]:
+    images = []
+    for path in sorted(directory.iterdir()):
+        content_type = mimetypes.guess_type(path.name)[0]
+        if path.is_file() and content_type in SUPPORTED_IMAGE_TYPES:
+            images.append(ImagePayload(path.name, content_type, path.read_bytes()))
+    if not images:
+        raise SystemExit(f"No supported images in {directory}")
+    return images
+
+
+def synthetic_images(count: int, *, width: int = 1280, height: int = 720, seed: int = 0) -> list[ImagePayload]:
+    """Smooth random JPEGs; pure noise would compress far worse than camera frames."""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    images = []
+    for index in range(count):
+        coarse = rng.integers(0, 256, size=(height // 40, width // 40, 3), dtype=np.uint8)
+        frame = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+        success, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if not success:
+            raise RuntimeError("Unable to encode synthetic image")
+        images.append(ImagePayload(f"synthetic_{index}.jpg", "image/jpeg", buffer.tobytes()))
+    return images
+
+
+def build_app(*, model_latency_ms: float, detections: int) -> tuple[Any, InMemoryRepository]:
+    """The production app with the detection service swapped for a fake model and an in-memory repository."""
+    from app.main import create_app
+    from app.services.detection import DetectionService, get_detection_service
+    from app.services.yolo import YOLOService
+
+    app = create_app()
+    repository = InMemoryRepository()
+    model = LatencyModel(model_latency_ms, detections)
+    service = DetectionService(YOLOService(model_factory=lambda _: model), repository)
+    app.dependency_overrides[get_detection_service] = lambda: service
+    return app, repository
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    path: str,
+    image: ImagePayload,
+    classes: Sequence[str] | None,
+    started: float,
+) -> Sample:
+    try:
+        response = await client.post(
+            path,
+            files={"file": (image.name, image.body, image.content_type)},
+            params={"classes": list(classes)} if classes else None,
+        )
+    except httpx.HTTPError as exc:
+        return Sample((time.perf_counter() - started) * 1000, None, type(exc).__name__)
+    latency_ms = (time.perf_counter() - started) * 1000
+    error = None if response.is_success else f"http_{response.status_code}"
+    return Sample(latency_ms, response.status_code, error, parse_server_timing(response.headers.get(SERVER_TIMING_HEADER)))
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    path: str,
+    images: Sequence[ImagePayload],
+    *,
+    requests: int | None = None,
+    duration_s: float | None = None,
+    concurrency: int = 8,
+    rate: float | None = None,
+    classes: Sequence[str] | None = None,
+) -> tuple[list[Sample], float]:
+    """
+    Send requests until `requests` were issued or `duration_s` elapsed; returns the samples and wall time.
+
+    Closed-loop by default (`concurrency` workers back to back). With `rate`, requests are scheduled open-loop and
+    `concurrency` only caps how many are in flight.
+    """
+    if requests is None and duration_s is None:
+        raise ValueError("Set requests, duration_s or both")
+    start = time.perf_counter()
+    end = start + duration_s if duration_s is not None else float("inf")
+    samples: list[Sample] = []
+
+    def more(issued: int) -> bool:
+        return (requests is None or issued < requests) and time.perf_counter() < end
+
+    if rate is None:
+        issued = 0
+
+        async def worker() -> None:
+            nonlocal issued
+            while more(issued):
+                image = images[issued % len(images)]
+                issued += 1
+                samples.append(await _send(client, path, image, classes, time.perf_counter()))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        in_flight = asyncio.Semaphore(concurrency)
+        tasks: list[asyncio.Task[None]] = []
+
+        async def scheduled(image: ImagePayload, send_at: float) -> None:
+            async with in_flight:
+                samples.append(await _send(client, path, image, classes, send_at))
+
+        index = 0
+        while more(index):
+            send_at = start + index / rate
+            delay = send_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(scheduled(images[index % len(images)], send_at)))
+            index += 1
+        await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+def _percentiles(values: Sequence[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    array = np.asarray(values, dtype=float)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(array.mean()), 2),
+        "max": round(float(array.max()), 2),
+    }
+
+
+def summarize(samples: Sequence[Sample], elapsed_s: float) -> dict[str, Any]:
+    succeeded = [sample for sample in samples if sample.ok]
+    stages: defaultdict[str, list[float]] = defaultdict(list)
+    for sample in succeeded:
+        for stage, duration in sample.stages.items():
+            stages[stage].append(duration)
+    return {
+        "requests": len(samples),
+        "succeeded": len(succeeded),
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(succeeded) / elapsed_s, 2) if elapsed_s else 0.0,
+        "error_rate": round((len(samples) - len(succeeded)) / len(samples), 4) if samples else 0.0,
+        "errors": dict(Counter(sample.error for sample in samples if sample.error)),
+        "latency_ms": _percentiles([sample.latency_ms for sample in succeeded]),
+        "server_timing_ms": {stage: _percentiles(values) for stage, values in stages.items()},
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    images = load_images(args.images) if args.images else synthetic_images(args.synthetic_images)
+    path = f"{args.api_prefix}/detection/image"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+        target = args.url
+    else:
+        app, _ = build_app(model_latency_ms=args.model_latency_ms, detections=args.detections)
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+        target = "in-process"
+
+    async with client:
+        if args.warmup:
+            await run_load(client, path, images, requests=args.warmup, concurrency=1, classes=args.classes)
+        samples, elapsed = await run_load(
+            client,
+            path,
+            images,
+            requests=args.requests,
+            duration_s=args.duration,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            classes=args.classes,
+        )
+    return {
+        "target": target,
+        "mode": "open_loop" if args.rate else "closed_loop",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "images": len(images),
+        "model_latency_ms": None if args.url else args.model_latency_ms,
+        **summarize(samples, elapsed),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server; defaults to the app in process")
+    parser.add_argument("--api-prefix", default=get_settings().api_prefix)
+    parser.add_argument("--images", type=Path, help="Folder of images to replay; defaults to synthetic JPEGs")
+    parser.add_argument("--synthetic-images", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run for")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second, sent open-loop")
+    parser.add_argument("--classes", nargs="*", default=None)
+    parser.add_argument("--warmup", type=int, default=5, help="Sequential requests excluded from the report")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--model-latency-ms", type=float, default=20.0, help="Fake model latency (in process)")
+    parser.add_argument("--detections", type=int, default=10, help="Boxes per image from the fake model")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 200
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Insert and history-query throughput of the detection repository backends.
+
+    python -m benchmarks.repository_throughput --records 2000 --concurrency 32
+    python -m benchmarks.repository_throughput --mongo-url mongodb://localhost:27017
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from app.repositories.base import AbstractDetectionRepository
+from app.repositories.sqlite import SQLiteDetectionRepository
+from app.schemas.detection import DetectionHistoryFilters
+from benchmarks.storage_format import synthetic_response
+
+
+async def _insert(repository: AbstractDetectionRepository, records: int, concurrency: int, detections: int) -> float:
+    responses = [synthetic_response(detections, seed=index) for index in range(min(records, 64))]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            await repository.persist(responses[index % len(responses)], source_name=f"{index}.jpg")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(records)))
+    return records / (time.perf_counter() - start)
+
+
+async def _history(repository: AbstractDetectionRepository, queries: int) -> dict[str, float]:
+    scenarios: dict[str, dict[str, Any]] = {
+        "first_page": {},
+        "class": {"class_name": "person"},
+        "confidence_area": {
+            "class_name": "person",
+            "filters": DetectionHistoryFilters(min_confidence=0.8, min_area=0.001),
+        },
+    }
+    results: dict[str, float] = {}
+    for name, kwargs in scenarios.items():
+        start = time.perf_counter()
+        for _ in range(queries):
+            await repository.fetch_history(page=1, page_size=20, **kwargs)
+        results[f"{name}_qps"] = round(queries / (time.perf_counter() - start), 1)
+    start = time.perf_counter()
+    for _ in range(max(queries // 10, 1)):
+        await repository.class_frequency()
+    results["class_frequency_qps"] = round(max(queries // 10, 1) / (time.perf_counter() - start), 1)
+    return results
+
+
+async def run_backend(
+    name: str,
+    repository: AbstractDetectionRepository,
+    *,
+    records: int,
+    concurrency: int,
+    detections: int,
+    queries: int,
+) -> dict[str, Any]:
+    sequential = await _insert(repository, max(records // 4, 1), 1, detections)
+    concurrent = await _insert(repository, records, concurrency, detections)
+    return {
+        "backend": name,
+        "sequential_inserts_per_s": round(sequential, 1),
+        "concurrent_inserts_per_s": round(concurrent, 1),
+        **await _history(repository, queries),
+    }
+
+
+async def _mongo_repository(url: str) -> tuple[AbstractDetectionRepository, Any, str]:
+    from beanie import init_beanie
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.models.detection import DetectionResultDocument
+    from app.repositories.mongo import MongoDetectionRepository
+
+    client = AsyncIOMotorClient(url)
+    database_name = f"visionflow_bench_{uuid.uuid4().hex[:8]}"
+    await init_beanie(database=client[database_name], document_models=[DetectionResultDocument])
+    return MongoDetectionRepository(), client, database_name
+
+
+async def main_async(args: argparse.Namespace) -> list[dict[str, Any]]:
+    options = {
+        "records": args.records,
+        "concurrency": args.concurrency,
+        "detections": args.detections,
+        "queries": args.queries,
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_repository = SQLiteDetectionRepository(f"sqlite:///{Path(directory) / 'bench.db'}")
+        try:
+            results.append(await run_backend("sqlite", sqlite_repository, **options))
+        finally:
+            sqlite_repository.close()
+
+    if args.mongo_url:
+        mongo_repository, client, database_name = await _mongo_repository(args.mongo_url)
+        try:
+            results.append(await run_backend("mongo", mongo_repository, **options))
+        finally:
+            await client.drop_database(database_name)
+            client.close()
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--detections", type=int, default=8, help="Detections per stored result")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--mongo-url", default=None, help="Also benchmark Mongo at this URL")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
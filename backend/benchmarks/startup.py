@@ -0,0 +1,43 @@
+"""
+Cold-start cost of the API: `python -X importtime` totals for `app.main` and time to the first `/health`.
+
+    python -m benchmarks.startup --runs 5
+
+Every measurement runs in a fresh interpreter with the SQLite backend in a temporary directory, so no Mongo
+server is needed and nothing is written to the working tree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from dataclasses import asdict
+
+from tests.startup_probe import importtime_profile, loaded_heavy_modules, time_to_first_health
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="app.main")
+    args = parser.parse_args(argv)
+
+    profiles = [importtime_profile(args.module) for _ in range(args.runs)]
+    health = [time_to_first_health() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "importtime_total_ms": statistics.median(profile.total_ms for profile in profiles),
+        "importtime_app_ms": statistics.median(profile.module_ms for profile in profiles),
+        "heaviest_packages_ms": asdict(profiles[-1])["packages_ms"],
+        "heavy_modules_loaded": loaded_heavy_modules(args.module),
+        **{
+            f"{key}_median": round(statistics.median(run[key] for run in health), 1)
+            for key in ("import_ms", "startup_ms", "first_request_ms", "time_to_first_health_ms")
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
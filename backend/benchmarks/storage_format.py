@@ -0,0 +1,110 @@
+"""
+Compare BSON size and encode/decode latency of the sub-document and packed detection formats.
+
+    python -m benchmarks.storage_format --detections 1 10 100 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from typing import Any, Callable
+
+import bson
+
+from app.models.packed import PackedDetections, decode_packed
+from app.schemas.detection import (
+    BoundingBox,
+    DetectionItem,
+    DetectionMetadata,
+    DetectionResponse,
+    DetectionResponsePayload,
+    DetectionSummary,
+)
+from app.repositories.base import with_geometry
+
+CLASS_NAMES = ["person", "car", "bicycle", "dog", "truck", "bus", "traffic light", "backpack"]
+
+
+def synthetic_response(count: int, seed: int = 0) -> DetectionResponse:
+    rng = random.Random(seed)
+    detections = []
+    for _ in range(count):
+        class_id = rng.randrange(len(CLASS_NAMES))
+        x, y = rng.uniform(0, 1800), rng.uniform(0, 1000)
+        detections.append(
+            DetectionItem(
+                detection_id=str(uuid.uuid4()),
+                class_id=class_id,
+                class_name=CLASS_NAMES[class_id],
+                confidence=rng.uniform(0.25, 1.0),
+                bbox=BoundingBox(x_min=x, y_min=y, x_max=x + rng.uniform(5, 120), y_max=y + rng.uniform(5, 80)),
+            )
+        )
+    return DetectionResponse(
+        metadata=DetectionMetadata(width=1920, height=1080, channels=3),
+        summary=DetectionSummary(
+            total_detections=count,
+            detected_classes=sorted({item.class_name for item in detections}),
+            selected_classes=[],
+            processing_ms=12.5,
+        ),
+        payload=DetectionResponsePayload(detections=detections),
+    )
+
+
+def _document(response: DetectionResponse, packed: bool) -> dict[str, Any]:
+    document: dict[str, Any] = {
+        "source_name": "frame.jpg",
+        "source_type": "upload",
+        "metadata": response.metadata.model_dump(),
+        "summary": response.summary.model_dump(),
+    }
+    if packed:
+        document["packed"] = PackedDetections.encode(response.payload.detections).model_dump()
+    else:
+        document["payload"] = with_geometry(response).model_dump()
+    return document
+
+
+def _time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def measure(count: int, repeat: int) -> dict[str, Any]:
+    response = synthetic_response(count)
+    results: dict[str, Any] = {"detections": count}
+    for name, packed in (("documents", False), ("packed", True)):
+        encoded = bson.encode(_document(response, packed))
+        if packed:
+            decode = lambda: decode_packed(bson.decode(encoded)["packed"])  # noqa: E731
+        else:
+            decode = lambda: [  # noqa: E731
+                DetectionItem.model_validate(item) for item in bson.decode(encoded)["payload"]["detections"]
+            ]
+        results[name] = {
+            "bson_bytes": len(encoded),
+            "encode_ms": round(_time_ms(lambda: bson.encode(_document(response, packed)), repeat), 4),
+            "decode_ms": round(_time_ms(decode, repeat), 4),
+            "load_without_detections_ms": round(_time_ms(lambda: bson.decode(encoded)["summary"], repeat), 4),
+        }
+    results["size_ratio"] = round(results["packed"]["bson_bytes"] / results["documents"]["bson_bytes"], 3)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detections", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    print(json.dumps([measure(count, args.repeat) for count in args.detections], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Sweep CPU inference layouts (concurrent slots x threads per slot) and record the fastest one.
+
+    python -m benchmarks.threads --requests 64 --concurrency 16
+    python -m benchmarks.threads --model yolo11n.pt --output thread_layout.json
+
+Each layout runs in a fresh interpreter, since OpenMP pools and torch's inter-op setting are fixed once a process
+starts using them. Without `--model` a synthetic OpenCV workload stands in for the network; it parallelises
+through `cv2.setNumThreads` the same way torch does through its intra-op pool. The sweep also includes the
+unmanaged layout (one slot per client, every core per slot) that oversubscribes the machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.core.threads import ThreadLayout, available_cores
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class SyntheticCpuModel:
+    """Blur passes over a letterboxed frame; OpenCV splits each pass across its thread pool."""
+
+    names = {0: "object"}
+
+    def __init__(self, passes: int) -> None:
+        import cv2
+
+        self.cv2 = cv2
+        self.passes = passes
+
+    def predict(self, image: np.ndarray, conf: float, imgsz: int = 640, verbose: bool = False, **kwargs: Any):
+        frame = self.cv2.resize(image, (imgsz, imgsz)).astype(np.float32)
+        for _ in range(self.passes):
+            frame = self.cv2.GaussianBlur(frame, (15, 15), 0)
+        return []
+
+
+def candidate_layouts(cores: int, concurrency: int) -> list[tuple[int, int]]:
+    """Every slot count with the threads that fill the cores, plus the oversubscribed default."""
+    layouts = {(slots, max(cores // slots, 1)) for slots in range(1, cores + 1)}
+    layouts.add((concurrency, cores))
+    return sorted(layouts)
+
+
+def run_layout(
+    slots: int,
+    threads_per_slot: int,
+    *,
+    cores: int,
+    requests: int,
+    concurrency: int,
+    model_path: str | None,
+    passes: int,
+) -> dict[str, Any]:
+    """Body of one sweep point; runs inside the worker interpreter."""
+    from app.services.yolo import YOLOService
+
+    layout = ThreadLayout(cores=cores, processes=1, slots=slots, threads_per_slot=threads_per_slot)
+    factory = None if model_path else (lambda _: SyntheticCpuModel(passes))
+    service = YOLOService(model_path=model_path, model_factory=factory, adaptive=False, thread_layout=layout)
+    image = np.random.default_rng(0).integers(0, 256, size=(720, 1280, 3), dtype=np.uint8)
+    service.predict_image(image)
+
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def one(_: int) -> None:
+        start = time.perf_counter()
+        service.predict_image(image)
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "slots": slots,
+        "threads_per_slot": threads_per_slot,
+        "threads": slots * threads_per_slot,
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def _spawn(slots: int, threads_per_slot: int, args: argparse.Namespace, cores: int) -> dict[str, Any]:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.threads",
+        "--worker",
+        f"--slots={slots}",
+        f"--threads-per-slot={threads_per_slot}",
+        f"--cores={cores}",
+        f"--requests={args.requests}",
+        f"--concurrency={args.concurrency}",
+        f"--passes={args.passes}",
+    ]
+    if args.model:
+        command.append(f"--model={args.model}")
+    result = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="YOLO weights; defaults to the synthetic OpenCV workload")
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=None, help="Client threads; defaults to 2x cores")
+    parser.add_argument("--passes", type=int, default=6, help="Blur passes per synthetic prediction")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the report to this JSON file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--slots", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--threads-per-slot", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--cores", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_layout(
+            args.slots,
+            args.threads_per_slot,
+            cores=args.cores,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            model_path=args.model,
+            passes=args.passes,
+        )
+        print(json.dumps(result))
+        return
+
+    cores = available_cores()
+    args.concurrency = args.concurrency or 2 * cores
+    results = [_spawn(slots, threads, args, cores) for slots, threads in candidate_layouts(cores, args.concurrency)]
+    managed = [result for result in results if result["threads"] <= cores] or results
+    best = max(managed, key=lambda result: (result["throughput_rps"], -result["latency_ms_p95"]))
+    report = {
+        "cores": cores,
+        "concurrency": args.concurrency,
+        "workload": args.model or "synthetic",
+        "layouts": results,
+        "best": best,
+        "environment": {
+            "YOLO_INFERENCE_SLOTS": best["slots"],
+            "YOLO_THREADS_PER_SLOT": best["threads_per_slot"],
+        },
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core.metrics import metrics
+from tests.test_detection_services import DummyModel, HistoryRepository
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingModel(DummyModel):
+    """Counts `predict` calls, optionally taking `delay_s` per call; `finished` is set after the first."""
+
+    def __init__(self, delay_s: float = 0.0) -> None:
+        super().__init__()
+        self.delay_s = delay_s
+        self.calls = 0
+        self.finished = threading.Event()
+
+    def predict(self, image, conf, verbose=False, **kwargs):
+        self.calls += 1
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        self.finished.set()
+        return [self.result]
+
+
+class CountingRepository(HistoryRepository):
+    """Counts the history and analytics queries that reach storage."""
+
+    def __init__(self) -> None:
+        super().__init__([], [{"_id": "car", "detections": 1, "last_seen": datetime(2024, 1, 1)}])
+        self.queries = 0
+
+    async def fetch_history(self, **kwargs):
+        self.queries += 1
+        return await super().fetch_history(**kwargs)
+
+    async def class_frequency(self, *, class_names=None):
+        self.queries += 1
+        return await super().class_frequency(class_names=class_names)
+
+    async def track_frequency(self, *, class_names=None):
+        self.queries += 1
+        return {"items": [], "total_tracks": 0, "total_classes": 0}
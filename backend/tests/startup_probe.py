@@ -0,0 +1,122 @@
+"""
+Fresh-interpreter probes of the API's cold start, shared by the startup tests and `benchmarks.startup`.
+
+Every probe runs with the SQLite backend in a temporary directory, so no Mongo server is needed and nothing is
+written to the working tree.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Modules that must not be loaded by `import app.main`; each is imported on first use instead.
+HEAVY_MODULES = ("ultralytics", "torch", "cv2", "beanie", "motor", "pymongo", "sqlalchemy", "pyarrow")
+
+_HEALTH_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from starlette.testclient import TestClient
+client_loaded = time.perf_counter()
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    status = client.get("/health").status_code
+    answered = time.perf_counter()
+print(json.dumps({
+    "status": status,
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - client_loaded) * 1000,
+    "first_request_ms": (answered - started) * 1000,
+    "time_to_first_health_ms": (imported - start + answered - client_loaded) * 1000,
+}))
+"""
+
+_LOADED_PROBE = """
+import json, sys
+import {module}
+print(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+"""
+
+
+@dataclass
+class ImportProfile:
+    total_ms: float
+    module_ms: float
+    packages_ms: dict[str, float] = field(default_factory=dict)
+
+
+def probe_environment(workdir: Path) -> dict[str, str]:
+    env = {key: value for key, value in os.environ.items() if not key.startswith("PYTHON")}
+    env.update(
+        PYTHONPATH=str(BACKEND_DIR),
+        PYTHONDONTWRITEBYTECODE="1",
+        DETECTION_REPOSITORY_BACKEND="sqlite",
+        SQLITE_REPOSITORY_URL=f"sqlite:///{workdir / 'visionflow.db'}",
+        MODELS_DIR=str(workdir / "models"),
+        UPLOADS_DIR=str(workdir / "uploads"),
+    )
+    return env
+
+
+def run_python(code: str, workdir: Path, *flags: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=workdir,
+        env=probe_environment(workdir),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(output: str, module: str = "app.main") -> ImportProfile:
+    """Sum top-level cumulative import time, the cost of `module` and self time per root package."""
+    total_us = 0
+    module_us = 0
+    packages: defaultdict[str, int] = defaultdict(int)
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        package = name.strip()
+        packages[package.split(".")[0]] += int(self_us)
+        # Nesting is rendered as two spaces per level after the separator's own space.
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+            if package == module:
+                module_us += int(cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]
+    return ImportProfile(
+        total_ms=round(total_us / 1000, 1),
+        module_ms=round(module_us / 1000, 1),
+        packages_ms={name: round(value / 1000, 1) for name, value in heaviest},
+    )
+
+
+def importtime_profile(module: str = "app.main") -> ImportProfile:
+    with tempfile.TemporaryDirectory() as directory:
+        result = run_python(f"import {module}", Path(directory), "-X", "importtime")
+    return parse_importtime(result.stderr, module)
+
+
+def loaded_heavy_modules(module: str = "app.main") -> list[str]:
+    with tempfile.TemporaryDirectory() as directory:
+        result = run_python(_LOADED_PROBE.format(module=module, heavy=HEAVY_MODULES), Path(directory))
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_health() -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        result = run_python(_HEALTH_PROBE, Path(directory))
+    return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+
+import numpy as np
+import pytest
+
+from app.services.adaptive import AdaptiveInferenceController, InferenceLevel, build_levels
+from app.services.yolo import YOLOService
+from tests.test_detection_services import DummyModel, random_image
+
+FULL_SIZE_SERVICE_MS = 40.0
+INTERARRIVAL_MS = 30.0
+LATENCY_BUDGET_MS = 300.0
+
+
+class SizedDummyModel(DummyModel):
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.sizes: list[int] = []
+
+    def predict(self, image: np.ndarray, conf: float, verbose: bool = False, **kwargs):
+        self.sizes.append(kwargs["imgsz"])
+        return [self.result]
+
+
+def service_time_ms(level: InferenceLevel) -> float:
+    cost = FULL_SIZE_SERVICE_MS * (level.input_size / 640) ** 2
+    return cost * (0.5 if level.model_path == "small.pt" else 1.0)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def simulate(adaptive: bool, requests: int = 3000) -> tuple[list[float], list[InferenceLevel]]:
+    """Single inference slot fed faster than it can serve full-size frames, on a virtual clock."""
+    now = [0.0]
+    levels = build_levels("main.pt", [640, 480, 320], "small.pt")
+    controller = AdaptiveInferenceController(
+        levels if adaptive else levels[:1],
+        latency_budget_ms=LATENCY_BUDGET_MS,
+        queue_high=4,
+        queue_low=1,
+        cooldown_s=0.5,
+        clock=lambda: now[0] / 1000,
+    )
+    arrivals = [index * INTERARRIVAL_MS for index in range(requests)]
+    waiting: deque[tuple[float, object]] = deque()
+    in_service: tuple[float, float, InferenceLevel, object] | None = None
+    latencies: list[float] = []
+    used: list[InferenceLevel] = []
+    next_arrival = 0
+
+    while next_arrival < requests or waiting or in_service:
+        arrival_at = arrivals[next_arrival] if next_arrival < requests else math.inf
+        done_at = in_service[1] if in_service else math.inf
+        if arrival_at <= done_at:
+            now[0] = arrival_at
+            tracker = controller.track()
+            tracker.__enter__()
+            waiting.append((arrival_at, tracker))
+            next_arrival += 1
+        else:
+            now[0] = done_at
+            arrived_at, _, level, tracker = in_service
+            controller.record(level, service_time_ms(level))
+            tracker.__exit__(None, None, None)
+            latencies.append(now[0] - arrived_at)
+            in_service = None
+
+        if in_service is None and waiting:
+            arrived_at, tracker = waiting.popleft()
+            level = controller.select()
+            used.append(level)
+            in_service = (arrived_at, now[0] + service_time_ms(level), level, tracker)
+
+    return latencies, used
+
+
+def test_build_levels_orders_sizes_and_appends_fallback_model() -> None:
+    levels = build_levels("main.pt", [320, 640, 480], "small.pt")
+
+    assert [(level.input_size, level.model_path) for level in levels] == [
+        (640, "main.pt"),
+        (480, "main.pt"),
+        (320, "main.pt"),
+        (320, "small.pt"),
+    ]
+
+
+def test_simulated_overload_keeps_p99_within_budget() -> None:
+    static_latencies, _ = simulate(adaptive=False)
+    adaptive_latencies, used = simulate(adaptive=True)
+
+    assert percentile(static_latencies, 0.99) > LATENCY_BUDGET_MS * 10
+    assert percentile(adaptive_latencies, 0.99) <= LATENCY_BUDGET_MS
+    assert {level.input_size for level in used} > {640}
+    switches = sum(1 for previous, current in zip(used, used[1:]) if previous != current)
+    assert switches < 20
+
+
+def test_controller_steps_back_up_after_load_drops() -> None:
+    now = [0.0]
+    levels = build_levels("main.pt", [640, 320])
+    controller = AdaptiveInferenceController(
+        levels,
+        latency_budget_ms=100,
+        queue_high=2,
+        recover_after=3,
+        cooldown_s=1.0,
+        clock=lambda: now[0],
+    )
+    with controller.track(), controller.track():
+        assert controller.select() == levels[1]
+
+    controller.record(levels[1], 10.0)
+    assert controller.select() == levels[1]  # still inside the cooldown window
+
+    now[0] = 5.0
+    selected = [controller.select() for _ in range(3)]
+    assert selected == [levels[1], levels[1], levels[0]]
+
+
+def test_controller_steps_back_up_after_latency_driven_step_down() -> None:
+    now = [0.0]
+    levels = build_levels("main.pt", [640, 320])
+    controller = AdaptiveInferenceController(
+        levels,
+        latency_budget_ms=500,
+        recover_after=3,
+        cooldown_s=1.0,
+        probe_s=30.0,
+        clock=lambda: now[0],
+    )
+    controller.record(levels[0], 600.0)
+    assert controller.select() == levels[1]
+
+    for step in range(1, 60):
+        now[0] = step
+        controller.record(levels[1], 20.0)
+        if controller.select() == levels[0]:
+            break
+
+    # The overloaded 640 measurement blocks recovery until it is older than one probe window.
+    assert controller.level == levels[0]
+    assert 30 < now[0] < 40
+
+
+def test_failed_recovery_backs_off_before_the_next_step_up() -> None:
+    now = [0.0]
+    levels = build_levels("main.pt", [640, 320])
+    controller = AdaptiveInferenceController(
+        levels,
+        latency_budget_ms=100,
+        queue_high=2,
+        recover_after=2,
+        cooldown_s=1.0,
+        probe_s=30.0,
+        clock=lambda: now[0],
+    )
+
+    def select_under_load() -> InferenceLevel:
+        with controller.track(), controller.track():
+            return controller.select()
+
+    assert select_under_load() == levels[1]
+
+    now[0] = 2.0
+    controller.record(levels[1], 5.0)
+    assert [controller.select(), controller.select()] == [levels[1], levels[0]]
+
+    now[0] = 4.0
+    assert select_under_load() == levels[1]
+
+    now[0] = 6.0
+    controller.record(levels[1], 5.0)
+    assert [controller.select() for _ in range(4)] == [levels[1]] * 3 + [levels[0]]
+
+
+def test_yolo_service_reports_level_used_in_summary() -> None:
+    models: dict[str, SizedDummyModel] = {}
+
+    def factory(path: str) -> SizedDummyModel:
+        models[path] = SizedDummyModel(path)
+        return models[path]
+
+    levels = build_levels("main.pt", [640, 320], "small.pt")
+    controller = AdaptiveInferenceController(levels, latency_budget_ms=100, cooldown_s=0)
+    service = YOLOService(model_path="main.pt", model_factory=factory, adaptive=controller)
+
+    assert service.predict_image(random_image()).summary.input_size == 640
+    controller._index = 2
+
+    response = service.predict_image(random_image())
+
+    assert response.summary.input_size == 320
+    assert response.summary.model_name == "small.pt"
+    assert models["small.pt"].sizes == [320]
+
+
+def test_yolo_service_without_adaptation_uses_configured_input_size() -> None:
+    model = SizedDummyModel("main.pt")
+    service = YOLOService(model_path="main.pt", model_factory=lambda _: model, input_size=512, adaptive=False)
+
+    response = service.predict_image(random_image())
+
+    assert model.sizes == [512]
+    assert response.summary.input_size == 512
+    assert response.summary.model_name == "main.pt"
+    with service.track_request():
+        pass
+
+
+@pytest.mark.parametrize("low,high", [(2, 2), (3, 1)])
+def test_controller_rejects_inverted_queue_thresholds(low: int, high: int) -> None:
+    with pytest.raises(ValueError):
+        AdaptiveInferenceController(build_levels("main.pt", [640]), latency_budget_ms=1, queue_low=low, queue_high=high)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.api.deps import ClientDisconnectedError, cancel_on_disconnect
+from app.core.deadline import Deadline, DeadlineExceededError
+from app.core.metrics import metrics
+from app.core.threads import ThreadLayout
+from app.services.detection import DetectionService
+from app.services.yolo import YOLOService
+from tests.conftest import CountingModel
+from tests.test_detection_services import InMemoryRepository, random_image
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after_s: float | None) -> None:
+        self.disconnect_after_s = disconnect_after_s
+
+    async def receive(self) -> dict:
+        if self.disconnect_after_s is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.disconnect_after_s)
+        return {"type": "http.disconnect"}
+
+
+def build(
+    delay_s: float = 0.0,
+    thread_layout: ThreadLayout | None = None,
+) -> tuple[DetectionService, CountingModel, InMemoryRepository]:
+    model = CountingModel(delay_s)
+    repository = InMemoryRepository()
+    yolo = YOLOService(model_factory=lambda _: model, adaptive=False, thread_layout=thread_layout)
+    return DetectionService(yolo, repository=repository), model, repository
+
+
+def test_deadline_reports_remaining_time() -> None:
+    deadline = Deadline.after(10)
+
+    assert 9 < deadline.remaining() <= 10
+    assert not deadline.expired
+    with pytest.raises(DeadlineExceededError, match="before inference"):
+        Deadline.after(-1).check("inference")
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_is_dropped_before_inference() -> None:
+    service, model, repository = build()
+
+    with pytest.raises(DeadlineExceededError):
+        await service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(-0.1))
+
+    assert model.calls == 0
+    assert repository.saved == []
+    assert metrics.get("detection.requests_dropped") == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_reached_during_inference_skips_persist() -> None:
+    service, model, repository = build(delay_s=0.2)
+
+    with pytest.raises(DeadlineExceededError):
+        await service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(0.05))
+
+    assert model.calls == 1
+    assert repository.saved == []
+    assert metrics.get("detection.requests_cancelled") == 1
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_abandons_in_flight_detection() -> None:
+    service, model, repository = build(delay_s=0.2)
+
+    with pytest.raises(ClientDisconnectedError):
+        await cancel_on_disconnect(
+            FakeRequest(disconnect_after_s=0.02),
+            service.run_detection(random_image(), selected_classes=None),
+        )
+    await asyncio.to_thread(model.finished.wait, 1)
+
+    assert repository.saved == []
+    assert metrics.get("detection.requests_cancelled") == 1
+    assert metrics.get("detection.requests_completed") == 0
+
+
+@pytest.mark.asyncio
+async def test_connected_client_receives_result() -> None:
+    service, _, repository = build()
+
+    response = await cancel_on_disconnect(
+        FakeRequest(disconnect_after_s=None),
+        service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(5)),
+    )
+
+    assert response.summary.total_detections == 2
+    assert len(repository.saved) == 1
+    assert metrics.get("detection.requests_completed") == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_expiring_or_cancelled_while_queued_never_reach_the_model() -> None:
+    layout = ThreadLayout(cores=1, processes=1, slots=1, threads_per_slot=1)
+    service, model, repository = build(delay_s=0.2, thread_layout=layout)
+
+    expiring = [
+        service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(0.3)) for _ in range(6)
+    ]
+    outcomes = await asyncio.gather(*expiring, return_exceptions=True)
+    disconnected = asyncio.create_task(service.run_detection(random_image(), selected_classes=None))
+    await asyncio.sleep(0.05)
+    disconnected.cancel()
+    await asyncio.sleep(0.4)
+
+    # The first request finishes; the second gets the slot in time to start but expires during inference.
+    assert sum(isinstance(outcome, DeadlineExceededError) for outcome in outcomes) == 5
+    assert disconnected.cancelled()
+    assert model.calls == 2
+    assert len(repository.saved) == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_predictions_are_bounded_without_inference_slots() -> None:
+    model = CountingModel(0.2)
+    yolo = YOLOService(model_factory=lambda _: model, device="cuda:0", adaptive=False)
+    service = DetectionService(yolo, repository=InMemoryRepository())
+
+    expiring = [
+        service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(0.05)) for _ in range(5)
+    ]
+    outcomes = await asyncio.gather(*expiring, return_exceptions=True)
+    await asyncio.sleep(0.3)
+
+    assert all(isinstance(outcome, DeadlineExceededError) for outcome in outcomes)
+    # Only the first request reached a worker thread; the others expired waiting for it on the event loop.
+    assert model.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_tracking_frames_hold_an_inference_slot() -> None:
+    layout = ThreadLayout(cores=1, processes=1, slots=1, threads_per_slot=1)
+    service, model, _ = build(delay_s=0.2, thread_layout=layout)
+    session = service.open_tracking_session()
+
+    frame = asyncio.create_task(session.process(random_image()))
+    await asyncio.sleep(0.02)
+    with pytest.raises(DeadlineExceededError):
+        await service.run_detection(random_image(), selected_classes=None, deadline=Deadline.after(0.1))
+    await frame
+    await asyncio.sleep(0.1)
+
+    # The detection queued behind the tracking frame on the event loop and expired there.
+    assert model.calls == 1
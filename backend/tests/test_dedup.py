@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.services.dedup import NearDuplicateCache, dhash, hamming
+from app.services import detection
+from app.services.detection import DetectionService
+from app.services.yolo import YOLOService
+from app.utils.roi import parse_roi
+from tests.conftest import CountingModel, FakeClock
+from tests.test_detection_services import InMemoryRepository
+
+
+def scene(seed: int = 0) -> np.ndarray:
+    coarse = np.random.default_rng(seed).integers(0, 256, size=(12, 16, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (640, 480), interpolation=cv2.INTER_CUBIC)
+
+
+def jpeg_roundtrip(image: np.ndarray, quality: int) -> np.ndarray:
+    encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def build(clock: FakeClock | None = None) -> tuple[DetectionService, CountingModel, InMemoryRepository]:
+    model = CountingModel()
+    repository = InMemoryRepository()
+    cache = NearDuplicateCache(threshold=4, max_age_s=10, clock=clock or FakeClock())
+    yolo = YOLOService(model_factory=lambda _: model, adaptive=False)
+    return DetectionService(yolo, repository, near_duplicates=cache), model, repository
+
+
+def test_dhash_ignores_jpeg_noise_but_not_scene_changes() -> None:
+    original = scene()
+    noise = np.random.default_rng(1).integers(-3, 4, original.shape)
+    noisy = np.clip(jpeg_roundtrip(original, 60).astype(int) + noise, 0, 255).astype(np.uint8)
+
+    assert hamming(dhash(original), dhash(noisy)) <= 4
+    assert hamming(dhash(original), dhash(scene(seed=2))) > 16
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_frames_reuse_detections_per_source() -> None:
+    service, model, repository = build()
+    first = await service.run_detection(scene(), selected_classes=None, source_id="cam-1")
+    second = await service.run_detection(jpeg_roundtrip(scene(), 70), selected_classes=None, source_id="cam-1")
+    other_source = await service.run_detection(scene(), selected_classes=None, source_id="cam-2")
+
+    assert model.calls == 2
+    assert not first.summary.reused and not other_source.summary.reused
+    assert second.summary.reused and second.summary.processing_ms == 0
+    assert [d.class_name for d in second.payload.detections] == [d.class_name for d in first.payload.detections]
+    first_ids = {d.detection_id for d in first.payload.detections}
+    assert first_ids.isdisjoint(d.detection_id for d in second.payload.detections)
+    assert len(repository.saved) == 3
+    assert metrics.get("detection.dedup_hits") == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_frames_classes_roi_and_stale_entries_run_inference() -> None:
+    clock = FakeClock()
+    service, model, _ = build(clock)
+
+    await service.run_detection(scene(), selected_classes=None, source_id="cam")
+    await service.run_detection(scene(seed=3), selected_classes=None, source_id="cam")
+    await service.run_detection(scene(seed=3), selected_classes=["car"], source_id="cam")
+    await service.run_detection(scene(seed=3), selected_classes=None, source_id="cam", roi=parse_roi("0,0,0.5,0.5"))
+    assert model.calls == 4
+
+    clock.now = 11
+    stale = await service.run_detection(scene(seed=3), selected_classes=None, source_id="cam")
+
+    assert model.calls == 5 and not stale.summary.reused
+    assert metrics.get("detection.dedup_stale") == 1
+
+
+@pytest.mark.asyncio
+async def test_roi_reuse_ignores_motion_outside_the_region() -> None:
+    service, model, _ = build()
+    roi = parse_roi("0,0,0.5,0.5")
+    moved = scene()
+    moved[300:, 400:] = 255 - moved[300:, 400:]
+
+    await service.run_detection(scene(), selected_classes=None, source_id="cam", roi=roi)
+    reused = await service.run_detection(moved, selected_classes=None, source_id="cam", roi=roi)
+
+    assert model.calls == 1 and reused.summary.reused
+
+
+@pytest.mark.asyncio
+async def test_same_scene_at_another_resolution_runs_inference() -> None:
+    service, model, _ = build()
+
+    await service.run_detection(scene(), selected_classes=None, source_id="cam")
+    larger = await service.run_detection(
+        cv2.resize(scene(), (1280, 960), interpolation=cv2.INTER_CUBIC), selected_classes=None, source_id="cam"
+    )
+    again = await service.run_detection(scene(), selected_classes=None, source_id="cam")
+
+    assert model.calls == 2
+    assert not larger.summary.reused
+    assert (larger.metadata.width, larger.metadata.height) == (1280, 960)
+    assert again.summary.reused and (again.metadata.width, again.metadata.height) == (640, 480)
+
+
+@pytest.mark.asyncio
+async def test_uploads_without_source_id_never_share_results() -> None:
+    service, model, _ = build()
+
+    first = await service.run_detection(scene(), selected_classes=None, source_name="image.jpg")
+    second = await service.run_detection(scene(), selected_classes=None, source_name="image.jpg")
+
+    assert model.calls == 2
+    assert not first.summary.reused and not second.summary.reused
+    assert metrics.get("detection.dedup_hits") == 0
+
+
+@pytest.mark.asyncio
+async def test_near_duplicates_false_disables_reuse_despite_settings(monkeypatch) -> None:
+    monkeypatch.setattr(detection, "get_settings", lambda: Settings(detection_dedup_enabled=True))
+    model = CountingModel()
+    yolo = YOLOService(model_factory=lambda _: model, adaptive=False)
+
+    enabled = DetectionService(yolo, InMemoryRepository())
+    disabled = DetectionService(yolo, InMemoryRepository(), near_duplicates=False)
+    for service in (enabled, disabled):
+        for _ in range(2):
+            await service.run_detection(scene(), selected_classes=None, source_id="cam")
+
+    assert model.calls == 3
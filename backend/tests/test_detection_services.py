@@ -34,7 +34,7 @@ class DummyModel:
     def to(self, device: str) -> None:  # pragma: no cover - trivial setter
         self.device = device
 
-    def predict(self, image: np.ndarray, conf: float, verbose: bool = False):
+    def predict(self, image: np.ndarray, conf: float, verbose: bool = False, **kwargs):
         return [self.result]
 
 
@@ -65,6 +65,7 @@ class HistoryRepository(InMemoryRepository):
         page: int,
         page_size: int,
         class_name: str | None = None,
+        filters=None,
     ):
         return self.history_docs, len(self.history_docs)
 
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.repositories.mongo import build_export_query
+from app.services.detection import DetectionService
+from app.services.export import ExportFormat, flatten_detections
+from tests.test_detection_services import InMemoryRepository, build_service
+
+
+def raw_document(index: int, created_at: datetime) -> dict:
+    return {
+        "_id": f"result-{index}",
+        "created_at": created_at,
+        "source_name": f"frame-{index}.jpg",
+        "payload": {
+            "detections": [
+                {
+                    "detection_id": f"{index}-a",
+                    "class_id": 0,
+                    "class_name": "person",
+                    "confidence": 0.9,
+                    "bbox": {"x_min": 1, "y_min": 2, "x_max": 3, "y_max": 4},
+                },
+                {
+                    "detection_id": f"{index}-b",
+                    "class_id": 2,
+                    "class_name": "car",
+                    "confidence": 0.5,
+                    "bbox": {"x_min": 5, "y_min": 6, "x_max": 7, "y_max": 8},
+                },
+            ]
+        },
+    }
+
+
+class ExportRepository(InMemoryRepository):
+    def __init__(self, documents: list[dict]) -> None:
+        super().__init__()
+        self.documents = documents
+        self.calls: list[dict] = []
+
+    async def iter_export_batches(self, *, batch_size, start=None, end=None, class_names=None):
+        self.calls.append({"batch_size": batch_size, "start": start, "end": end, "class_names": class_names})
+        for offset in range(0, len(self.documents), batch_size):
+            yield self.documents[offset : offset + batch_size]
+
+
+def build_export_service(count: int = 5) -> tuple[DetectionService, ExportRepository]:
+    now = datetime(2024, 11, 1, 12, 0, 0)
+    documents = [raw_document(index, now + timedelta(seconds=index)) for index in range(count)]
+    repository = ExportRepository(documents)
+    return DetectionService(build_service(), repository=repository), repository
+
+
+async def collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+def test_flatten_detections_emits_one_row_per_detection() -> None:
+    rows = flatten_detections([raw_document(1, datetime.utcnow())], class_names=["car"])
+
+    assert len(rows) == 1
+    assert rows[0]["result_id"] == "result-1"
+    assert rows[0]["class_name"] == "car"
+    assert rows[0]["x_max"] == 7.0
+
+
+def test_build_export_query_pushes_filters_down() -> None:
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 2, 1)
+
+    query = build_export_query(start=start, end=end, class_names=["person", "car", "person"])
+
+    assert query == {
+        "created_at": {"$gte": start, "$lt": end},
+        "summary.detected_classes": {"$in": ["car", "person"]},
+    }
+    assert build_export_query() == {}
+
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_chunk_per_batch() -> None:
+    service, repository = build_export_service(count=5)
+
+    chunks = [
+        chunk async for chunk in service.export_history(ExportFormat.CSV, class_names=["person"], batch_size=2)
+    ]
+
+    assert len(chunks) == 3
+    assert repository.calls[0]["class_names"] == ["person"]
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 5
+    assert {row["class_name"] for row in rows} == {"person"}
+
+
+@pytest.mark.asyncio
+async def test_arrow_and_parquet_exports_round_trip() -> None:
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    service, _ = build_export_service(count=4)
+
+    arrow_bytes = await collect(service.export_history(ExportFormat.ARROW, batch_size=3))
+    table = pa.ipc.open_stream(arrow_bytes).read_all()
+    assert table.num_rows == 8
+    assert table.column_names[:3] == ["result_id", "created_at", "source_name"]
+
+    parquet_bytes = await collect(service.export_history(ExportFormat.PARQUET, batch_size=3))
+    parquet_file = pq.ParquetFile(io.BytesIO(parquet_bytes))
+    assert parquet_file.metadata.num_rows == 8
+    assert parquet_file.metadata.num_row_groups == 2
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.detection import DetectionResultDocument
+from app.schemas.detection import BoundingBox, DetectionGeometry, DetectionHistoryFilters
+from app.repositories.base import with_geometry
+from app.repositories.mongo import build_history_query
+from tests.test_detection_services import build_service, random_image
+
+MONGO_TEST_URL = os.getenv("VISIONFLOW_TEST_MONGO_URL")
+
+
+def geometric_filters() -> DetectionHistoryFilters:
+    return DetectionHistoryFilters(
+        min_confidence=0.8,
+        min_area=0.05,
+        region=(0.0, 0.0, 0.5, 1.0),
+        start=datetime.utcnow() - timedelta(hours=24),
+    )
+
+
+def index_keys() -> list[list[str]]:
+    return [list(index.document["key"].keys()) for index in DetectionResultDocument.Settings.indexes]
+
+
+def test_geometry_is_normalized_to_frame() -> None:
+    bbox = BoundingBox(x_min=0, y_min=0, x_max=50, y_max=100)
+
+    geometry = DetectionGeometry.from_bbox(bbox, width=200, height=100)
+
+    assert geometry.area == pytest.approx(0.25)
+    assert geometry.center_x == pytest.approx(0.125)
+    assert geometry.center_y == pytest.approx(0.5)
+    assert geometry.aspect_ratio == pytest.approx(0.5)
+
+
+def test_with_geometry_precomputes_fields_for_every_detection() -> None:
+    response = build_service().predict_image(random_image())
+
+    payload = with_geometry(response)
+
+    assert all(detection.geometry is not None for detection in payload.detections)
+    assert payload.detections[0].geometry.area == pytest.approx(100 * 200 / (256 * 256))
+    assert all(detection.geometry is None for detection in response.payload.detections)
+
+
+def test_history_query_matches_predicates_on_a_single_detection() -> None:
+    filters = geometric_filters()
+
+    query = build_history_query(class_name="person", filters=filters)
+
+    assert query["created_at"] == {"$gte": filters.start}
+    assert query["payload.detections"] == {
+        "$elemMatch": {
+            "class_name": "person",
+            "confidence": {"$gte": 0.8},
+            "geometry.area": {"$gte": 0.05},
+            "geometry.center_x": {"$gte": 0.0, "$lte": 0.5},
+            "geometry.center_y": {"$gte": 0.0, "$lte": 1.0},
+        }
+    }
+
+
+def test_history_query_without_predicates_keeps_plain_class_filter() -> None:
+    assert build_history_query(class_name="car") == {"summary.detected_classes": "car"}
+
+
+@pytest.mark.parametrize("class_name", ["person", None])
+def test_history_queries_have_an_index_on_their_leading_predicate(class_name: str | None) -> None:
+    query = build_history_query(class_name=class_name, filters=geometric_filters())
+    element = query["payload.detections"]["$elemMatch"]
+    predicate_fields = {f"payload.detections.{field}" for field in element}
+
+    leading = {keys[0] for keys in index_keys()}
+    assert predicate_fields & leading
+    assert any(set(keys[:2]) <= predicate_fields for keys in index_keys())
+
+
+def _plan_stages(plan: dict) -> set[str]:
+    stages = {plan["stage"]} if "stage" in plan else set()
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages |= _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages |= _plan_stages(child)
+    return stages
+
+
+def _plan_index_names(plan: dict) -> set[str]:
+    names = {plan["indexName"]} if plan.get("stage") == "IXSCAN" else set()
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            names |= _plan_index_names(plan[key])
+    for child in plan.get("inputStages", []):
+        names |= _plan_index_names(child)
+    return names
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not MONGO_TEST_URL, reason="set VISIONFLOW_TEST_MONGO_URL to run explain-plan checks")
+async def test_history_queries_are_index_backed() -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(MONGO_TEST_URL)
+    collection = client["visionflow_test"][f"detection_results_{uuid.uuid4().hex}"]
+    try:
+        await collection.create_indexes(list(DetectionResultDocument.Settings.indexes))
+        response = build_service().predict_image(random_image())
+        payload = with_geometry(response).model_dump()
+        # Only one result in twenty matches, so the compound detection index is clearly more selective than
+        # `created_at` and has to win the plan for the sort-only index not to.
+        unmatched = {
+            "detections": [{**detection, "confidence": 0.3} for detection in payload["detections"]],
+        }
+        documents = [
+            {
+                "created_at": datetime.utcnow() - timedelta(minutes=index),
+                "summary": response.summary.model_dump(),
+                "payload": payload if index % 20 == 0 else unmatched,
+            }
+            for index in range(200)
+        ]
+        await collection.insert_many(documents)
+
+        expected = {"person": "detection_class_confidence_area", None: "detection_confidence_area"}
+        for class_name, index_name in expected.items():
+            query = build_history_query(class_name=class_name, filters=geometric_filters())
+            explain = await collection.find(query).sort("created_at", -1).explain()
+            winning_plan = explain["queryPlanner"]["winningPlan"]
+            assert "COLLSCAN" not in _plan_stages(winning_plan)
+            assert _plan_index_names(winning_plan) == {index_name}
+    finally:
+        await collection.drop()
+        client.close()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.core.timing import StageTimings, parse_server_timing
+from benchmarks.loadtest import build_app, run_load, summarize, synthetic_images
+
+IMAGE_PATH = "/api/v1/detection/image"
+
+
+def test_server_timing_round_trips() -> None:
+    timings = StageTimings()
+    timings.record("decode", 1.5)
+    timings.record("inference", 10)
+    timings.record("inference", 2.25)
+
+    assert timings.header_value() == "decode;dur=1.50, inference;dur=12.25"
+    assert parse_server_timing(timings.header_value()) == {"decode": 1.5, "inference": 12.25}
+    assert parse_server_timing('cache;desc="hit", db;dur=bad, app;dur=3') == {"app": 3.0}
+
+
+@pytest.mark.asyncio
+async def test_in_process_load_reports_latency_and_stage_timings() -> None:
+    app, repository = build_app(model_latency_ms=1, detections=3)
+    images = synthetic_images(2, width=160, height=120)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        samples, elapsed = await run_load(client, IMAGE_PATH, images, requests=12, concurrency=4, classes=["person"])
+        failures, _ = await run_load(client, IMAGE_PATH + "?roi=0,0,2,2", images, requests=2, concurrency=1)
+    report = summarize(samples, elapsed)
+
+    assert (report["requests"], report["succeeded"], report["error_rate"]) == (12, 12, 0.0)
+    assert repository.persisted == 12
+    assert {"p50", "p95", "p99"} <= report["latency_ms"].keys()
+    assert {"parse", "decode", "inference", "model", "persist", "total"} <= report["server_timing_ms"].keys()
+    assert summarize(failures, 1.0)["errors"] == {"http_400": 2}
+
+
+@pytest.mark.asyncio
+async def test_open_loop_schedule_sends_at_the_requested_rate() -> None:
+    app, _ = build_app(model_latency_ms=0, detections=1)
+    images = synthetic_images(1, width=64, height=64)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        samples, elapsed = await run_load(client, IMAGE_PATH, images, requests=10, rate=100, concurrency=10)
+
+    assert len(samples) == 10 and all(sample.ok for sample in samples)
+    assert elapsed >= 0.09
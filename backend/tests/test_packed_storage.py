@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import datetime
+
+import bson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import detection
+from app.cli.migrate_storage import convert
+from app.core.config import Settings
+from app.models.packed import PackedDetections, decode_packed
+from app.repositories import mongo
+from app.schemas.detection import (
+    BoundingBox,
+    DetectionItem,
+    DetectionMetadata,
+    DetectionResponse,
+    DetectionResponsePayload,
+    DetectionSummary,
+)
+from app.services.detection import DetectionService, get_detection_service
+from app.services.export import flatten_detections
+from tests.test_detection_services import HistoryRepository, build_service
+
+CLASS_NAMES = ["person", "car", "bicycle", "dog"]
+
+
+def synthetic_response(count: int, seed: int = 0) -> DetectionResponse:
+    rng = random.Random(seed)
+    detections = []
+    for _ in range(count):
+        class_id = rng.randrange(len(CLASS_NAMES))
+        x, y = rng.uniform(0, 1800), rng.uniform(0, 1000)
+        detections.append(
+            DetectionItem(
+                detection_id=str(uuid.uuid4()),
+                class_id=class_id,
+                class_name=CLASS_NAMES[class_id],
+                confidence=rng.uniform(0.25, 1.0),
+                bbox=BoundingBox(x_min=x, y_min=y, x_max=x + rng.uniform(5, 120), y_max=y + rng.uniform(5, 80)),
+            )
+        )
+    return DetectionResponse(
+        metadata=DetectionMetadata(width=1920, height=1080, channels=3),
+        summary=DetectionSummary(
+            total_detections=count,
+            detected_classes=sorted({item.class_name for item in detections}),
+            selected_classes=[],
+            processing_ms=12.5,
+        ),
+        payload=DetectionResponsePayload(detections=detections),
+    )
+
+
+def test_packed_round_trip_preserves_detections() -> None:
+    response = synthetic_response(25)
+
+    decoded = decode_packed(bson.decode(bson.encode(PackedDetections.encode(response.payload.detections).model_dump())))
+
+    assert len(decoded) == 25
+    for original, restored in zip(response.payload.detections, decoded):
+        assert restored.detection_id == original.detection_id
+        assert restored.class_id == original.class_id
+        assert restored.class_name == original.class_name
+        assert restored.confidence == pytest.approx(original.confidence, rel=1e-6)
+        assert restored.bbox.x_max == pytest.approx(original.bbox.x_max, rel=1e-6)
+
+
+def test_packed_dictionary_counts_each_class_once() -> None:
+    response = synthetic_response(40)
+
+    packed = PackedDetections.encode(response.payload.detections)
+
+    assert sum(entry.count for entry in packed.classes) == 40
+    assert len({entry.class_id for entry in packed.classes}) == len(packed.classes)
+    assert len(packed.boxes) == 40 * 4 * 4
+
+
+def test_packed_decode_is_lazy_and_cached() -> None:
+    packed = PackedDetections.encode(synthetic_response(3).payload.detections)
+
+    assert packed._decoded is None
+    first = packed.decode()
+    assert packed.decode() is first
+
+
+def test_packed_documents_are_smaller_for_dense_frames() -> None:
+    response = synthetic_response(100)
+    packed = bson.encode({"packed": PackedDetections.encode(response.payload.detections).model_dump()})
+    documents = bson.encode({"payload": response.payload.model_dump()})
+
+    assert len(packed) < len(documents) / 3
+
+
+def test_export_flattens_packed_documents() -> None:
+    response = synthetic_response(5)
+    raw = bson.decode(
+        bson.encode(
+            {
+                "_id": "result-1",
+                "created_at": datetime(2024, 11, 1),
+                "packed": PackedDetections.encode(response.payload.detections).model_dump(),
+            }
+        )
+    )
+
+    rows = flatten_detections([raw])
+
+    assert [row["detection_id"] for row in rows] == [item.detection_id for item in response.payload.detections]
+    assert rows[0]["class_name"] == response.payload.detections[0].class_name
+
+
+def test_packing_rejects_non_uuid_detection_ids() -> None:
+    detection = synthetic_response(1).payload.detections[0].model_copy(update={"detection_id": "track-7"})
+
+    with pytest.raises(ValueError, match="track-7"):
+        PackedDetections.encode([detection])
+
+
+def test_migration_converts_in_both_directions() -> None:
+    response = synthetic_response(4)
+    document = {
+        "metadata": response.metadata.model_dump(),
+        "summary": response.summary.model_dump(),
+        "payload": response.payload.model_dump(),
+    }
+
+    to_packed = convert(document, "packed")
+    assert to_packed["$unset"] == {"payload": ""}
+    packed_document = {**document, "packed": to_packed["$set"]["packed"]}
+    del packed_document["payload"]
+
+    to_documents = convert(packed_document, "documents")
+    detections = to_documents["$set"]["payload"]["detections"]
+    assert to_documents["$unset"] == {"packed": ""}
+    assert [item["detection_id"] for item in detections] == [
+        item.detection_id for item in response.payload.detections
+    ]
+    assert all(item["geometry"] is not None for item in detections)
+
+
+def test_per_detection_history_filters_are_rejected_for_packed_storage(monkeypatch) -> None:
+    monkeypatch.setattr(mongo, "get_settings", lambda: Settings(detection_storage_format="packed"))
+    app = FastAPI()
+    app.include_router(detection.router)
+    service = DetectionService(build_service(), mongo.MongoDetectionRepository())
+    app.dependency_overrides[get_detection_service] = lambda: service
+
+    response = TestClient(app).get("/detection/history", params={"min_confidence": 0.5})
+
+    assert response.status_code == 400
+    assert "packed" in response.json()["detail"]
+
+
+def test_other_history_errors_are_not_reported_as_bad_requests() -> None:
+    class BrokenRepository(HistoryRepository):
+        async def fetch_history(self, **kwargs):
+            raise ValueError("mongodb://user:secret@db/visionflow is unreachable")
+
+    app = FastAPI()
+    app.include_router(detection.router)
+    service = DetectionService(build_service(), BrokenRepository([], []))
+    app.dependency_overrides[get_detection_service] = lambda: service
+    client = TestClient(app, raise_server_exceptions=False)
+
+    response = client.get("/detection/history", params={"min_confidence": 0.5})
+
+    assert response.status_code == 500
+    assert "secret" not in response.text
+    assert client.get("/detection/history", params={"region": "0,0,2"}).status_code == 400
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import detection
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.repositories.sqlite import SQLiteDetectionRepository
+from app.services import detection as detection_service
+from app.services.detection import DetectionService, get_detection_service
+from app.services.previews import PreviewGenerator, PreviewKind, render_previews
+from tests.test_detection_services import build_service
+
+
+class BlockingGenerator(PreviewGenerator):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+    def render(self, image):
+        self.release.wait(timeout=5)
+        return super().render(image)
+
+
+def large_image() -> np.ndarray:
+    image = np.zeros((3000, 4000, 3), dtype=np.uint8)
+    image[:, :2000] = (255, 0, 0)
+    return image
+
+
+def test_render_previews_fits_sizes_and_keeps_colors() -> None:
+    thumbnail, preview = render_previews(large_image(), thumbnail_size=256, preview_size=1024)
+
+    assert (thumbnail.kind, thumbnail.width, thumbnail.height) == ("thumbnail", 256, 192)
+    assert (preview.kind, preview.width, preview.height) == ("preview", 1024, 768)
+    assert preview.media_type == "image/webp"
+    decoded = cv2.imdecode(np.frombuffer(thumbnail.data, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (192, 256, 3)
+    assert decoded[96, 10, 2] > 200 and decoded[96, 10, 0] < 50
+
+    small = render_previews(np.zeros((100, 80, 3), dtype=np.uint8), image_format="jpeg")
+    assert [(item.width, item.height, item.media_type) for item in small] == [(80, 100, "image/jpeg")] * 2
+
+
+@pytest.mark.asyncio
+async def test_previews_are_stored_after_the_detection_returns(tmp_path) -> None:
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    generator = BlockingGenerator()
+    service = DetectionService(build_service(), repository, previews=generator)
+
+    response = await service.run_detection(large_image(), selected_classes=None, source_name="big.jpg")
+
+    assert response.id is not None
+    assert generator.pending == 1
+    assert await service.fetch_preview(response.id, PreviewKind.THUMBNAIL) is None
+
+    generator.release.set()
+    await generator.close()
+
+    thumbnail = await service.fetch_preview(response.id, PreviewKind.THUMBNAIL)
+    preview = await service.fetch_preview(response.id, PreviewKind.PREVIEW)
+    assert (thumbnail.width, preview.width) == (256, 1024)
+    assert metrics.get("previews.generated") == 1
+    repository.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_skips_previews_and_failures_are_contained(tmp_path) -> None:
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    generator = PreviewGenerator(max_pending=0)
+    service = DetectionService(build_service(), repository, previews=generator)
+
+    skipped = await service.run_detection(large_image(), selected_classes=None)
+    generator.max_pending = 1
+    assert generator.schedule(large_image(), "12345", repository)
+    await generator.close()
+
+    assert await service.fetch_preview(skipped.id, PreviewKind.PREVIEW) is None
+    assert metrics.get("previews.skipped") == 1
+    assert metrics.get("previews.failed") == 1
+    repository.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_frames_are_bounded_by_bytes(tmp_path) -> None:
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    image = large_image()
+    generator = BlockingGenerator(max_pending_bytes=image.nbytes + 1)
+
+    assert generator.schedule(image, "1", repository)
+    assert not generator.schedule(large_image(), "2", repository)
+    assert generator.pending_bytes == image.nbytes
+    generator.release.set()
+    await generator.close()
+
+    assert generator.pending_bytes == 0
+    assert metrics.get("previews.skipped") == 1
+    repository.close()
+
+
+@pytest.mark.asyncio
+async def test_previews_false_disables_generation_despite_settings(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(detection_service, "get_settings", lambda: Settings(previews_enabled=True))
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    service = DetectionService(build_service(), repository, previews=False)
+
+    response = await service.run_detection(large_image(), selected_classes=None)
+
+    assert response.id is not None
+    assert await service.fetch_preview(response.id, PreviewKind.THUMBNAIL) is None
+    assert metrics.get("previews.generated") == metrics.get("previews.skipped") == 0
+    repository.close()
+
+
+def test_preview_endpoint_serves_immutable_images(tmp_path) -> None:
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    generator = PreviewGenerator()
+    service = DetectionService(build_service(), repository, previews=generator)
+
+    async def ingest() -> str:
+        response = await service.run_detection(large_image(), selected_classes=None)
+        await generator.close()
+        return response.id
+
+    result_id = asyncio.run(ingest())
+    app = FastAPI()
+    app.include_router(detection.router)
+    app.dependency_overrides[get_detection_service] = lambda: service
+    client = TestClient(app)
+
+    served = client.get(f"/detection/results/{result_id}/thumbnail")
+    revalidated = client.get(
+        f"/detection/results/{result_id}/thumbnail", headers={"If-None-Match": served.headers["etag"]}
+    )
+
+    assert served.status_code == 200
+    assert served.headers["content-type"] == "image/webp"
+    assert served.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert cv2.imdecode(np.frombuffer(served.content, np.uint8), cv2.IMREAD_COLOR).shape == (192, 256, 3)
+    assert revalidated.status_code == 304
+    assert client.get("/detection/results/999/preview").status_code == 404
+    assert client.get("/detection/results/not-a-number/preview").status_code == 404
+    assert client.get(f"/detection/results/{result_id}/original").status_code == 422
+    repository.close()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import Settings
+from app.repositories.base import UnsupportedFilterError
+from app.repositories.sqlite import SQLiteDetectionRepository
+from app.schemas.detection import DetectionHistoryFilters
+from app.services.detection import DetectionService
+from app.services.export import flatten_detections
+from app.services.tracking import MultiObjectTracker
+from tests.test_detection_services import build_service, random_image
+
+MONGO_TEST_URL = os.getenv("VISIONFLOW_TEST_MONGO_URL")
+
+BACKENDS = [
+    "sqlite",
+    pytest.param(
+        "mongo",
+        marks=pytest.mark.skipif(not MONGO_TEST_URL, reason="set VISIONFLOW_TEST_MONGO_URL to test the Mongo backend"),
+    ),
+]
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def repository(request, tmp_path):
+    if request.param == "sqlite":
+        sqlite_repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+        yield sqlite_repository
+        sqlite_repository.close()
+        return
+
+    from beanie import init_beanie
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.db.mongo import DOCUMENT_MODELS
+    from app.repositories.mongo import MongoDetectionRepository
+
+    client = AsyncIOMotorClient(MONGO_TEST_URL)
+    database_name = f"visionflow_test_{uuid.uuid4().hex[:8]}"
+    await init_beanie(database=client[database_name], document_models=list(DOCUMENT_MODELS))
+    yield MongoDetectionRepository()
+    await client.drop_database(database_name)
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_detection_service_persists_results(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+
+    await service.run_detection(random_image(), selected_classes=["car"], source_name="sample.jpg")
+
+    history = await service.list_detection_history(page=1, page_size=10)
+    assert history.total == 1
+    assert history.items[0].source_name == "sample.jpg"
+    assert history.items[0].summary.total_detections == 1
+
+
+@pytest.mark.asyncio
+async def test_detection_history_response_shape(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+    for index in range(3):
+        await service.run_detection(random_image(), selected_classes=None, source_name=f"{index}.jpg")
+
+    history = await service.list_detection_history(page=2, page_size=2)
+
+    assert history.total == 3
+    assert history.pages == 2
+    assert [item.source_name for item in history.items] == ["0.jpg"]
+    assert isinstance(history.items[0].id, str)
+
+
+@pytest.mark.asyncio
+async def test_detection_history_filters(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+    await service.run_detection(random_image(), selected_classes=None)
+    await service.run_detection(random_image(), selected_classes=["car"])
+
+    by_class = await service.list_detection_history(page=1, page_size=10, class_name="person")
+    confident = await service.list_detection_history(
+        page=1,
+        page_size=10,
+        class_name="person",
+        filters=DetectionHistoryFilters(min_confidence=0.9),
+    )
+    large = await service.list_detection_history(
+        page=1,
+        page_size=10,
+        filters=DetectionHistoryFilters(min_area=0.3),
+    )
+
+    assert by_class.total == 1
+    assert confident.total == 0
+    assert large.total == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not MONGO_TEST_URL, reason="set VISIONFLOW_TEST_MONGO_URL to test the Mongo backend")
+@pytest.mark.parametrize("repository", ["mongo"], indirect=True)
+async def test_per_detection_filters_are_rejected_while_packed_records_remain(repository, monkeypatch) -> None:
+    from app.repositories import mongo
+
+    service = DetectionService(build_service(), repository=repository)
+    filters = DetectionHistoryFilters(min_confidence=0.1)
+    await service.run_detection(random_image(), selected_classes=None)
+    assert (await service.list_detection_history(page=1, page_size=10, filters=filters)).total == 1
+
+    monkeypatch.setattr(mongo, "get_settings", lambda: Settings(detection_storage_format="packed"))
+    await service.run_detection(random_image(), selected_classes=None)
+    monkeypatch.setattr(mongo, "get_settings", lambda: Settings(detection_storage_format="documents"))
+
+    with pytest.raises(UnsupportedFilterError):
+        await service.list_detection_history(page=1, page_size=10, filters=filters)
+    assert (await service.list_detection_history(page=1, page_size=10)).total == 2
+
+
+@pytest.mark.asyncio
+async def test_history_time_filters_honour_utc_offsets(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+    await service.run_detection(random_image(), selected_classes=None)
+    now = datetime.now(timezone(timedelta(hours=5)))
+
+    recent = await service.list_detection_history(
+        page=1, page_size=10, filters=DetectionHistoryFilters(start=now - timedelta(hours=1))
+    )
+    future = await service.list_detection_history(
+        page=1, page_size=10, filters=DetectionHistoryFilters(start=now + timedelta(hours=1))
+    )
+
+    assert (recent.total, future.total) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_class_frequency_response(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+    await service.run_detection(random_image(), selected_classes=None)
+    await service.run_detection(random_image(), selected_classes=["car"])
+
+    response = await service.class_frequency(limit=1)
+
+    assert response.total_detections == 3
+    assert response.total_classes == 2
+    assert [(item.class_name, item.detections) for item in response.items] == [("car", 2)]
+    assert response.items[0].last_seen is not None
+
+
+@pytest.mark.asyncio
+async def test_export_batches_are_flattenable(repository) -> None:
+    service = DetectionService(build_service(), repository=repository)
+    for _ in range(5):
+        await service.run_detection(random_image(), selected_classes=None)
+
+    batches = [batch async for batch in repository.iter_export_batches(batch_size=2, class_names=["person"])]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    rows = [row for batch in batches for row in flatten_detections(batch, class_names=["person"])]
+    assert len(rows) == 5
+    assert len({row["result_id"] for row in rows}) == 5
+
+
+@pytest.mark.asyncio
+async def test_track_persistence_and_frequency(repository) -> None:
+    tracker = MultiObjectTracker()
+    response = build_service().predict_image(random_image())
+    for _ in range(3):
+        tracker.update(response.payload.detections)
+    tracks = tracker.finish_all()
+
+    await repository.persist_tracks(tracks, session_id="session-a", source_name="cam", source_type="stream")
+    await repository.persist_tracks(tracks[:1], session_id="session-b", source_name="cam", source_type="stream")
+    aggregation = await repository.track_frequency()
+    person_only = await repository.track_frequency(class_names=["person"])
+
+    assert aggregation["total_tracks"] == 3
+    assert [(item["_id"], item["tracks"]) for item in aggregation["items"]] == [("car", 2), ("person", 1)]
+    assert aggregation["items"][0]["best_confidence"] == pytest.approx(0.92)
+    assert person_only["total_tracks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_group_commits_concurrent_writes(tmp_path) -> None:
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}", max_batch_size=16)
+    transactions = 0
+    insert_batch = repository._insert_batch
+
+    def counting_insert(batch):
+        nonlocal transactions
+        transactions += 1
+        return insert_batch(batch)
+
+    repository._insert_batch = counting_insert  # type: ignore[method-assign]
+    response = build_service().predict_image(random_image())
+
+    stored = await asyncio.gather(*(repository.persist(response, source_name=None) for _ in range(40)))
+
+    assert len({record.id for record in stored}) == 40
+    assert transactions <= 4
+    _, total = await repository.fetch_history(page=1, page_size=1)
+    assert total == 40
+    repository.close()
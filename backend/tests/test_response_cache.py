@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import detection
+from app.core.metrics import metrics
+from app.services.detection import DetectionService, get_detection_service
+from app.services.response_cache import TRACKS, ResponseCache
+from tests.conftest import CountingRepository, FakeClock
+from tests.test_detection_services import build_service, random_image
+
+
+def build(clock: FakeClock | None = None) -> tuple[DetectionService, CountingRepository, ResponseCache]:
+    repository = CountingRepository()
+    cache = ResponseCache(ttl_s=5, clock=clock or FakeClock())
+    return DetectionService(build_service(), repository, response_cache=cache), repository, cache
+
+
+@pytest.mark.asyncio
+async def test_persist_invalidates_cached_analytics() -> None:
+    service, repository, _ = build()
+
+    first = await service.cached_class_frequency()
+    second = await service.cached_class_frequency()
+    await service.list_detection_history(page=1, page_size=10)
+    await service.list_detection_history(page=1, page_size=10)
+    assert repository.queries == 2
+    assert second.etag == first.etag
+
+    await service.run_detection(random_image(), selected_classes=None)
+    await service.class_frequency()
+    await service.list_detection_history(page=1, page_size=10)
+
+    assert repository.queries == 4
+    assert metrics.get("response_cache.results.hits") == 2
+    assert metrics.get("response_cache.results.misses") == 4
+
+
+@pytest.mark.asyncio
+async def test_ttl_bounds_staleness_and_tracks_have_their_own_version() -> None:
+    clock = FakeClock()
+    service, repository, cache = build(clock)
+
+    await service.track_frequency()
+    await service.class_frequency()
+    cache.invalidate(TRACKS)
+    await service.track_frequency()
+    await service.class_frequency()
+    assert repository.queries == 3
+
+    clock.now = 6
+    await service.class_frequency()
+    assert repository.queries == 4
+
+
+def test_conditional_get_returns_not_modified_without_querying() -> None:
+    service, repository, _ = build()
+    app = FastAPI()
+    app.include_router(detection.router)
+    app.dependency_overrides[get_detection_service] = lambda: service
+    client = TestClient(app)
+
+    first = client.get("/detection/analytics/classes")
+    etag = first.headers["etag"]
+    unchanged = client.get("/detection/analytics/classes", headers={"If-None-Match": etag})
+    other = client.get("/detection/analytics/classes", headers={"If-None-Match": 'W/"other"'})
+    history = client.get("/detection/history", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200 and first.json()["total_detections"] == 1
+    assert first.headers["cache-control"] == "no-cache"
+    assert (unchanged.status_code, unchanged.content, unchanged.headers["etag"]) == (304, b"", etag)
+    assert other.status_code == 200
+    assert history.status_code == 200
+    assert repository.queries == 2
+    assert metrics.get("response_cache.not_modified") == 1
+
+
+@pytest.mark.asyncio
+async def test_response_cache_false_disables_caching_but_keeps_etags() -> None:
+    repository = CountingRepository()
+    service = DetectionService(build_service(), repository, response_cache=False)
+
+    first = await service.cached_class_frequency()
+    second = await service.cached_class_frequency()
+
+    assert repository.queries == 2
+    assert second.etag == first.etag
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.services.yolo import YOLOService
+from app.utils.roi import RegionOfInterest, parse_roi
+
+
+class RecordingBoxes:
+    def __init__(self, cls, conf, xyxy):
+        self.cls = cls
+        self.conf = conf
+        self.xyxy = xyxy
+
+
+class RecordingResult:
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names
+
+
+class RecordingModel:
+    """Returns fixed boxes in input-image coordinates and records what it was asked to run on."""
+
+    names = {0: "car", 1: "person", 2: "dog"}
+
+    def __init__(self, boxes: list[tuple[int, list[float]]]):
+        self.boxes = boxes
+        self.calls: list[dict] = []
+
+    def predict(self, image: np.ndarray, conf: float, verbose: bool = False, **kwargs):
+        self.calls.append({"shape": image.shape, **kwargs})
+        allowed = kwargs.get("classes")
+        kept = [(cls, box) for cls, box in self.boxes if allowed is None or cls in allowed]
+        return [
+            RecordingResult(
+                RecordingBoxes([cls for cls, _ in kept], [0.9] * len(kept), [box for _, box in kept]),
+                self.names,
+            )
+        ]
+
+
+def image(width: int = 640, height: int = 480) -> np.ndarray:
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def test_parse_roi_accepts_rectangles_and_polygons() -> None:
+    rectangle = parse_roi("0.25,0.5,0.75,1")
+    assert rectangle is not None and rectangle.is_rectangle
+    assert rectangle.pixel_bounds(640, 480) == (160, 240, 480, 480)
+
+    triangle = parse_roi("0,0;1,0;0,1")
+    assert triangle is not None and not triangle.is_rectangle
+    assert parse_roi(None) is None
+
+
+@pytest.mark.parametrize(
+    ("value", "message"),
+    [
+        ("0,0,1", "roi must be"),
+        ("0.5,0,0.2,1", "roi rectangle"),
+        ("0,0;1,1", "roi polygon"),
+        ("0,0;0.5,0.5;1,1", "roi polygon"),
+        ("0,0;1,0,1;0,1", "roi must be"),
+        ("0,0,1.5,1", "roi coordinates"),
+        ("a,b,c,d", "roi must be"),
+    ],
+)
+def test_parse_roi_rejects_invalid_regions(value: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_roi(value)
+
+
+def test_polygon_contains_uses_even_odd_rule() -> None:
+    triangle = RegionOfInterest(((0.0, 0.0), (1.0, 0.0), (0.0, 1.0)))
+    points = np.array([[10.0, 10.0], [90.0, 90.0], [40.0, 40.0]])
+
+    assert triangle.contains(points, width=100, height=100).tolist() == [True, False, True]
+
+
+def test_roi_crops_input_and_maps_boxes_to_full_frame() -> None:
+    model = RecordingModel([(0, [10, 20, 50, 60])])
+    service = YOLOService(model_factory=lambda _: model, input_size=640, adaptive=False)
+
+    response = service.predict_image(image(), roi=parse_roi("0.5,0.5,1,1"))
+
+    assert model.calls[0]["shape"] == (240, 320, 3)
+    assert model.calls[0]["imgsz"] == 320
+    bbox = response.payload.detections[0].bbox
+    assert (bbox.x_min, bbox.y_min, bbox.x_max, bbox.y_max) == (330, 260, 370, 300)
+    assert (response.metadata.width, response.metadata.height) == (640, 480)
+    assert response.summary.roi == [(0.5, 0.5), (1.0, 0.5), (1.0, 1.0), (0.5, 1.0)]
+
+
+def test_polygon_roi_drops_detections_outside_the_polygon() -> None:
+    # Upper-left triangle of the frame; the crop is the whole frame.
+    model = RecordingModel([(0, [10, 10, 50, 50]), (1, [560, 400, 620, 460])])
+    service = YOLOService(model_factory=lambda _: model, adaptive=False)
+
+    response = service.predict_image(image(), roi=parse_roi("0,0;1,0;0,1"))
+
+    assert [item.class_name for item in response.payload.detections] == ["car"]
+    assert response.summary.detected_classes == ["car"]
+
+
+def test_selected_classes_are_pushed_down_as_model_class_ids() -> None:
+    model = RecordingModel([(0, [0, 0, 10, 10]), (1, [0, 0, 20, 20]), (2, [0, 0, 30, 30])])
+    service = YOLOService(model_factory=lambda _: model, adaptive=False)
+
+    response = service.predict_image(image(), selected_classes=["Person", "dog"])
+
+    assert model.calls[0]["classes"] == [1, 2]
+    assert response.summary.detected_classes == ["dog", "person"]
+
+
+def test_unknown_selected_classes_skip_inference() -> None:
+    model = RecordingModel([(0, [0, 0, 10, 10])])
+    service = YOLOService(model_factory=lambda _: model, adaptive=False)
+
+    response = service.predict_image(image(), selected_classes=["unicorn"])
+
+    assert model.calls == []
+    assert response.summary.total_detections == 0
+    assert response.summary.selected_classes == ["unicorn"]
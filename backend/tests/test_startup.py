@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import os
+
+from tests.startup_probe import (
+    HEAVY_MODULES,
+    importtime_profile,
+    loaded_heavy_modules,
+    run_python,
+    time_to_first_health,
+)
+
+# Generous enough for slow CI runners; the heavy-module check below is the strict guard.
+IMPORT_BUDGET_MS = float(os.getenv("VISIONFLOW_IMPORT_BUDGET_MS", "1500"))
+FIRST_HEALTH_BUDGET_MS = float(os.getenv("VISIONFLOW_FIRST_HEALTH_BUDGET_MS", "2500"))
+
+
+def test_importing_app_does_not_load_heavy_dependencies() -> None:
+    assert loaded_heavy_modules("app.main") == []
+
+
+def test_app_import_stays_within_budget() -> None:
+    profile = importtime_profile("app.main")
+
+    assert 0 < profile.module_ms <= IMPORT_BUDGET_MS, profile.packages_ms
+    assert not set(profile.packages_ms) & set(HEAVY_MODULES)
+
+
+def test_import_and_settings_have_no_filesystem_side_effects(tmp_path) -> None:
+    run_python("import app.main\nfrom app.core.config import get_settings\nget_settings()", tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_first_health_within_budget() -> None:
+    result = time_to_first_health()
+
+    assert result["status"] == 200
+    assert result["time_to_first_health_ms"] <= FIRST_HEALTH_BUDGET_MS
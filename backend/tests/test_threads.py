@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import metrics as metrics_endpoint
+from app.core import threads
+from app.core.config import Settings
+from app.core.threads import (
+    ThreadLayout,
+    apply_thread_layout,
+    available_cores,
+    cgroup_cpu_limit,
+    plan_thread_layout,
+)
+from app.services.yolo import YOLOService
+from tests.test_detection_services import DummyModel, random_image
+
+
+def write(path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_cgroup_v2_quota_takes_the_tightest_ancestor(tmp_path) -> None:
+    write(tmp_path / "proc", "0::/kubepods/pod1/container\n")
+    write(tmp_path / "cgroup" / "kubepods" / "cpu.max", "400000 100000\n")
+    write(tmp_path / "cgroup" / "kubepods" / "pod1" / "container" / "cpu.max", "150000 100000\n")
+    write(tmp_path / "cgroup" / "cpu.max", "max 100000\n")
+
+    assert cgroup_cpu_limit(tmp_path / "cgroup", tmp_path / "proc") == pytest.approx(1.5)
+    assert available_cores(tmp_path / "cgroup", tmp_path / "proc") == 1
+
+
+def test_cgroup_v1_quota_and_unlimited(tmp_path) -> None:
+    write(tmp_path / "proc", "4:memory:/docker/abc\n3:cpu,cpuacct:/docker/abc\n")
+    write(tmp_path / "cgroup" / "cpu" / "docker" / "abc" / "cpu.cfs_quota_us", "200000\n")
+    write(tmp_path / "cgroup" / "cpu" / "docker" / "abc" / "cpu.cfs_period_us", "100000\n")
+    assert cgroup_cpu_limit(tmp_path / "cgroup", tmp_path / "proc") == pytest.approx(2.0)
+
+    write(tmp_path / "cgroup" / "cpu" / "docker" / "abc" / "cpu.cfs_quota_us", "-1\n")
+    assert cgroup_cpu_limit(tmp_path / "cgroup", tmp_path / "proc") is None
+    assert cgroup_cpu_limit(tmp_path / "cgroup", tmp_path / "missing") is None
+
+
+@pytest.mark.parametrize(
+    ("cores", "options", "expected"),
+    [
+        (16, {}, (4, 4)),
+        (3, {}, (1, 3)),
+        (16, {"processes": 4}, (1, 4)),
+        (16, {"slots": 8}, (8, 2)),
+        (16, {"threads_per_slot": 1}, (16, 1)),
+        (8, {"slots": 4, "threads_per_slot": 8}, (4, 2)),
+        (2, {"slots": 6}, (2, 1)),
+    ],
+)
+def test_plan_thread_layout_never_oversubscribes(cores, options, expected) -> None:
+    layout = plan_thread_layout(cores, **options)
+
+    assert (layout.slots, layout.threads_per_slot) == expected
+    assert layout.threads <= max(cores // layout.processes, 1)
+
+
+def test_preview_workers_are_left_out_of_the_inference_layout(monkeypatch) -> None:
+    monkeypatch.setattr(threads, "available_cores", lambda: 8)
+    monkeypatch.setattr(threads, "get_settings", lambda: Settings(previews_enabled=True, preview_workers=2))
+
+    layout = threads.get_thread_layout.__wrapped__()
+
+    assert layout.cores == 6
+    assert layout.slots * layout.threads_per_slot <= 6
+
+
+def test_pinning_assigns_disjoint_cpu_sets() -> None:
+    layout = plan_thread_layout(8, slots=2, pin=True, cpus=list(range(8)))
+    assert layout.cpu_sets == ((0, 1, 2, 3), (4, 5, 6, 7))
+
+    assert not plan_thread_layout(8, slots=2, pin=True, cpus=[0, 1]).pin
+
+
+def test_apply_thread_layout_only_touches_imported_libraries(monkeypatch) -> None:
+    calls: dict[str, int] = {}
+    fake_torch = SimpleNamespace(
+        set_num_threads=lambda value: calls.__setitem__("threads", value),
+        set_num_interop_threads=lambda value: calls.__setitem__("interop", value),
+    )
+    monkeypatch.setitem(sys.modules, "torch", fake_torch)
+    monkeypatch.delitem(sys.modules, "cv2", raising=False)
+
+    applied = apply_thread_layout(ThreadLayout(cores=8, processes=1, slots=2, threads_per_slot=4))
+
+    assert applied == {"torch": 4, "torch_interop": 1}
+    assert calls == {"threads": 4, "interop": 1}
+
+
+def test_predictions_are_bounded_by_inference_slots() -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class CountingModel(DummyModel):
+        def __init__(self) -> None:
+            super().__init__()
+            self.active = 0
+            self.peak = 0
+
+        def predict(self, image, conf, verbose=False, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+                self.active -= 1
+            return [self.result]
+
+    models: list[CountingModel] = []
+
+    def load(_: str) -> CountingModel:
+        models.append(CountingModel())
+        return models[-1]
+
+    layout = ThreadLayout(cores=2, processes=1, slots=2, threads_per_slot=1)
+    service = YOLOService(model_factory=load, adaptive=False, thread_layout=layout)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda _: service.predict_image(random_image()), range(12)))
+
+    assert peak == 2
+    # Each slot predicts on its own model instance, which never runs two predictions at once.
+    assert len(models) == 2
+    assert [model.peak for model in models] == [1, 1]
+
+
+def test_thread_layout_endpoint_reports_the_layout() -> None:
+    app = FastAPI()
+    app.include_router(metrics_endpoint.router)
+
+    body = TestClient(app).get("/metrics/threads").json()
+
+    assert body["threads"] == body["slots"] * body["threads_per_slot"] <= body["cores"]
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import detection
+from app.repositories.sqlite import SQLiteDetectionRepository
+from app.services.detection import DetectionService, get_detection_service
+from app.services.tracking import MultiObjectTracker, greedy_match, iou_matrix
+from app.services.yolo import YOLOService
+
+
+class ScriptedBoxes:
+    def __init__(self, rows: list[tuple[int, float, list[float]]]):
+        self.cls = [row[0] for row in rows]
+        self.conf = [row[1] for row in rows]
+        self.xyxy = [row[2] for row in rows]
+
+
+class ScriptedResult:
+    def __init__(self, rows):
+        self.boxes = ScriptedBoxes(rows)
+        self.names = {0: "car", 1: "person"}
+
+
+class ScriptedModel:
+    """Returns one scripted frame per `predict` call, filtering by the requested confidence like YOLO does."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.calls = 0
+        self.confidences: list[float] = []
+
+    def predict(self, image, conf, verbose=False, **kwargs):
+        rows = self.frames[min(self.calls, len(self.frames) - 1)]
+        self.calls += 1
+        self.confidences.append(conf)
+        return [ScriptedResult([row for row in rows if row[1] >= conf])]
+
+
+def moving_boxes(frames: int, objects: int, *, step: float = 4.0, confidence: float = 0.9):
+    return [
+        [(index % 2, confidence, [20 + 60 * index + step * frame, 40, 60 + 60 * index + step * frame, 100])
+         for index in range(objects)]
+        for frame in range(frames)
+    ]
+
+
+def run_arrays(tracker: MultiObjectTracker, frame) -> list[int]:
+    boxes = np.array([row[2] for row in frame], dtype=float).reshape(-1, 4)
+    scores = np.array([row[1] for row in frame], dtype=float)
+    classes = np.array([row[0] for row in frame], dtype=np.int64)
+    return tracker.update_arrays(boxes, scores, classes).tolist()
+
+
+def test_iou_matrix_matches_hand_computed_values() -> None:
+    boxes_a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=float)
+    boxes_b = np.array([[5, 5, 15, 15], [0, 0, 10, 10], [100, 100, 110, 110]], dtype=float)
+
+    matrix = iou_matrix(boxes_a, boxes_b)
+
+    assert matrix.shape == (2, 3)
+    assert matrix[0, 0] == pytest.approx(25 / 175)
+    assert matrix[0, 1] == pytest.approx(1.0)
+    assert not matrix[1].any()
+    assert iou_matrix(boxes_a, np.zeros((0, 4))).shape == (2, 0)
+
+
+def test_greedy_match_prefers_highest_overlap() -> None:
+    scores = np.array([[0.9, 0.8], [0.85, 0.1]])
+
+    rows, columns = greedy_match(scores, threshold=0.2)
+
+    assert sorted(zip(rows.tolist(), columns.tolist())) == [(0, 0)]
+
+
+def test_tracker_keeps_ids_stable_for_moving_objects() -> None:
+    tracker = MultiObjectTracker()
+    frames = moving_boxes(frames=20, objects=5)
+
+    ids = [run_arrays(tracker, frame) for frame in frames]
+
+    assert ids[0] == [1, 2, 3, 4, 5]
+    assert all(frame_ids == ids[0] for frame_ids in ids)
+
+
+def test_tracker_bridges_occlusion_with_motion_model() -> None:
+    tracker = MultiObjectTracker(max_age=10)
+    frames = moving_boxes(frames=20, objects=1, step=8.0)
+    for frame in frames[8:13]:
+        frame.clear()
+
+    ids = [run_arrays(tracker, frame) for frame in frames]
+
+    assert {frame_ids[0] for frame_ids in ids if frame_ids} == {1}
+
+
+def test_tracker_recovers_low_confidence_detections() -> None:
+    tracker = MultiObjectTracker(high_threshold=0.5, low_threshold=0.1)
+    frames = moving_boxes(frames=10, objects=1)
+    for frame in frames[4:7]:
+        frame[0] = (frame[0][0], 0.3, frame[0][2])
+
+    ids = [run_arrays(tracker, frame) for frame in frames]
+
+    assert ids == [[1]] * 10
+
+
+def test_tracker_requires_min_hits_after_first_frame_and_reports_finished_tracks() -> None:
+    tracker = MultiObjectTracker(max_age=2, min_hits=2)
+    run_arrays(tracker, [])
+    frames = moving_boxes(frames=4, objects=1)
+    frames[2] = [(frames[2][0][0], 0.97, frames[2][0][2])]
+
+    ids = [run_arrays(tracker, frame) for frame in frames]
+    for _ in range(3):
+        run_arrays(tracker, [])
+
+    assert ids == [[0], [1], [1], [1]]
+    [finished] = tracker.pop_finished()
+    assert (finished.first_frame, finished.last_frame, finished.frames) == (2, 5, 4)
+    assert finished.best_confidence == pytest.approx(0.97)
+    assert finished.best_bbox.x_min == pytest.approx(28)
+    assert tracker.pop_finished() == []
+
+
+def test_tracker_never_associates_across_classes() -> None:
+    tracker = MultiObjectTracker()
+    box = [10, 10, 50, 50]
+
+    first = run_arrays(tracker, [(0, 0.9, box)])
+    second = run_arrays(tracker, [(1, 0.9, box)])
+
+    assert first == [1]
+    assert second == [0]
+
+
+def build_tracking_service(frames, tmp_path) -> tuple[DetectionService, SQLiteDetectionRepository, ScriptedModel]:
+    model = ScriptedModel(frames)
+    repository = SQLiteDetectionRepository(f"sqlite:///{tmp_path / 'visionflow.db'}")
+    yolo = YOLOService(model_factory=lambda _: model, confidence=0.4)
+    return DetectionService(yolo, repository=repository), repository, model
+
+
+@pytest.mark.asyncio
+async def test_tracking_session_persists_one_record_per_track(tmp_path) -> None:
+    service, repository, model = build_tracking_service(moving_boxes(frames=12, objects=3), tmp_path)
+    session = service.open_tracking_session(source_name="camera-1")
+    image = np.zeros((120, 320, 3), dtype=np.uint8)
+
+    frames = [await session.process(image) for _ in range(12)]
+    tracks = await session.close()
+
+    assert {item.track_id for item in frames[-1].payload.detections} == {1, 2, 3}
+    assert frames[-1].summary.total_detections == 3
+    assert model.confidences[0] == pytest.approx(0.1)
+    assert [track.frames for track in tracks] == [12, 12, 12]
+    analytics = await service.track_frequency()
+    assert analytics.total_tracks == 3
+    assert {item.class_name: item.tracks for item in analytics.items} == {"car": 2, "person": 1}
+    history = await service.list_detection_history(page=1, page_size=10)
+    assert history.total == 0
+    repository.close()
+
+
+@pytest.mark.asyncio
+async def test_track_video_reads_frames_with_stride(tmp_path) -> None:
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 120))
+    for _ in range(10):
+        writer.write(np.zeros((120, 320, 3), dtype=np.uint8))
+    writer.release()
+    service, repository, model = build_tracking_service(moving_boxes(frames=5, objects=2), tmp_path)
+
+    response = await service.track_video(path, selected_classes=None, source_name="clip.avi", frame_stride=2)
+
+    assert response.frames_processed == 5
+    assert model.calls == 5
+    assert response.fps == pytest.approx(10)
+    assert response.total_tracks == 2
+    assert response.tracks[0].last_seen > response.tracks[0].first_seen
+    assert (response.metadata.width, response.metadata.height) == (320, 120)
+    repository.close()
+
+
+def test_stream_websocket_returns_tracked_frames(tmp_path) -> None:
+    service, repository, _ = build_tracking_service(moving_boxes(frames=3, objects=2), tmp_path)
+    app = FastAPI()
+    app.include_router(detection.router)
+    app.dependency_overrides[get_detection_service] = lambda: service
+    encoded = cv2.imencode(".png", np.zeros((120, 320, 3), dtype=np.uint8))[1].tobytes()
+
+    with TestClient(app).websocket_connect("/detection/stream?source_name=cam") as websocket:
+        messages = []
+        for _ in range(3):
+            websocket.send_bytes(encoded)
+            messages.append(websocket.receive_json())
+        websocket.send_bytes(b"not an image")
+        error = websocket.receive_json()
+        websocket.send_text("end")
+        summary = websocket.receive_json()
+
+    assert [message["frame_index"] for message in messages] == [1, 2, 3]
+    assert [item["track_id"] for item in messages[-1]["payload"]["detections"]] == [1, 2]
+    assert "error" in error
+    assert (summary["frames_processed"], summary["total_tracks"]) == (3, 2)
+    assert repository._track_frequency(None)["total_tracks"] == 2
+    repository.close()